@@ -44,19 +44,24 @@ stabilized.
 import argparse
 import asyncio
 import collections
+import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor
 import configparser
 import itertools
 import json
 import logging
+import math
 import operator
+import os
 from pathlib import Path
 import shlex
 import signal
+import socket
 import sqlite3
 import sys
 import threading
-from tempfile import TemporaryDirectory
+import time
+import zlib
 from random import Random
 
 from rich.console import Console
@@ -64,8 +69,9 @@ from rich.progress import (Progress, SpinnerColumn, TextColumn, TimeElapsedColum
 from rich.table import Table
 
 from pelita.network import RemotePlayerFailure
+from pelita.scripts.pelita_player import files_fingerprint
 from pelita.scripts.script_utils import start_logging
-from pelita.tournament import call_pelita, check_team
+from pelita.tournament import check_team, run_match
 
 _logger = logging.getLogger(__name__)
 
@@ -81,11 +87,127 @@ def signal_handler(_signal, _frame):
 
 signal.signal(signal.SIGINT, signal_handler)
 
+# Skill model: every player has a Gaussian belief N(mu, sigma²) about its
+# strength, which is updated after each game with the Bradley-Terry update
+# of Weng and Lin (A Bayesian Approximation Method for Online Ranking, 2011).
+# The values are on the Elo scale.
+MU_0 = 1500.
+SIGMA_0 = 350.
+# the performance variation within a single game
+BETA = 200.
+# lower bound for the variance reduction factor
+KAPPA = 1e-4
+
+def skill_win_probability(skill1, skill2):
+    """Probability that a player with skill1 = (mu, sigma) wins against skill2."""
+    (mu1, sigma1), (mu2, sigma2) = skill1, skill2
+    c = math.sqrt(2 * BETA**2 + sigma1**2 + sigma2**2)
+    return 1 / (1 + math.exp((mu2 - mu1) / c)), c
+
+def update_skills(skill1, skill2, outcome):
+    """Return the new skills of both players after a game.
+
+    outcome is 1 if player 1 won, 0 if player 2 won and 0.5 for a draw.
+    """
+    (mu1, sigma1), (mu2, sigma2) = skill1, skill2
+    p, c = skill_win_probability(skill1, skill2)
+    (_mu1, new_sigma1), (_mu2, new_sigma2) = expected_skills(skill1, skill2)
+    mu1 += sigma1**2 / c * (outcome - p)
+    mu2 -= sigma2**2 / c * (outcome - p)
+    return (mu1, new_sigma1), (mu2, new_sigma2)
+
+def information_gain(skill1, skill2):
+    """The expected reduction of the summed skill variances by a game between
+    the two players.
+
+    It is small when the outcome is predictable (lopsided pairings) and
+    when both skills are already known precisely.
+    """
+    (_mu1, sigma1), (_mu2, sigma2) = skill1, skill2
+    p, c = skill_win_probability(skill1, skill2)
+    return p * (1 - p) * (sigma1**4 + sigma2**4) / c**2
+
+def choose_pairing(skills, rng):
+    """Return the pair of players with the highest information gain.
+
+    skills : dict[name, (mu, sigma)]
+    """
+    players = list(skills)
+    rng.shuffle(players)
+    return max(itertools.combinations(players, 2),
+               key=lambda pair: information_gain(skills[pair[0]], skills[pair[1]]))
+
+def expected_skills(skill1, skill2):
+    """Return the skills with the variance that they have after a game
+    between the two players (but the same mean).
+
+    Used for games that have been scheduled but are not finished yet.
+    """
+    (mu1, sigma1), (mu2, sigma2) = skill1, skill2
+    p, c = skill_win_probability(skill1, skill2)
+    sigma1 *= math.sqrt(max(1 - sigma1**2 / c**2 * p * (1 - p), KAPPA))
+    sigma2 *= math.sqrt(max(1 - sigma2**2 / c**2 * p * (1 - p), KAPPA))
+    return (mu1, sigma1), (mu2, sigma2)
+
+RESULT_OUTCOME = {
+    0: 1.,
+    1: 0.,
+    -1: 0.5,
+}
+
+# a job fails after this number of attempts
+MAX_JOB_ATTEMPTS = 3
+
+# the version of the database layout (see DB_Wrapper.migrate)
+SCHEMA_VERSION = 1
+
+# number of games that are migrated at once
+MIGRATION_BATCH_SIZE = 1000
+
+def compress_json(obj):
+    return zlib.compress(json.dumps(obj).encode())
+
+def decompress_json(blob):
+    return json.loads(zlib.decompress(blob))
+
+def results_totals(matrix):
+    """Sum the results matrix of ``DB_Wrapper.get_results_matrix`` over all
+    opponents.
+
+    Returns
+    -------
+    totals : dict[name, (wins, losses, draws, fatal_errors)]
+
+    """
+    totals = {}
+    for (pname, _opponent), counts in matrix.items():
+        old = totals.get(pname, (0, 0, 0, 0))
+        totals[pname] = tuple(a + b for a, b in zip(old, counts))
+    return totals
+
+ELO_START = 1500.
+ELO_K = 32
+
+def update_elo(elo1, elo2, outcome):
+    """Return the new Elo ratings of both players after a game.
+
+    outcome is 1 if player 1 won, 0 if player 2 won and 0.5 for a draw.
+    """
+    expected = 1 / (10**((elo2 - elo1) / 400) + 1)
+    change = ELO_K * (outcome - expected)
+    return round(elo1 + change, 2), round(elo2 - change, 2)
+
 async def hash_team(team_spec, semaphore):
+    """Hash the team in a `pelita-player hash-team` subprocess.
+
+    Returns the dict of `pelita.scripts.pelita_player.hash_team_files`
+    or None if the team could not be hashed.
+    """
     external_call = [sys.executable,
                     '-m',
                     'pelita.scripts.pelita_player',
                     'hash-team',
+                    '--json',
                     team_spec]
     async with semaphore:
         _logger.debug("Executing: %r", shlex.join(external_call))
@@ -95,65 +217,62 @@ async def hash_team(team_spec, semaphore):
         )
         stdout, stderr = await proc.communicate()
 
-    return stdout.decode().strip().split("\n")[-1].strip()
+    # the team may print to stdout while it is imported
+    try:
+        return json.loads(stdout.decode().strip().split("\n")[-1])
+    except ValueError:
+        return None
 
 
 def run_game(team_specs, config):
     """Run a single game.
 
-    This method runs a single game and returns the result.
+    This method runs a single game in the current process and returns the result.
 
     Parameters
     ----------
-    p1, p2 : int
-        the indices of the players
+    team_specs : list
+        the paths of the two players
+    config : dict
+        rounds, size, viewer and seed of the game
 
     """
 
-    with TemporaryDirectory() as tmpdir:
-        final_state, stdout, stderr = call_pelita(team_specs,
-                                                            rounds=config['rounds'],
-                                                            size=config['size'],
-                                                            viewer=config['viewer'],
-                                                            seed=config['seed'],
-                                                            store_output=tmpdir,
-                                                            timeout=10,
-                                                            initial_timeout=120,
-                                                            exit_flag=EXIT
-                                                            )
-
-        if not final_state:
-            result = None
-
-        if final_state['game_phase'] != 'FINISHED':
-            _logger.info("Game finished in phase %s", final_state['game_phase'])
-            result = -2
+    match = run_match(team_specs,
+                      rounds=config['rounds'],
+                      size=config['size'],
+                      viewer=config['viewer'],
+                      seed=config['seed'],
+                      timeout=10,
+                      initial_timeout=120,
+                      exit_flag=EXIT
+                      )
+    final_state = match.final_state
+
+    if not final_state:
+        result = None
+    elif final_state['game_phase'] != 'FINISHED':
+        _logger.info("Game finished in phase %s", final_state['game_phase'])
+        result = -2
+    else:
+        if final_state['whowins'] == 2:
+            result = -1
         else:
-            if final_state['whowins'] == 2:
-                result = -1
-            else:
-                result = final_state['whowins']
+            result = final_state['whowins']
 
-        try:
-            del final_state['walls']
-            del final_state['food']
-        except IndexError:
-            pass
-
-        _logger.info('Final state: %r', final_state)
-        _logger.debug('Stdout: %r', stdout)
-        if stderr:
-            _logger.warning('Stderr: %r', stderr)
-
-        p1_stdout = (Path(tmpdir) / 'blue.out').read_text()
-        p1_stderr = (Path(tmpdir) / 'blue.err').read_text()
+    if final_state:
+        del final_state['walls']
+        del final_state['food']
 
-        p2_stdout = (Path(tmpdir) / 'red.out').read_text()
-        p2_stderr = (Path(tmpdir) / 'red.err').read_text()
+    _logger.info('Final state: %r', final_state)
+    _logger.debug('Stdout: %r', match.stdout)
+    if match.stderr:
+        _logger.warning('Stderr: %r', match.stderr)
 
-        res = (result, final_state, [stdout, stderr], [p1_stdout, p1_stderr], [p2_stdout, p2_stderr])
-        return res
+    (p1_stdout, p1_stderr), (p2_stdout, p2_stderr) = match.team_output
 
+    res = (result, final_state, [match.stdout, match.stderr], [p1_stdout, p1_stderr], [p2_stdout, p2_stderr])
+    return res
 
 
 class CI_Engine:
@@ -177,24 +296,42 @@ class CI_Engine:
         self.db_file = database or config.get('general', 'db_file')
         self.dbwrapper = DB_Wrapper(self.db_file)
 
-    def load_players(self, concurrency=1):
-        hash_cache = {}
+    def load_players(self, concurrency=1, use_cache=True):
+        """Hash the players and query their team names.
 
+        Players whose hash changed are reset in the database. Teams whose
+        files are unchanged since they have last been hashed (according to
+        their size, modification time and inode) are taken from the team
+        cache without starting a player subprocess, unless `use_cache`
+        is False.
+
+        """
         # remove players from db which are not in the config anymore
         for pname in self.dbwrapper.get_players():
             if pname not in self.players:
                 _logger.debug('Removing %s from database, because it is not among the current players.' % (pname))
                 self.dbwrapper.remove_player(pname)
 
+        team_cache = self.dbwrapper.get_team_cache() if use_cache else {}
+        cached = {}
+        for pname, player in self.players.items():
+            entry = team_cache.get(player['path'])
+            if entry is not None and files_fingerprint(entry['files']) == entry['fingerprint']:
+                _logger.debug('Using the cached hash and team name for %s.' % pname)
+                cached[pname] = entry
+        stale = [pname for pname in self.players if pname not in cached]
+
         semaphore = asyncio.Semaphore(concurrency)
 
         async def do_hash():
-            players = [(pname, player['path']) for pname, player in self.players.items()]
-            tasks = [asyncio.create_task(hash_team(player[1], semaphore)) for player in players]
-            hashes = await asyncio.gather(*tasks)
-            return {player[0]: hash for (player, hash) in zip(players, hashes)}
+            tasks = [asyncio.create_task(hash_team(self.players[pname]['path'], semaphore)) for pname in stale]
+            infos = await asyncio.gather(*tasks)
+            return dict(zip(stale, infos))
 
-        hash_cache = asyncio.run(do_hash())
+        hash_infos = asyncio.run(do_hash())
+        hash_cache = {pname: entry['hash'] for pname, entry in cached.items()}
+        for pname, info in hash_infos.items():
+            hash_cache[pname] = info['hash'] if info else ''
 
         # add new players into db
         for pname, player in self.players.items():
@@ -223,8 +360,11 @@ class CI_Engine:
                 _logger.debug(f'Could not import {pname} at path {path} ({e_type}): {e_msg}')
                 return { 'error': e.args }
 
+        for pname, entry in cached.items():
+            self.dbwrapper.add_team_name(pname, entry['team_name'])
+
         with ThreadPoolExecutor(max_workers=concurrency) as executor:
-            players = [(pname, player['path']) for pname, player in self.players.items()]
+            players = [(pname, self.players[pname]['path']) for pname in stale]
             team_names = executor.map(check_team_name, players)
 
             for (pname, path), team_name in zip(players, team_names):
@@ -232,6 +372,11 @@ class CI_Engine:
                     self.players[pname]['error'] = team_name['error']
                 else:
                     self.dbwrapper.add_team_name(pname, team_name['team_name'])
+                    # only teams that could be hashed and loaded are cached
+                    info = hash_infos[pname]
+                    if info and info['fingerprint'] is not None:
+                        self.dbwrapper.set_team_cache(path, info['files'], info['fingerprint'],
+                                                      info['hash'], team_name['team_name'])
 
         for pname in self.players:
              if 'error' in self.players[pname]:
@@ -239,12 +384,81 @@ class CI_Engine:
              else:
                  print(pname, self.players[pname], self.dbwrapper.get_team_name(pname))
 
-    def start(self, n, concurrency):
+    def play(self, p1, p2):
+        """Play a game between the players p1 and p2 and return the result of `run_game`."""
+        config = {
+            'rounds': self.rounds,
+            'size': self.size,
+            'viewer': self.viewer,
+            'seed': None, # TODO
+        }
+
+        team_specs = [self.players[p1]['path'], self.players[p2]['path']]
+        return run_game(team_specs, config)
+
+    def next_match(self, rng, pending=(), matchmaking='information'):
+        """Choose the players of the next match.
+
+        With the 'information' matchmaking, the next match is the pairing
+        with the highest expected information gain for the skills (see
+        `information_gain`). With 'fewest-games', the player with the
+        fewest games plays against a random other player.
+
+        Parameters
+        ----------
+        rng : Random
+        pending : iterable of (player1, player2)
+            matches that have been scheduled but are not stored yet. They
+            count as if they had already been played.
+        matchmaking : 'information' or 'fewest-games'
+
+        Returns
+        -------
+        players : list
+            the two players in the order of their colours
+
+        """
+        active = [pname for pname in self.dbwrapper.get_players()
+                  if pname in self.players and "error" not in self.players[pname]]
+
+        if matchmaking == 'information':
+            all_skills = self.dbwrapper.get_skills()
+            skills = {pname: all_skills[pname] for pname in active}
+            for a, b in pending:
+                if a in skills and b in skills:
+                    skills[a], skills[b] = expected_skills(skills[a], skills[b])
+
+            players = list(choose_pairing(skills, rng))
+        else:
+            all_game_counts = self.dbwrapper.get_game_counts()
+            game_counts = {pname: all_game_counts[pname] for pname in active}
+            for a, b in pending:
+                for pname in (a, b):
+                    if pname in game_counts:
+                        game_counts[pname] += 1
+
+            # choose the player with the least number of played games,
+            # match with another random player
+            players_sorted = sorted(list(game_counts.items()), key=operator.itemgetter(1))
+
+            a = players_sorted[0][0]
+            b = rng.choice(players_sorted[1:])[0]
+            players = [a, b]
+
+        # shuffle the sides
+        rng.shuffle(players)
+        return players
+
+    def start(self, n, concurrency, matchmaking='information', commit_every=16, commit_interval=60):
         """Start the Engine.
 
-        This method will start and run n matches, testing each agent
-        randomly against another one. The result is printed after each
-        game.
+        This method will start and run n matches in `concurrency`
+        threads. The matches are chosen with `next_match`. The result
+        is printed after each game.
+
+        The results are committed to the database after every
+        `commit_every` games or `commit_interval` seconds, whichever
+        comes first, and when the engine stops.
 
         Currently the only way to stop the engine is via CTRL-C.
 
@@ -266,77 +480,142 @@ class CI_Engine:
                 with lock:
                     progress_task = progress.add_task(f"Playing #{count}: {p1} against {p2}.")
 
-                config = {
-                    'rounds': self.rounds,
-                    'size': self.size,
-                    'viewer': self.viewer,
-                    'seed': None, # TODO
-                }
-
-                team_specs = [self.players[p1]['path'], self.players[p2]['path']]
-                res = run_game(team_specs, config)
+                res = self.play(p1, p2)
 
                 with lock:
                     progress.update(progress_task, completed=True, visible=False)
 
                 return count, (p1, p2), res
 
-            def producer():
-                rng = Random()
-
-                game_counts = self.dbwrapper.get_game_counts()
-
-                for count in range(n):
-                    for pname, player in self.players.items():
-                        if "error" in player and pname in game_counts:
-                            del game_counts[pname]
-
-                    # choose the player with the least number of played games,
-                    # match with another random player
-                    # shuffle the sides and let them play
-
-                    players_sorted = sorted(list(game_counts.items()), key=operator.itemgetter(1))
-
-                    a = players_sorted[0][0]
-                    b = rng.choice(players_sorted[1:])[0]
-
-                    players = [a, b]
-                    rng.shuffle(players)
-
-                    _logger.debug(f"Adding match {count} ({players[0]} vs {players[1]}) to worker queue")
-                    task = (count, players[0], players[1])
-
-                    yield task
+            # matches that have been handed to the workers but are not stored yet
+            pending = {}
+            rng = Random()
+
+            def store(result):
+                count, players, res = result
+                pending.pop(count, None)
+
+                p1_name, p2_name = players
+                winner, final_state, out, p1_out, p2_out = res
+
+                if final_state:
+                    match final_state["whowins"]:
+                        case 0:
+                            progress.console.print(f"Storing #{count}: [u]{players[0]}[/u] against {players[1]}.")
+                        case 1:
+                            progress.console.print(f"Storing #{count}: {players[0]} against [u]{players[1]}[/u].")
+                        case _:
+                            progress.console.print(f"Storing #{count}: {players[0]} against {players[1]}.")
+                else:
+                    progress.console.print(f"Not storing #{count}: {players[0]} against {players[1]}.")
+                self.dbwrapper.add_gameresult(p1_name, p2_name, winner, final_state, out, p1_out, p2_out, commit=False)
 
-                    game_counts[a] += 1
-                    game_counts[b] += 1
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                uncommitted = 0
+                last_commit = time.monotonic()
+                running = set()
+                count = 0
+                try:
+                    while count < n or running:
+                        # choose the next match only when a worker is free,
+                        # so that it takes all stored results into account
+                        while count < n and len(running) < concurrency:
+                            players = self.next_match(rng, pending.values(), matchmaking=matchmaking)
+                            _logger.debug(f"Adding match {count} ({players[0]} vs {players[1]}) to worker queue")
+                            pending[count] = players
+                            running.add(executor.submit(worker, count, *players))
+                            count += 1
+
+                        done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                        for future in done:
+                            store(future.result())
+                            uncommitted += 1
+                        if uncommitted >= commit_every or time.monotonic() - last_commit >= commit_interval:
+                            self.dbwrapper.commit()
+                            uncommitted = 0
+                            last_commit = time.monotonic()
+                finally:
+                    self.dbwrapper.commit()
+
+
+    def schedule(self, n, queue_size, matchmaking='information', poll_interval=5):
+        """Fill the job queue in the database with n matches.
+
+        The queue is kept at `queue_size` queued matches, so that the
+        matches are chosen with the latest results. Queued and running
+        jobs count as pending matches for `next_match`.
+
+        Stop with CTRL-C.
+        """
+        rng = Random()
+        scheduled = 0
+        while scheduled < n and not EXIT.is_set():
+            queued = self.dbwrapper.get_job_counts().get('queued', 0)
+            for _ in range(min(queue_size - queued, n - scheduled)):
+                pending = self.dbwrapper.get_pending_jobs()
+                p1, p2 = self.next_match(rng, pending, matchmaking=matchmaking)
+                job_id = self.dbwrapper.enqueue_job(p1, p2)
+                _logger.info(f"Scheduled job {job_id}: {p1} against {p2}.")
+                scheduled += 1
+            if scheduled < n:
+                EXIT.wait(poll_interval)
+
+    def work(self, worker_name=None, lease=60, poll_interval=5, exit_when_empty=False):
+        """Play the matches from the job queue in the database.
+
+        Several workers (in separate processes) can work on the same
+        database. A worker leases a job for `lease` seconds and renews
+        the lease while the game is running. The job of a worker that
+        crashed is played by another worker when its lease has expired.
 
+        Parameters
+        ----------
+        worker_name : str, optional
+            the name of the worker in the job queue (default: host and process id)
+        lease : float
+            the lease time in seconds
+        poll_interval : float
+            the time in seconds to wait when the queue is empty
+        exit_when_empty : bool
+            stop when there is no job in the queue
 
-            with ThreadPoolExecutor(max_workers=concurrency) as executor:
-                if sys.version_info < (3, 14):
-                    _logger.warning(f"Generating all {n} match partners. Use Python 3.14+ to do this lazily.")
-                    buffersize = {}
+        """
+        if worker_name is None:
+            worker_name = f"{socket.gethostname()}-{os.getpid()}"
+        console = Console()
+
+        while not EXIT.is_set():
+            job = self.dbwrapper.claim_job(worker_name, lease)
+            if job is None:
+                if exit_when_empty:
+                    return
+                EXIT.wait(poll_interval)
+                continue
+
+            job_id, p1, p2 = job
+            console.print(f"Playing job {job_id}: {p1} against {p2}.")
+            finished = False
+            try:
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    future = executor.submit(self.play, p1, p2)
+                    # renew the lease while the game is running
+                    while not concurrent.futures.wait([future], timeout=lease / 3).done:
+                        if not self.dbwrapper.heartbeat(job_id, worker_name, lease):
+                            _logger.warning("Lost the lease for job %d.", job_id)
+                    winner, final_state, out, p1_out, p2_out = future.result()
+
+                if not final_state:
+                    console.print(f"Not storing job {job_id}: {p1} against {p2}.")
+                    self.dbwrapper.fail_job(job_id, worker_name)
+                elif self.dbwrapper.finish_job(job_id, worker_name, p1, p2, winner, final_state, out, p1_out, p2_out):
+                    console.print(f"Storing job {job_id}: {p1} against {p2}.")
                 else:
-                    buffersize = {'buffersize': concurrency}
-
-                for result in executor.map(lambda args: worker(*args), producer(), **buffersize):
-                    count, players, res = result
-
-                    p1_name, p2_name = players
-                    winner, final_state, out, p1_out, p2_out = res
-
-                    if final_state:
-                        match final_state["whowins"]:
-                            case 0:
-                                progress.console.print(f"Storing #{count}: [u]{players[0]}[/u] against {players[1]}.")
-                            case 1:
-                                progress.console.print(f"Storing #{count}: {players[0]} against [u]{players[1]}[/u].")
-                            case _:
-                                progress.console.print(f"Storing #{count}: {players[0]} against {players[1]}.")
-                    else:
-                        progress.console.print(f"Not storing #{count}: {players[0]} against {players[1]}.")
-                    self.dbwrapper.add_gameresult(p1_name, p2_name, winner, final_state, out, p1_out, p2_out)
-
+                    console.print(f"Not storing job {job_id}: it has been taken over by another worker.")
+                finished = True
+            finally:
+                if not finished:
+                    # interrupted: let another worker play the match
+                    self.dbwrapper.release_job(job_id, worker_name)
 
     def get_results(self, p1_name, p2_name=None):
         """Get the results so far.
@@ -423,31 +702,8 @@ class CI_Engine:
         return self.dbwrapper.get_team_name(p_name)
 
     def gen_elo(self):
-        k = 32
-
-        def elo_change(a, b, outcome):
-            expected = 1 / ( 10**((b - a) / 400) + 1 )
-            return k * (outcome - expected)
-
-        from collections import defaultdict
-        elo = defaultdict(lambda: 1500.)
-
-        g = self.dbwrapper.cursor.execute("""
-        SELECT player1, player2, result
-        FROM games
-        """).fetchall()
-        for p1, p2, result in g:
-            change = 0
-            if result == 0:
-                change = elo_change(elo[p1], elo[p2], 1)
-            if result == 1:
-                change = elo_change(elo[p1], elo[p2], 0)
-            if result == -1:
-                change = elo_change(elo[p1], elo[p2], 0.5)
-
-            elo[p1] += change
-            elo[p2] -= change
-
+        elo = collections.defaultdict(lambda: ELO_START)
+        elo.update(self.dbwrapper.get_elo())
         return elo
 
     def pretty_print_results(self, full=False, team=None, highlight=None, html_export=None):
@@ -471,19 +727,22 @@ class CI_Engine:
         table.add_column("# Losses")
         table.add_column("Score")
         table.add_column("ELO")
+        table.add_column("Skill")
         table.add_column("# Fatal Errors")
 
         elo = dict(self.dbwrapper.get_elo())
+        skills = self.dbwrapper.get_skills()
         # elo = self.gen_elo()
 
+        # all tables are rendered from the same results matrix
+        matrix = self.dbwrapper.get_results_matrix()
+        totals = results_totals(matrix)
+        team_names = self.dbwrapper.get_team_names()
+
         result = []
         for idx, pname in enumerate(good_players):
-            win, loss, draw = self.get_results(pname)
-            fatalerror_count = self.get_errorcount(pname)
-            try:
-                team_name = self.get_team_name(pname)
-            except ValueError:
-                team_name = None
+            win, loss, draw, fatalerror_count = totals.get(pname, (0, 0, 0, 0))
+            team_name = team_names.get(pname)
             score = 0 if (win+loss+draw) == 0 else (win-loss) / (win+loss+draw)
             result.append([score, win, draw, loss, pname, team_name, fatalerror_count])
 
@@ -499,6 +758,7 @@ class CI_Engine:
                 f"{loss}",
                 f"{score:6.3f}",
                 f"{elo.get(name, 0): >4.0f}",
+                "{: >4.0f} ± {:.0f}".format(*skills.get(name, (MU_0, SIGMA_0))),
                 f"{fatalerror_count}",
                 style=style,
             )
@@ -516,9 +776,6 @@ class CI_Engine:
                 # Let’s be honest: You should enlarge your terminal window even before that
                 MAX_COLUMNS = 4
 
-            res = self.dbwrapper.get_wins_losses()
-            rows = { k: list(v) for k, v in itertools.groupby(res, key=lambda x:x[0]) }
-
             num_rows_per_player = (len(good_players) // MAX_COLUMNS) + 1
             row_style = [*([""] * num_rows_per_player), *(["dim"] * num_rows_per_player)]
 
@@ -547,24 +804,15 @@ class CI_Engine:
                     yield batch
 
             for idx, pname in enumerate(good_players):
-                win, loss, draw = self.get_results(pname)
-                fatalerror_count = self.get_errorcount(pname)
-                try:
-                    team_name = self.get_team_name(pname)
-                except ValueError:
-                    team_name = None
-                score = 0 if (win+loss+draw) == 0 else (win-loss) / (win+loss+draw)
-                wdl = f"{win:3d},{draw:3d},{loss:3d}"
-
-                try:
-                    row = rows[pname]
-                except KeyError:
+                win, loss, draw, fatalerror_count = totals.get(pname, (0, 0, 0, 0))
+                if (win+loss+draw) == 0:
                     continue
-                vals = { k: (w,l,d) for _p1, k, w, l, d in row }
+                score = (win-loss) / (win+loss+draw)
+                wdl = f"{win:3d},{draw:3d},{loss:3d}"
 
                 cross_results = []
                 for idx2, p2name in enumerate(good_players):
-                    win, loss, draw = vals.get(p2name, (0, 0, 0))
+                    win, loss, draw, _fatal_errors = matrix.get((pname, p2name), (0, 0, 0, 0))
                     if idx == idx2:
                         cross_results.append("  - - - ")
                     else:
@@ -584,9 +832,6 @@ class CI_Engine:
                 # Let’s be honest: You should enlarge your terminal window even before that
                 MAX_COLUMNS = 4
 
-            res = self.dbwrapper.get_wins_losses(team=team)
-            rows = {k: list(v) for k, v in itertools.groupby(res, key=lambda x:x[1])}
-
             row_style = ["", "dim"]
 
             table = Table(row_styles=row_style, title=f"Match results for team {team}")
@@ -597,28 +842,21 @@ class CI_Engine:
             table.add_column("# Losses")
 
             for idx, pname in enumerate(good_players):
-                try:
-                    team_name = self.get_team_name(pname)
-                except ValueError:
-                    team_name = None
+                team_name = team_names.get(pname)
 
-                try:
-                    row = rows[pname]
-                except KeyError:
+                win, loss, draw, _fatal_errors = matrix.get((team, pname), (0, 0, 0, 0))
+                if (win+loss+draw) == 0:
                     continue
 
-                for r in row: # there should only be one row
-                    p1, p2, win, loss, draw = r
-
-                    display_name = f"{pname} ({team_name})" if team_name else f"{pname}"
+                display_name = f"{pname} ({team_name})" if team_name else f"{pname}"
 
-                    table.add_row(
-                        display_name,
-                        f"{win+draw+loss}",
-                        f"{win}",
-                        f"{draw}",
-                        f"{loss}",
-                    )
+                table.add_row(
+                    display_name,
+                    f"{win+draw+loss}",
+                    f"{win}",
+                    f"{draw}",
+                    f"{loss}",
+                )
 
             console.print(table)
 
@@ -642,9 +880,14 @@ class DB_Wrapper:
         """
         self.db_file = dbfile
         _logger.info("Using sqlite database file ‘%s’.", self.db_file)
-        self.connection = sqlite3.connect(self.db_file)
+        # wait for the other processes (workers, scheduler) to release their locks
+        self.connection = sqlite3.connect(self.db_file, timeout=60)
         self.cursor = self.connection.cursor()
         self.cursor.execute("PRAGMA foreign_keys = ON;")
+        # readers (print-scores) do not block the engine and vice versa;
+        # with WAL, synchronous=NORMAL is still safe against corruption
+        self.cursor.execute("PRAGMA journal_mode = WAL;")
+        self.cursor.execute("PRAGMA synchronous = NORMAL;")
         self.create_tables()
 
     def create_tables(self):
@@ -672,13 +915,134 @@ class DB_Wrapper:
         FOREIGN KEY(player2) REFERENCES players(name) ON DELETE CASCADE)
         """)
         self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS game_output
-        (game_id int,
-        stdout text, stderr text,
-        player1_stdout text, player1_stderr text,
-        player2_stdout text, player2_stderr text,
+        CREATE TABLE IF NOT EXISTS skills
+        (name text PRIMARY KEY, mu real, sigma real,
+        FOREIGN KEY(name) REFERENCES players(name) ON DELETE CASCADE)
+        """)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ratings
+        (name text PRIMARY KEY, elo real,
+        FOREIGN KEY(name) REFERENCES players(name) ON DELETE CASCADE)
+        """)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rating_history
+        (game_id int, name text, elo real,
+        PRIMARY KEY(game_id, name),
+        FOREIGN KEY(game_id) REFERENCES games(id) ON DELETE CASCADE,
+        FOREIGN KEY(name) REFERENCES players(name) ON DELETE CASCADE)
+        """)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS game_blobs
+        (game_id INTEGER PRIMARY KEY,
+        final_state blob, output blob,
         FOREIGN KEY(game_id) REFERENCES games(id) ON DELETE CASCADE)
         """)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jobs
+        (
+        id INTEGER PRIMARY KEY,
+        player1 text, player2 text,
+        status text, worker text, lease_expires real, attempts int,
+        game_id int,
+        FOREIGN KEY(player1) REFERENCES players(name) ON DELETE CASCADE,
+        FOREIGN KEY(player2) REFERENCES players(name) ON DELETE CASCADE)
+        """)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS team_cache
+        (path text PRIMARY KEY, files text, fingerprint text,
+        hash text, team_name text)
+        """)
+        self.cursor.execute("""
+        CREATE INDEX IF NOT EXISTS jobs_status
+        ON jobs(status, id)
+        """)
+        self.cursor.execute("""
+        CREATE INDEX IF NOT EXISTS games_player1
+        ON games(player1, player2, result)
+        """)
+        self.cursor.execute("""
+        CREATE INDEX IF NOT EXISTS games_player2
+        ON games(player2, player1, result)
+        """)
+        self.cursor.execute("""
+        CREATE INDEX IF NOT EXISTS rating_history_name
+        ON rating_history(name, game_id)
+        """)
+        self.connection.commit()
+        self.migrate()
+
+        # databases from earlier versions have games but no skills or ratings
+        has_games, = self.cursor.execute("SELECT EXISTS (SELECT 1 FROM games)").fetchone()
+        has_skills, = self.cursor.execute("SELECT EXISTS (SELECT 1 FROM skills)").fetchone()
+        has_ratings, = self.cursor.execute("SELECT EXISTS (SELECT 1 FROM ratings)").fetchone()
+        if has_games and not has_skills:
+            self.rebuild_skills()
+        if has_games and not has_ratings:
+            self.rebuild_ratings()
+
+    def migrate(self):
+        """Migrate the data of a database from an earlier version.
+
+        The version of the database is stored in its ``user_version``.
+
+        """
+        version, = self.cursor.execute("PRAGMA user_version").fetchone()
+        if version < 1:
+            self._migrate_game_output()
+        self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.commit()
+
+    def _migrate_game_output(self):
+        # version 1: the final state and the output of a game are stored
+        # compressed in game_blobs instead of the games and game_output tables
+        has_game_output, = self.cursor.execute("""
+        SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'game_output')
+        """).fetchone()
+        if not has_game_output:
+            return
+        _logger.info("Moving the game output to the game_blobs table.")
+        # the output of all games does not fit into memory (or into the WAL).
+        # Every batch is committed on its own; an interrupted migration
+        # continues with the games whose final_state has not been moved yet.
+        read_cursor = self.connection.cursor()
+        last_id = -1
+        while True:
+            rows = read_cursor.execute("""
+            SELECT g.id, g.final_state,
+                o.stdout, o.stderr,
+                o.player1_stdout, o.player1_stderr,
+                o.player2_stdout, o.player2_stderr
+            FROM games g LEFT JOIN game_output o
+            ON g.id = o.game_id
+            WHERE g.final_state IS NOT NULL AND g.id > ?
+            ORDER BY g.id
+            LIMIT ?
+            """, (last_id, MIGRATION_BATCH_SIZE)).fetchall()
+            if not rows:
+                break
+            self.cursor.executemany("""
+            INSERT OR REPLACE INTO game_blobs
+            VALUES (?, ?, ?)
+            """, [(game_id, zlib.compress(final_state_str.encode()), compress_json(output))
+                  for game_id, final_state_str, *output in rows])
+            first_id, last_id = rows[0][0], rows[-1][0]
+            del rows
+            self.cursor.execute("""
+            UPDATE games SET final_state = NULL
+            WHERE id >= ? AND id <= ?
+            """, (first_id, last_id))
+            self.connection.commit()
+        self.cursor.execute("UPDATE games SET final_state = NULL")
+        self.cursor.execute("DROP TABLE game_output")
+        self.connection.commit()
+
+        # give the space of the old tables back to the file system
+        _logger.info("Compacting the database.")
+        self.cursor.execute("VACUUM")
+        self.cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def commit(self):
+        """Commit the games that were added with ``commit=False``."""
         self.connection.commit()
 
     def get_players(self):
@@ -752,6 +1116,45 @@ class DB_Wrapper:
         except sqlite3.IntegrityError:
             raise ValueError('Cannot add team name for %s' % name)
 
+    def get_team_cache(self):
+        """Get the cached hashes and team names of the team paths.
+
+        Returns
+        -------
+        team_cache : dict[path, dict]
+            with the keys 'files', 'fingerprint', 'hash' and 'team_name'
+
+        """
+        rows = self.cursor.execute("""
+        SELECT path, files, fingerprint, hash, team_name FROM team_cache
+        """).fetchall()
+        return {
+            path: {'files': json.loads(files), 'fingerprint': fingerprint, 'hash': h, 'team_name': team_name}
+            for path, files, fingerprint, h, team_name in rows
+        }
+
+    def set_team_cache(self, path, files, fingerprint, h, team_name):
+        """Adds or updates the cached hash and team name of a team path.
+
+        Parameters
+        ----------
+        path : str
+            the path of the team
+        files : list of str
+            the files that have been hashed
+        fingerprint : str
+            the fingerprint of the files when they were hashed
+        h : str
+            hash of the team
+        team_name : str
+
+        """
+        self.cursor.execute("""
+        INSERT OR REPLACE INTO team_cache
+        VALUES (?, ?, ?, ?, ?)
+        """, [path, json.dumps(files), fingerprint, h, team_name])
+        self.connection.commit()
+
     def remove_player(self, pname):
         """Remove a player from the database.
 
@@ -768,10 +1171,16 @@ class DB_Wrapper:
         self.cursor.execute("""DELETE FROM players
         WHERE name = ?""", (pname,))
         self.connection.commit()
+        # the skills and ratings of the other players must not include the removed games
+        self.rebuild_skills()
+        self.rebuild_ratings()
 
-    def add_gameresult(self, p1_name, p2_name, result, final_state, std, p1_out, p2_out):
+    def add_gameresult(self, p1_name, p2_name, result, final_state, std, p1_out, p2_out, commit=True):
         """Add a new game result to the database.
 
+        The final state and the output are stored compressed in the
+        ``game_blobs`` table (see ``get_final_state`` and ``get_game_output``).
+
         Parameters
         ----------
         p1_name, p2_name : str
@@ -783,6 +1192,14 @@ class DB_Wrapper:
             -2 if anything other than game_phase FINISHED
         std_out, std_err : str
             STDOUT and STDERR of the game
+        commit : bool
+            commit the transaction. If False, the game is only stored
+            after the next ``commit``.
+
+        Returns
+        -------
+        game_id : int or None
+            the id of the game or None if it was not stored
 
         """
 
@@ -793,27 +1210,286 @@ class DB_Wrapper:
         if not final_state:
             return
 
-        final_state_str = json.dumps(final_state)
-
         player1_had_fatal_error = len(final_state['fatal_errors'][0]) != 0
         player2_had_fatal_error = len(final_state['fatal_errors'][1]) != 0
 
         self.cursor.execute("""
         INSERT INTO games
-            (player1, player2, result, final_state,
+            (player1, player2, result,
             player1_had_fatal_error, player2_had_fatal_error)
-        VALUES (?, ?, ?, ?, ?, ?)
+        VALUES (?, ?, ?, ?, ?)
         RETURNING id
-        """, [p1_name, p2_name, result, final_state_str,
+        """, [p1_name, p2_name, result,
               player1_had_fatal_error, player2_had_fatal_error])
 
         game_id, = self.cursor.fetchone()
         self.cursor.execute("""
-        INSERT INTO game_output
-        VALUES (?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO game_blobs
+        VALUES (?, ?, ?)
         """, [game_id,
-              stdout, stderr,
-              p1_stdout, p1_stderr, p2_stdout, p2_stderr])
+              compress_json(final_state),
+              compress_json([stdout, stderr, p1_stdout, p1_stderr, p2_stdout, p2_stderr])])
+        self._update_skills(p1_name, p2_name, result)
+        self._update_ratings(game_id, p1_name, p2_name, result)
+        if commit:
+            self.connection.commit()
+        return game_id
+
+    def enqueue_job(self, p1_name, p2_name):
+        """Add a match to the job queue.
+
+        Returns
+        -------
+        job_id : int
+
+        """
+        self.cursor.execute("""
+        INSERT INTO jobs
+            (player1, player2, status, attempts)
+        VALUES (?, ?, 'queued', 0)
+        RETURNING id
+        """, [p1_name, p2_name])
+        job_id, = self.cursor.fetchone()
+        self.connection.commit()
+        return job_id
+
+    def claim_job(self, worker, lease, now=None):
+        """Lease the oldest queued job for `lease` seconds.
+
+        Running jobs with an expired lease (their worker has probably
+        crashed) are claimed again, unless they have been tried
+        MAX_JOB_ATTEMPTS times. Then they fail.
+
+        Returns
+        -------
+        job : (job_id, player1, player2) or None
+            None if there is no job to claim
+
+        """
+        if now is None:
+            now = time.time()
+        self.cursor.execute("""
+        UPDATE jobs
+        SET status = 'failed'
+        WHERE status = 'running' AND lease_expires < :now AND attempts >= :max_attempts
+        """, dict(now=now, max_attempts=MAX_JOB_ATTEMPTS))
+        job = self.cursor.execute("""
+        UPDATE jobs
+        SET status = 'running', worker = :worker, lease_expires = :now + :lease, attempts = attempts + 1
+        WHERE id = (
+            SELECT id FROM jobs
+            WHERE status = 'queued' OR (status = 'running' AND lease_expires < :now)
+            ORDER BY id
+            LIMIT 1
+        )
+        RETURNING id, player1, player2
+        """, dict(worker=worker, now=now, lease=lease)).fetchone()
+        self.connection.commit()
+        return job
+
+    def heartbeat(self, job_id, worker, lease, now=None):
+        """Renew the lease of a running job.
+
+        Returns False if the job is not leased by this worker anymore.
+        """
+        if now is None:
+            now = time.time()
+        self.cursor.execute("""
+        UPDATE jobs
+        SET lease_expires = ?
+        WHERE id = ? AND worker = ? AND status = 'running'
+        """, [now + lease, job_id, worker])
+        self.connection.commit()
+        return self.cursor.rowcount == 1
+
+    def finish_job(self, job_id, worker, p1_name, p2_name, result, final_state, std, p1_out, p2_out):
+        """Store the game result of a job (see `add_gameresult`) and mark it as done.
+
+        The result is stored only if the job is still leased by this worker.
+
+        Returns
+        -------
+        stored : bool
+
+        """
+        self.cursor.execute("""
+        UPDATE jobs
+        SET status = 'done'
+        WHERE id = ? AND worker = ? AND status = 'running'
+        """, [job_id, worker])
+        if self.cursor.rowcount != 1:
+            self.connection.rollback()
+            return False
+        game_id = self.add_gameresult(p1_name, p2_name, result, final_state, std, p1_out, p2_out, commit=False)
+        self.cursor.execute("""
+        UPDATE jobs
+        SET game_id = ?
+        WHERE id = ?
+        """, [game_id, job_id])
+        self.connection.commit()
+        return True
+
+    def fail_job(self, job_id, worker):
+        """Queue a job again after a failed game (or let it fail after
+        MAX_JOB_ATTEMPTS attempts)."""
+        self.cursor.execute("""
+        UPDATE jobs
+        SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, worker = NULL
+        WHERE id = ? AND worker = ? AND status = 'running'
+        """, [MAX_JOB_ATTEMPTS, job_id, worker])
+        self.connection.commit()
+
+    def release_job(self, job_id, worker):
+        """Queue a job again without counting the attempt."""
+        self.cursor.execute("""
+        UPDATE jobs
+        SET status = 'queued', worker = NULL, attempts = attempts - 1
+        WHERE id = ? AND worker = ? AND status = 'running'
+        """, [job_id, worker])
+        self.connection.commit()
+
+    def get_job_counts(self):
+        """Get the number of jobs per status.
+
+        Returns
+        -------
+        counts : dict[status, int]
+            status is one of 'queued', 'running', 'done' and 'failed'
+
+        """
+        return dict(self.cursor.execute("""
+        SELECT status, COUNT(*) FROM jobs
+        GROUP BY status
+        """).fetchall())
+
+    def get_pending_jobs(self):
+        """Get the players of all queued and running jobs.
+
+        Returns
+        -------
+        jobs : list of (player1, player2)
+
+        """
+        return self.cursor.execute("""
+        SELECT player1, player2 FROM jobs
+        WHERE status IN ('queued', 'running')
+        ORDER BY id
+        """).fetchall()
+
+    def get_final_state(self, game_id):
+        """Get the final state of a game.
+
+        Raises
+        ------
+        ValueError : if the game does not exist in the database
+
+        """
+        row = self.cursor.execute("""
+        SELECT final_state FROM game_blobs
+        WHERE game_id = ?
+        """, (game_id,)).fetchone()
+        if row is None:
+            raise ValueError('Game %s does not exist in database.' % game_id)
+        return decompress_json(row[0])
+
+    def get_game_output(self, game_id):
+        """Get the output of a game.
+
+        Returns
+        -------
+        output : dict
+            stdout, stderr, player1_stdout, player1_stderr,
+            player2_stdout and player2_stderr of the game
+
+        Raises
+        ------
+        ValueError : if the game does not exist in the database
+
+        """
+        row = self.cursor.execute("""
+        SELECT output FROM game_blobs
+        WHERE game_id = ?
+        """, (game_id,)).fetchone()
+        if row is None:
+            raise ValueError('Game %s does not exist in database.' % game_id)
+        keys = ['stdout', 'stderr', 'player1_stdout', 'player1_stderr', 'player2_stdout', 'player2_stderr']
+        return dict(zip(keys, decompress_json(row[0])))
+
+    def _update_ratings(self, game_id, p1_name, p2_name, result):
+        # incrementally update the Elo ratings and their history
+        if result not in RESULT_OUTCOME:
+            return
+        elo = dict(self.cursor.execute("""
+        SELECT name, elo FROM ratings
+        WHERE name IN (?, ?)
+        """, (p1_name, p2_name)).fetchall())
+        elo1, elo2 = update_elo(elo.get(p1_name, ELO_START), elo.get(p2_name, ELO_START), RESULT_OUTCOME[result])
+        self.cursor.executemany("""
+        INSERT OR REPLACE INTO ratings
+        VALUES (?, ?)
+        """, [(p1_name, elo1), (p2_name, elo2)])
+        self.cursor.executemany("""
+        INSERT INTO rating_history
+        VALUES (?, ?, ?)
+        """, [(game_id, p1_name, elo1), (game_id, p2_name, elo2)])
+
+    def _update_skills(self, p1_name, p2_name, result):
+        # incrementally update the skills with the result of a game
+        if result not in RESULT_OUTCOME:
+            return
+        skills = self.get_skills([p1_name, p2_name])
+        skill1, skill2 = update_skills(skills[p1_name], skills[p2_name], RESULT_OUTCOME[result])
+        self.cursor.executemany("""
+        INSERT OR REPLACE INTO skills
+        VALUES (?, ?, ?)
+        """, [(p1_name, *skill1), (p2_name, *skill2)])
+
+    def get_skills(self, names=None):
+        """Get the skill (mu, sigma) of the players.
+
+        Players without games have the skill (MU_0, SIGMA_0).
+
+        Parameters
+        ----------
+        names : list of str, optional
+            the players to get the skills for (default: all players)
+
+        Returns
+        -------
+        skills : dict[name, (mu, sigma)]
+
+        """
+        if names is None:
+            names = self.get_players()
+            rows = self.cursor.execute("""
+            SELECT name, mu, sigma FROM skills
+            """).fetchall()
+        else:
+            rows = self.cursor.execute(f"""
+            SELECT name, mu, sigma FROM skills
+            WHERE name IN ({', '.join('?' * len(names))})
+            """, names).fetchall()
+        skills = {name: (MU_0, SIGMA_0) for name in names}
+        for name, mu, sigma in rows:
+            if name in skills:
+                skills[name] = (mu, sigma)
+        return skills
+
+    def rebuild_skills(self):
+        """Recompute the skills from all games in the database."""
+        skills = collections.defaultdict(lambda: (MU_0, SIGMA_0))
+        games = self.cursor.execute("""
+        SELECT player1, player2, result FROM games
+        ORDER BY id
+        """).fetchall()
+        for p1, p2, result in games:
+            if result in RESULT_OUTCOME:
+                skills[p1], skills[p2] = update_skills(skills[p1], skills[p2], RESULT_OUTCOME[result])
+        self.cursor.execute("DELETE FROM skills")
+        self.cursor.executemany("""
+        INSERT INTO skills
+        VALUES (?, ?, ?)
+        """, [(name, mu, sigma) for name, (mu, sigma) in skills.items()])
         self.connection.commit()
 
     def get_results(self, p1_name, p2_name=None):
@@ -836,17 +1512,56 @@ class DB_Wrapper:
         if p2_name is None:
             self.cursor.execute("""
             SELECT player1, player2, result FROM games
-            WHERE player1 = ? or player2 = ?""", (p1_name, p1_name))
+            WHERE player1 = ? or player2 = ?
+            ORDER BY id""", (p1_name, p1_name))
             relevant_results = self.cursor.fetchall()
         else:
             self.cursor.execute("""
             SELECT player1, player2, result FROM games
-            WHERE (player1 = :p1 and player2 = :p2) or (player1 = :p2 and player2 = :p1)""",
+            WHERE (player1 = :p1 and player2 = :p2) or (player1 = :p2 and player2 = :p1)
+            ORDER BY id""",
             dict(p1=p1_name, p2=p2_name))
             relevant_results = self.cursor.fetchall()
         return relevant_results
 
 
+    def rebuild_ratings(self):
+        """Recompute the Elo ratings and their history from all games in the database."""
+        elo = collections.defaultdict(lambda: ELO_START)
+        history = []
+        games = self.cursor.execute("""
+        SELECT id, player1, player2, result FROM games
+        ORDER BY id
+        """).fetchall()
+        for game_id, p1, p2, result in games:
+            if result in RESULT_OUTCOME:
+                elo[p1], elo[p2] = update_elo(elo[p1], elo[p2], RESULT_OUTCOME[result])
+                history.append((game_id, p1, elo[p1]))
+                history.append((game_id, p2, elo[p2]))
+        self.cursor.execute("DELETE FROM ratings")
+        self.cursor.execute("DELETE FROM rating_history")
+        self.cursor.executemany("""
+        INSERT INTO ratings
+        VALUES (?, ?)
+        """, elo.items())
+        self.cursor.executemany("""
+        INSERT INTO rating_history
+        VALUES (?, ?, ?)
+        """, history)
+        self.connection.commit()
+
+    def get_team_names(self):
+        """Gets the last registered team names of all players.
+
+        Returns
+        -------
+        team_names : dict[name, team_name]
+
+        """
+        return dict(self.cursor.execute("""
+        SELECT name, team_name FROM team_names
+        """).fetchall())
+
     def get_team_name(self, p_name):
         """Gets the last registered team name of p_name.
 
@@ -1036,97 +1751,108 @@ class DB_Wrapper:
             return self.cursor.execute(query).fetchall()
 
 
-    def get_elo(self):
-        query = """
-        WITH RECURSIVE
-        ordered_matches AS (
-        SELECT
-            ROW_NUMBER() OVER (ORDER BY rowid) AS match_num,
-            player1,
-            player2,
-            result
-        FROM games
-        ),
-
-        -- Initialize with first match
-        elo_recursive(match_num, player1, player2, result,
-                    rating1, rating2,
-                    rating_json) AS (
-        SELECT
-            match_num,
-            player1,
-            player2,
-            result,
-            1500.0,
-            1500.0,
-            json_object(player1, 1500.0, player2, 1500.0)
-        FROM ordered_matches
-        WHERE match_num = 1
-
-        UNION ALL
+    def get_results_matrix(self):
+        """Get the results of all pairs of players with a single query.
 
+        Returns
+        -------
+        matrix : dict[(name, opponent), (wins, losses, draws, fatal_errors)]
+            the results of ``name`` in all games against ``opponent``
+            (in both colours) and the number of these games in which
+            ``name`` had a fatal error. Only pairs that have played
+            are included.
+
+        """
+        rows = self.cursor.execute("""
         SELECT
-            om.match_num,
-            om.player1,
-            om.player2,
-            om.result,
-
-            -- Get ratings from JSON state
-            IFNULL(CAST(json_extract(er.rating_json, '$.' || om.player1) AS REAL), 1500.0),
-            IFNULL(CAST(json_extract(er.rating_json, '$.' || om.player2) AS REAL), 1500.0),
-
-            -- Update JSON state with new ratings
-            json_set(
-                er.rating_json,
-                '$.' || om.player1,
-                ROUND(
-                IFNULL(CAST(json_extract(er.rating_json, '$.' || om.player1) AS REAL), 1500.0) +
-                32 * ((CASE om.result WHEN 0 THEN 1.0 WHEN -1 THEN 0.5 ELSE 0.0 END) -
-                1.0 / (1 + pow(10, (
-                    IFNULL(CAST(json_extract(er.rating_json, '$.' || om.player2) AS REAL), 1500.0) -
-                    IFNULL(CAST(json_extract(er.rating_json, '$.' || om.player1) AS REAL), 1500.0)
-                ) / 400.0))), 2),
-                '$.' || om.player2,
-                ROUND(
-                IFNULL(CAST(json_extract(er.rating_json, '$.' || om.player2) AS REAL), 1500.0) +
-                32 * ((CASE om.result WHEN 0 THEN 0.0 WHEN -1 THEN 0.5 ELSE 1.0 END) -
-                1.0 / (1 + pow(10, (
-                    IFNULL(CAST(json_extract(er.rating_json, '$.' || om.player1) AS REAL), 1500.0) -
-                    IFNULL(CAST(json_extract(er.rating_json, '$.' || om.player2) AS REAL), 1500.0)
-                ) / 400.0))), 2)
-            )
-        FROM ordered_matches om
-        JOIN elo_recursive er ON om.match_num = er.match_num + 1
-        ),
-
-        final AS (
-        SELECT rating_json
-        FROM elo_recursive
-        ORDER BY match_num DESC
-        LIMIT 1
+            team, opponent,
+            SUM(result = 0), SUM(result = 1), SUM(result = -1), SUM(fatal_error)
+        FROM (
+            SELECT
+                player1 AS team, player2 AS opponent, result,
+                player1_had_fatal_error AS fatal_error
+            FROM games
+
+            UNION ALL
+
+            -- the results from the view of player2
+            SELECT
+                player2 AS team, player1 AS opponent,
+                CASE result WHEN 0 THEN 1 WHEN 1 THEN 0 ELSE result END AS result,
+                player2_had_fatal_error AS fatal_error
+            FROM games
         )
-        SELECT
-        key AS player,
-        ROUND(value, 2) AS rating
-        FROM final, json_each(rating_json)
-        ORDER BY rating DESC;
+        GROUP BY team, opponent
+        """).fetchall()
+        return {(team, opponent): tuple(counts) for team, opponent, *counts in rows}
+
+    def get_elo(self):
+        """Get the Elo rating of all players with at least one game.
+
+        Returns
+        -------
+        ratings : list of (name, elo)
+            sorted by rating, best first
+
+        """
+        return self.cursor.execute("""
+        SELECT name, elo FROM ratings
+        ORDER BY elo DESC
+        """).fetchall()
+
+    def get_rating_history(self, p_name=None):
+        """Get the Elo rating after each game.
+
+        Parameters
+        ----------
+        p_name : str, optional
+            only get the history of this player
+
+        Returns
+        -------
+        history : list of (game_id, name, elo)
+            ordered by game
 
         """
-        return self.cursor.execute(query).fetchall()
+        if p_name is None:
+            self.cursor.execute("""
+            SELECT game_id, name, elo FROM rating_history
+            ORDER BY game_id, name""")
+        else:
+            self.cursor.execute("""
+            SELECT game_id, name, elo FROM rating_history
+            WHERE name = ?
+            ORDER BY game_id""", (p_name,))
+        return self.cursor.fetchall()
 
 def run(args):
     ci_engine = CI_Engine(args.config, args.database)
     if not args.no_hash:
         ci_engine.load_players(concurrency=args.thread_count)
-    ci_engine.start(args.n, args.thread_count)
+    ci_engine.start(args.n, args.thread_count, matchmaking=args.matchmaking, commit_every=args.commit_every)
 
 def print_scores(args):
     ci_engine = CI_Engine(args.config, args.database)
     ci_engine.pretty_print_results(full=args.full, team=args.team, html_export=args.html_export)
 
+def schedule(args):
+    ci_engine = CI_Engine(args.config, args.database)
+    if not args.no_hash:
+        ci_engine.load_players(concurrency=args.thread_count)
+    ci_engine.schedule(args.n, args.queue_size, matchmaking=args.matchmaking)
+
+def work(args):
+    ci_engine = CI_Engine(args.config, args.database)
+    ci_engine.work(lease=args.lease, exit_when_empty=args.exit_when_empty)
+
+def rebuild_ratings(args):
+    ci_engine = CI_Engine(args.config, args.database)
+    ci_engine.dbwrapper.rebuild_skills()
+    ci_engine.dbwrapper.rebuild_ratings()
+
 def hash_teams(args):
     ci_engine = CI_Engine(args.config, args.database)
-    ci_engine.load_players(concurrency=args.thread_count)
+    ci_engine.load_players(concurrency=args.thread_count, use_cache=not args.rehash)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
@@ -1143,6 +1869,11 @@ if __name__ == '__main__':
     parser_run.add_argument('-n', help='run N times', type=int, default=1000)
     parser_run.add_argument('--thread-count', '-t', help='run in parallel', type=int, default=1)
     parser_run.add_argument('--no-hash', help='Do not hash the players prior to running', action='store_true', default=False)
+    parser_run.add_argument('--matchmaking', help='how to choose the next match: the pairing with the highest expected '
+                            'information gain (default) or the player with the fewest games against a random player',
+                            choices=['information', 'fewest-games'], default='information')
+    parser_run.add_argument('--commit-every', help='commit the results to the database after N games', type=int,
+                            metavar='N', default=16)
     parser_run.set_defaults(func=run)
 
     parser_print_scores = subparsers.add_parser('print-scores')
@@ -1152,9 +1883,27 @@ if __name__ == '__main__':
     full_or_team.add_argument('--team', help='show statistics for team', type=str, default=None)
     parser_print_scores.set_defaults(func=print_scores)
 
+    parser_scheduler = subparsers.add_parser('scheduler', help='fill the job queue for the workers')
+    parser_scheduler.add_argument('-n', help='schedule N matches', type=int, default=1000)
+    parser_scheduler.add_argument('--queue-size', help='number of queued matches', type=int, default=8)
+    parser_scheduler.add_argument('--thread-count', '-t', help='hash the players in parallel', type=int, default=1)
+    parser_scheduler.add_argument('--no-hash', help='Do not hash the players prior to scheduling', action='store_true', default=False)
+    parser_scheduler.add_argument('--matchmaking', help='how to choose the next match (see run)',
+                                  choices=['information', 'fewest-games'], default='information')
+    parser_scheduler.set_defaults(func=schedule)
+
+    parser_worker = subparsers.add_parser('worker', help='play the matches from the job queue')
+    parser_worker.add_argument('--lease', help='lease time of a job in seconds', type=float, default=60)
+    parser_worker.add_argument('--exit-when-empty', help='stop when the job queue is empty', action='store_true', default=False)
+    parser_worker.set_defaults(func=work)
+
+    parser_rebuild = subparsers.add_parser('rebuild-ratings', help='recompute the skills and Elo ratings from all games')
+    parser_rebuild.set_defaults(func=rebuild_ratings)
+
     parser_hash = subparsers.add_parser('hash-teams')
     parser_hash.set_defaults(func=hash_teams)
     parser_hash.add_argument('--thread-count', '-t', help='run in parallel', type=int, default=1)
+    parser_hash.add_argument('--rehash', help='ignore the team cache and hash all teams', action='store_true', default=False)
 
     args = parser.parse_args()
 
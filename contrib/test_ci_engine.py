@@ -1,3 +1,8 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+
 import ci_engine
 import pytest
 
@@ -142,3 +147,435 @@ def test_wins_losses(db_wrapper):
     assert db_wrapper.get_game_count('p3', 'p1') == 1
 
     assert db_wrapper.get_game_counts() == dict(p1=4, p2=3, p3=1)
+
+# Tests for the skill model and the matchmaking.
+
+def test_update_skills():
+    new = (ci_engine.MU_0, ci_engine.SIGMA_0)
+    winner, loser = ci_engine.update_skills(new, new, 1)
+    assert winner[0] > ci_engine.MU_0 > loser[0]
+    assert winner[1] == loser[1] < ci_engine.SIGMA_0
+    # a draw between equal players only reduces the uncertainty
+    draw1, draw2 = ci_engine.update_skills(new, new, 0.5)
+    assert draw1[0] == draw2[0] == ci_engine.MU_0
+    assert draw1[1] == winner[1]
+    # the uncertainty shrinks as after an expected game
+    assert ci_engine.expected_skills(new, new) == (draw1, draw2)
+
+def test_information_gain():
+    new = (1500, 350)
+    known = (1500, 50)
+    strong = (2100, 350)
+    assert ci_engine.information_gain(new, new) > ci_engine.information_gain(new, known)
+    assert ci_engine.information_gain(new, new) > ci_engine.information_gain(new, strong)
+
+    rng = ci_engine.Random(1)
+    skills = {'p1': known, 'p2': known, 'p3': new, 'p4': (1550, 340)}
+    assert sorted(ci_engine.choose_pairing(skills, rng)) == ['p3', 'p4']
+
+def test_skills(db_wrapper):
+    for p in ['p1', 'p2', 'p3']:
+        db_wrapper.add_player(p, 'h')
+    new = (ci_engine.MU_0, ci_engine.SIGMA_0)
+    assert db_wrapper.get_skills() == {'p1': new, 'p2': new, 'p3': new}
+
+    db_wrapper.add_gameresult(*make_simple_gameresult('p1', 'p2', 0))
+    db_wrapper.add_gameresult(*make_simple_gameresult('p2', 'p3', -1))
+    # unfinished games do not count
+    db_wrapper.add_gameresult(*make_simple_gameresult('p1', 'p3', -2))
+
+    s1, s2 = ci_engine.update_skills(new, new, 1)
+    s2, s3 = ci_engine.update_skills(s2, new, 0.5)
+    skills = db_wrapper.get_skills()
+    assert skills == {'p1': s1, 'p2': s2, 'p3': s3}
+    assert db_wrapper.get_skills(['p3']) == {'p3': s3}
+
+    db_wrapper.rebuild_skills()
+    assert db_wrapper.get_skills() == skills
+
+    # removing a player removes its games from the skills of the others
+    db_wrapper.remove_player('p1')
+    _s2, s3 = ci_engine.update_skills(new, new, 0.5)
+    assert db_wrapper.get_skills()['p3'] == s3
+
+def test_skills_upgrade(tmp_path):
+    db_file = tmp_path / 'ci.db'
+    db_wrapper = ci_engine.DB_Wrapper(db_file)
+    db_wrapper.add_player('p1', 'h1')
+    db_wrapper.add_player('p2', 'h2')
+    db_wrapper.add_gameresult(*make_simple_gameresult('p1', 'p2', 0))
+    skills = db_wrapper.get_skills()
+    # a database without skills
+    db_wrapper.cursor.execute("DROP TABLE skills")
+    db_wrapper.connection.commit()
+    db_wrapper.connection.close()
+
+    assert ci_engine.DB_Wrapper(db_file).get_skills() == skills
+
+def test_elo(db_wrapper):
+    for p in ['p1', 'p2', 'p3']:
+        db_wrapper.add_player(p, 'h')
+    assert db_wrapper.get_elo() == []
+
+    db_wrapper.add_gameresult(*make_simple_gameresult('p1', 'p2', 0))
+    db_wrapper.add_gameresult(*make_simple_gameresult('p2', 'p3', -1))
+    db_wrapper.add_gameresult(*make_simple_gameresult('p1', 'p3', -2))
+    db_wrapper.add_gameresult(*make_simple_gameresult('p3', 'p1', 0))
+
+    e1, e2 = ci_engine.update_elo(1500, 1500, 1)
+    e2, e3 = ci_engine.update_elo(e2, 1500, 0.5)
+    e3_after_draw = e3
+    e3, e1 = ci_engine.update_elo(e3, e1, 1)
+    elo = db_wrapper.get_elo()
+    assert dict(elo) == {'p1': e1, 'p2': e2, 'p3': e3}
+    assert [rating for _name, rating in elo] == sorted([e1, e2, e3], reverse=True)
+
+    history = db_wrapper.get_rating_history('p3')
+    # the unfinished game is not in the history
+    assert [rating for _game_id, _name, rating in history] == [e3_after_draw, e3]
+    assert len(db_wrapper.get_rating_history()) == 6
+
+    db_wrapper.rebuild_ratings()
+    assert db_wrapper.get_elo() == elo
+    assert db_wrapper.get_rating_history('p3') == history
+
+    db_wrapper.remove_player('p2')
+    e3, e1 = ci_engine.update_elo(1500, 1500, 1)
+    assert dict(db_wrapper.get_elo()) == {'p1': e1, 'p3': e3}
+    assert len(db_wrapper.get_rating_history()) == 2
+
+def test_wal_and_batched_commits(tmp_path):
+    db_file = tmp_path / 'ci.db'
+    db_wrapper = ci_engine.DB_Wrapper(db_file)
+    assert db_wrapper.cursor.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    db_wrapper.add_player('p1', 'h1')
+    db_wrapper.add_player('p2', 'h2')
+
+    reader = ci_engine.DB_Wrapper(db_file)
+    db_wrapper.add_gameresult(*make_simple_gameresult('p1', 'p2', 0), commit=False)
+    # the writer sees its own game, other connections only after the commit
+    assert db_wrapper.get_game_count('p1') == 1
+    assert reader.get_game_count('p1') == 0
+    db_wrapper.commit()
+    assert reader.get_game_count('p1') == 1
+
+def test_indexes(db_wrapper):
+    for query in ["SELECT * FROM games WHERE player1 = 'p1'",
+                  "SELECT * FROM games WHERE player2 = 'p1'"]:
+        plan = db_wrapper.cursor.execute("EXPLAIN QUERY PLAN " + query).fetchall()
+        assert 'USING INDEX' in plan[0][-1]
+
+def test_game_blobs(db_wrapper):
+    db_wrapper.add_player('p1', 'h1')
+    db_wrapper.add_player('p2', 'h2')
+    final_state = {'fatal_errors': [[], []], 'whowins': 0}
+    db_wrapper.add_gameresult('p1', 'p2', 0, final_state, ['out', 'err'], ['p1 out', 'p1 err'], ['p2 out', ''])
+    game_id, = db_wrapper.cursor.execute("SELECT id FROM games").fetchone()
+    assert db_wrapper.get_final_state(game_id) == final_state
+    assert db_wrapper.get_game_output(game_id) == {
+        'stdout': 'out', 'stderr': 'err',
+        'player1_stdout': 'p1 out', 'player1_stderr': 'p1 err',
+        'player2_stdout': 'p2 out', 'player2_stderr': '',
+    }
+    with pytest.raises(ValueError):
+        db_wrapper.get_game_output(game_id + 1)
+
+    db_wrapper.remove_player('p1')
+    with pytest.raises(ValueError):
+        db_wrapper.get_final_state(game_id)
+
+def test_migrate(tmp_path, monkeypatch):
+    # migrate in several batches
+    monkeypatch.setattr(ci_engine, 'MIGRATION_BATCH_SIZE', 2)
+    db_file = tmp_path / 'ci.db'
+    # the layout of earlier versions
+    connection = ci_engine.sqlite3.connect(db_file)
+    connection.executescript("""
+    CREATE TABLE players (name text PRIMARY KEY, hash text);
+    CREATE TABLE games (
+        id INTEGER PRIMARY KEY,
+        player1 text, player2 text, result int, final_state text,
+        player1_had_fatal_error bool, player2_had_fatal_error bool);
+    CREATE TABLE game_output (game_id int,
+        stdout text, stderr text,
+        player1_stdout text, player1_stderr text,
+        player2_stdout text, player2_stderr text);
+    INSERT INTO players VALUES ('p1', 'h1'), ('p2', 'h2');
+    INSERT INTO games VALUES (1, 'p1', 'p2', 0, '{"whowins": 0}', 0, 0);
+    INSERT INTO game_output VALUES (1, 'out', 'err', 'a', 'b', 'c', 'd');
+    """)
+    for game_id in range(2, 7):
+        connection.execute("INSERT INTO games VALUES (?, 'p1', 'p2', 1, '{\"whowins\": 1}', 0, 0)", (game_id,))
+        connection.execute("INSERT INTO game_output VALUES (?, 'out', 'err', 'a', 'b', 'c', ?)", (game_id, str(game_id)))
+    connection.commit()
+    connection.close()
+
+    db_wrapper = ci_engine.DB_Wrapper(db_file)
+    assert db_wrapper.cursor.execute("PRAGMA user_version").fetchone()[0] == ci_engine.SCHEMA_VERSION
+    assert db_wrapper.get_final_state(1) == {'whowins': 0}
+    assert db_wrapper.get_game_output(1)['player2_stderr'] == 'd'
+    for game_id in range(2, 7):
+        assert db_wrapper.get_final_state(game_id) == {'whowins': 1}
+        assert db_wrapper.get_game_output(game_id)['player2_stderr'] == str(game_id)
+    assert db_wrapper.cursor.execute("SELECT DISTINCT final_state FROM games").fetchall() == [(None,)]
+    elo = ci_engine.update_elo(1500, 1500, 1)
+    for _game_id in range(2, 7):
+        elo = ci_engine.update_elo(*elo, 0)
+    assert dict(db_wrapper.get_elo()) == dict(zip(['p1', 'p2'], elo))
+    tables = {name for name, in db_wrapper.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'game_output' not in tables
+    # the database has been compacted
+    assert db_wrapper.cursor.execute("PRAGMA freelist_count").fetchone() == (0,)
+
+    # migrating again is a no-op
+    db_wrapper.create_tables()
+    assert db_wrapper.get_final_state(1) == {'whowins': 0}
+
+def test_results_matrix(db_wrapper):
+    for p in ['p1', 'p2', 'p3']:
+        db_wrapper.add_player(p, 'h')
+    db_wrapper.add_gameresult(*make_simple_gameresult('p1', 'p2', 0))
+    db_wrapper.add_gameresult(*make_simple_gameresult('p1', 'p2', -1))
+    db_wrapper.add_gameresult(*make_simple_gameresult('p2', 'p1', 1))
+    db_wrapper.add_gameresult(*make_simple_gameresult('p3', 'p1', 1))
+    db_wrapper.add_gameresult('p3', 'p2', -2, {'fatal_errors': [[{'type': 'error'}], []]}, ['', ''], ['', ''], ['', ''])
+
+    matrix = db_wrapper.get_results_matrix()
+    # the same as the separate queries
+    for team, opponent, wins, losses, draws in db_wrapper.get_wins_losses():
+        assert matrix[team, opponent][:3] == (wins, losses, draws)
+    assert matrix['p3', 'p2'] == (0, 0, 0, 1)
+    assert matrix['p2', 'p3'] == (0, 0, 0, 0)
+    assert ('p2', 'p2') not in matrix
+
+    totals = ci_engine.results_totals(matrix)
+    for pname in ['p1', 'p2', 'p3']:
+        wins, losses, draws, fatal_errors = totals[pname]
+        assert fatal_errors == db_wrapper.get_errorcount(pname)
+        results = db_wrapper.get_results(pname)
+        assert wins + losses + draws == len([r for r in results if r[2] != -2])
+
+def test_pretty_print_results(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv('COLUMNS', '200')
+    cfg = tmp_path / 'ci.cfg'
+    cfg.write_text("[general]\nrounds = 10\n\n[agents]\np1 = p1\np2 = p2\n")
+    engine = ci_engine.CI_Engine(cfg, database=tmp_path / 'ci.db')
+    engine.dbwrapper.add_player('p1', 'h')
+    engine.dbwrapper.add_player('p2', 'h')
+    engine.dbwrapper.add_team_name('p1', 'Team One')
+    engine.dbwrapper.add_gameresult(*make_simple_gameresult('p1', 'p2', 0))
+    engine.dbwrapper.add_gameresult(*make_simple_gameresult('p2', 'p1', -1))
+
+    engine.pretty_print_results(full=True, html_export=tmp_path / 'results.html')
+    out = capsys.readouterr().out
+    assert 'p1 (Team One)' in out
+    assert '  1,  1,  0' in out
+    assert 'Cross results' in (tmp_path / 'results.html').read_text()
+
+    engine.pretty_print_results(team='p1')
+    out = capsys.readouterr().out
+    assert 'Match results for team p1' in out
+
+# Tests for the job queue.
+
+def test_job_queue(db_wrapper):
+    db_wrapper.add_player('p1', 'h1')
+    db_wrapper.add_player('p2', 'h2')
+    job1 = db_wrapper.enqueue_job('p1', 'p2')
+    job2 = db_wrapper.enqueue_job('p2', 'p1')
+    assert db_wrapper.get_pending_jobs() == [('p1', 'p2'), ('p2', 'p1')]
+
+    assert db_wrapper.claim_job('w1', 60) == (job1, 'p1', 'p2')
+    assert db_wrapper.claim_job('w2', 60) == (job2, 'p2', 'p1')
+    assert db_wrapper.claim_job('w3', 60) is None
+    assert db_wrapper.get_job_counts() == {'running': 2}
+
+    assert db_wrapper.heartbeat(job1, 'w1', 60)
+    assert not db_wrapper.heartbeat(job1, 'w2', 60)
+
+    # w1 crashed: its job is taken over when the lease has expired
+    assert db_wrapper.claim_job('w3', 60, now=ci_engine.time.time() + 61) == (job1, 'p1', 'p2')
+    # a late result of w1 is not stored
+    assert not db_wrapper.finish_job(job1, 'w1', *make_simple_gameresult('p1', 'p2', 0))
+    assert db_wrapper.get_game_count('p1') == 0
+
+    assert db_wrapper.finish_job(job1, 'w3', *make_simple_gameresult('p1', 'p2', 0))
+    assert db_wrapper.get_game_count('p1') == 1
+    game_id, = db_wrapper.cursor.execute("SELECT game_id FROM jobs WHERE id = ?", (job1,)).fetchone()
+    assert db_wrapper.get_results('p1') == [('p1', 'p2', 0)]
+    assert db_wrapper.get_final_state(game_id) == {'fatal_errors': [[], []]}
+    assert db_wrapper.get_job_counts() == {'running': 1, 'done': 1}
+    assert db_wrapper.get_pending_jobs() == [('p2', 'p1')]
+
+def test_job_attempts(db_wrapper):
+    db_wrapper.add_player('p1', 'h1')
+    db_wrapper.add_player('p2', 'h2')
+    job = db_wrapper.enqueue_job('p1', 'p2')
+
+    # an interrupted worker does not use up an attempt
+    db_wrapper.claim_job('w1', 60)
+    db_wrapper.release_job(job, 'w1')
+    assert db_wrapper.get_job_counts() == {'queued': 1}
+
+    for _attempt in range(ci_engine.MAX_JOB_ATTEMPTS - 1):
+        assert db_wrapper.claim_job('w1', 60)[0] == job
+        db_wrapper.fail_job(job, 'w1')
+        assert db_wrapper.get_job_counts() == {'queued': 1}
+
+    # the last attempt: the worker crashes
+    assert db_wrapper.claim_job('w1', 60)[0] == job
+    assert db_wrapper.claim_job('w2', 60, now=ci_engine.time.time() + 61) is None
+    assert db_wrapper.get_job_counts() == {'failed': 1}
+
+    # removing a player removes its jobs
+    db_wrapper.remove_player('p1')
+    assert db_wrapper.get_job_counts() == {}
+
+@pytest.fixture
+def ci_cfg(tmp_path):
+    import pelita.player
+    player_dir = Path(pelita.player.__file__).parent
+    cfg = tmp_path / 'ci.cfg'
+    cfg.write_text(f"""[general]
+rounds = 5
+size = tiny
+
+[agents]
+stopping = {player_dir / 'StoppingPlayer'}
+smart = {player_dir / 'SmartEatingPlayer'}
+random = {player_dir / 'RandomPlayers'}
+""")
+    return cfg
+
+def test_next_match(ci_cfg, tmp_path):
+    engine = ci_engine.CI_Engine(ci_cfg, database=tmp_path / 'ci.db')
+    for pname in engine.players:
+        engine.dbwrapper.add_player(pname, 'h')
+    rng = ci_engine.Random(1)
+
+    for matchmaking in ['information', 'fewest-games']:
+        players = engine.next_match(rng, matchmaking=matchmaking)
+        assert len(set(players)) == 2
+        assert set(players) <= set(engine.players)
+
+    # a pending match counts as played
+    pending = [('smart', 'random')] * 5
+    assert 'stopping' in engine.next_match(rng, pending, matchmaking='fewest-games')
+    assert 'stopping' in engine.next_match(rng, pending, matchmaking='information')
+
+    # players with errors are not chosen
+    engine.players['stopping']['error'] = ('ImportError', '')
+    for _ in range(5):
+        assert sorted(engine.next_match(rng, pending)) == ['random', 'smart']
+
+def test_start_chooses_matches_lazily(ci_cfg, tmp_path, monkeypatch):
+    engine = ci_engine.CI_Engine(ci_cfg, database=tmp_path / 'ci.db')
+    for pname in engine.players:
+        engine.dbwrapper.add_player(pname, 'h')
+
+    next_match = engine.next_match
+    pending_counts = []
+    def counting_next_match(rng, pending=(), matchmaking='information'):
+        pending_counts.append(len(list(pending)))
+        return next_match(rng, pending, matchmaking=matchmaking)
+    monkeypatch.setattr(engine, 'next_match', counting_next_match)
+    monkeypatch.setattr(engine, 'play', lambda p1, p2: (0, {'whowins': 0, 'fatal_errors': [[], []]},
+                                                        ['', ''], ['', ''], ['', '']))
+
+    engine.start(20, concurrency=3)
+    assert len(pending_counts) == 20
+    # a match is only chosen when a worker is free
+    assert max(pending_counts) < 3
+    assert sum(engine.dbwrapper.get_game_counts().values()) == 40
+
+def test_workers(ci_cfg, tmp_path):
+    db_file = tmp_path / 'ci.db'
+    engine = ci_engine.CI_Engine(ci_cfg, database=db_file)
+    for pname in engine.players:
+        engine.dbwrapper.add_player(pname, 'h')
+
+    # the scheduler fills the queue
+    engine.schedule(4, queue_size=4)
+    assert engine.dbwrapper.get_job_counts() == {'queued': 4}
+
+    # a worker that crashed
+    crashed_job, _p1, _p2 = engine.dbwrapper.claim_job('crashed', lease=-1)
+
+    import pelita
+    ci_engine_py = Path(ci_engine.__file__)
+    # make sure that the workers use the same pelita
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(Path(pelita.__file__).parent.parent),
+                                                       os.environ.get('PYTHONPATH', '')]))
+    workers = [
+        subprocess.Popen([sys.executable, ci_engine_py, '--config', ci_cfg, '--database', db_file,
+                          'worker', '--exit-when-empty'],
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+        for _ in range(2)
+    ]
+    for worker in workers:
+        stdout, stderr = worker.communicate(timeout=120)
+        assert worker.returncode == 0, stderr
+
+    assert engine.dbwrapper.get_job_counts() == {'done': 4}
+    assert sum(engine.dbwrapper.get_game_counts().values()) == 8
+    worker_name, attempts = engine.dbwrapper.cursor.execute("SELECT worker, attempts FROM jobs WHERE id = ?", (crashed_job,)).fetchone()
+    assert worker_name != 'crashed'
+    assert attempts == 2
+
+def test_team_cache(tmp_path, monkeypatch):
+    import pelita
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join([str(Path(pelita.__file__).parent.parent),
+                                                      os.environ.get('PYTHONPATH', '')]))
+    teams = tmp_path / 'teams'
+    teams.mkdir()
+    for name in ['team_a', 'team_b']:
+        (teams / f'{name}.py').write_text(f"""
+from pelita.player import stopping_player
+TEAM_NAME = "{name.replace('_', ' ')}"
+move = stopping_player
+""")
+    cfg = tmp_path / 'ci.cfg'
+    cfg.write_text("""[general]
+rounds = 5
+
+[agents]
+a = teams/team_a
+b = teams/team_b
+""")
+
+    engine = ci_engine.CI_Engine(cfg, database=tmp_path / 'ci.db')
+    engine.load_players()
+    hashes = {pname: engine.dbwrapper.get_player_hash(pname) for pname in ['a', 'b']}
+    assert engine.dbwrapper.get_team_names() == {'a': 'team a', 'b': 'team b'}
+    team_cache = engine.dbwrapper.get_team_cache()
+    assert sorted(team_cache) == sorted(player['path'] for player in engine.players.values())
+    assert all(entry['hash'] in hashes.values() for entry in team_cache.values())
+
+    # unchanged teams are neither hashed nor loaded again
+    calls = []
+    async def counting_hash_team(team_spec, semaphore):
+        calls.append(team_spec)
+        return await hash_team(team_spec, semaphore)
+    hash_team = ci_engine.hash_team
+    check_team = ci_engine.check_team
+    monkeypatch.setattr(ci_engine, 'hash_team', counting_hash_team)
+    monkeypatch.setattr(ci_engine, 'check_team', lambda path, timeout: (calls.append(path), check_team(path, timeout))[1])
+
+    engine = ci_engine.CI_Engine(cfg, database=tmp_path / 'ci.db')
+    engine.load_players()
+    assert calls == []
+    assert engine.dbwrapper.get_team_names() == {'a': 'team a', 'b': 'team b'}
+
+    # a changed team is hashed and reset
+    (teams / 'team_b.py').write_text((teams / 'team_b.py').read_text().replace('"team b"', '"team b2"'))
+    engine = ci_engine.CI_Engine(cfg, database=tmp_path / 'ci.db')
+    engine.load_players()
+    assert calls == [engine.players['b']['path']] * 2
+    assert engine.dbwrapper.get_player_hash('a') == hashes['a']
+    assert engine.dbwrapper.get_player_hash('b') != hashes['b']
+    assert engine.dbwrapper.get_team_names() == {'a': 'team a', 'b': 'team b2'}
+
+    # without the cache, all teams are hashed
+    calls.clear()
+    engine.load_players(use_cache=False)
+    assert len(calls) == 4
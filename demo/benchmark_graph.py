@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import argparse
+import functools
+import random
+import timeit
+
+import networkx as nx
+
+from pelita.grid_graph import GridGraph
+from pelita.maze_generator import generate_maze
+from pelita.team import walls_to_graph
+
+
+def shortest_paths(graph, pairs, path_fn):
+    for source, target in pairs:
+        path_fn(graph, source, target)
+
+def all_distances(graph, sources, length_fn):
+    for source in sources:
+        length_fn(graph, source)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark GridGraph against networkx')
+    parser.add_argument('--repeat', help="Number of repeats of timeit.", default=5, type=int)
+    parser.add_argument('--number', help="Number of iterations inside timeit.", default=10, type=int)
+    parser.add_argument('--size', help="Maze size.", default='32x16')
+    parser.add_argument('--seed', help="Random seed.", default=1, type=int)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    width, height = (int(v) for v in args.size.split('x'))
+    rng = random.Random(args.seed)
+    layout = generate_maze(width=width, height=height, rng=rng)
+    walls, shape = layout['walls'], layout['shape']
+
+    nx_graph = walls_to_graph(walls, shape=shape)
+    nodes = list(nx_graph.nodes)
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(100)]
+    sources = [pair[0] for pair in pairs[:20]]
+
+    grid_bfs = GridGraph(walls, shape=shape, search='bfs')
+    grid_astar = GridGraph(walls, shape=shape, search='astar')
+
+    tests = [
+        ("build networkx", lambda: walls_to_graph(walls, shape=shape)),
+        ("build grid", lambda: GridGraph(walls, shape=shape)),
+        ("100 paths networkx", functools.partial(shortest_paths, nx_graph, pairs, nx.shortest_path)),
+        ("100 paths grid bfs", functools.partial(shortest_paths, grid_bfs, pairs, GridGraph.shortest_path)),
+        ("100 paths grid A*", functools.partial(shortest_paths, grid_astar, pairs, GridGraph.shortest_path)),
+        ("20 sources networkx", functools.partial(all_distances, nx_graph, sources, nx.single_source_shortest_path_length)),
+        ("20 sources grid", functools.partial(all_distances, grid_bfs, sources, GridGraph.shortest_path_length)),
+        ("all pairs networkx", lambda: dict(nx.all_pairs_shortest_path_length(nx_graph))),
+        ("all pairs grid", grid_bfs.distance_matrix),
+    ]
+
+    print(f"Maze {width}x{height} with {len(nodes)} nodes. Running {args.number} times. Fastest out of {args.repeat} (ms per run):")
+    for name, fn in tests:
+        result = min(timeit.repeat(fn, repeat=args.repeat, number=args.number)) / args.number
+        print(f"{name:<22}: {result * 1000:8.3f}")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import argparse
+import subprocess
+import sys
+
+# entry point -> (budget in ms, modules that must not be imported)
+ENTRY_POINTS = {
+    "pelita.scripts.pelita_main": (300, ["networkx", "numpy"]),
+    "pelita.scripts.pelita_player": (150, ["networkx", "numpy", "rich", "zeroconf", "yaml"]),
+    "pelita.scripts.pelita_server": (300, ["networkx", "numpy"]),
+    "pelita.scripts.pelita_tournament": (200, ["networkx", "numpy", "rich", "zeroconf"]),
+}
+
+def import_times(module):
+    """ Run `python -X importtime` for the given module and return
+    a dict { module: cumulative import time in µs } """
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, check=True)
+    times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # a module may appear more than once; keep the first (real) import
+        times.setdefault(name.strip(), int(cumulative_us))
+    return times
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the import time of the pelita entry points')
+    parser.add_argument('--repeat', help="Number of repeats (the fastest is used).", default=5, type=int)
+    parser.add_argument('--scale', help="Scale the budgets (for slow machines).", default=1.0, type=float)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    failed = False
+    for module, (budget_ms, forbidden) in ENTRY_POINTS.items():
+        runs = [import_times(module) for _ in range(args.repeat)]
+        result_ms = min(times[module] for times in runs) / 1000
+        budget_ms = budget_ms * args.scale
+
+        loaded = [name for name in forbidden if name in runs[0]]
+        ok = result_ms <= budget_ms and not loaded
+        failed = failed or not ok
+
+        print(f"{module:<35}: {result_ms:7.1f} ms (budget {budget_ms:.0f} ms) {'OK' if ok else 'FAIL'}")
+        if loaded:
+            print(f"    imports {', '.join(loaded)}")
+
+    sys.exit(1 if failed else 0)
@@ -1,5 +1,16 @@
-# ruff: noqa: F401
-
-from . import game, layout, maze_generator, network, viewer
+import importlib
 
 __version__ = '2.7.0'
+
+# The submodules are imported on first access (e.g. `pelita.game`).
+# This keeps entry points like pelita-player from importing
+# networkx, rich etc. when they are not needed.
+_SUBMODULES = ('game', 'layout', 'maze_generator', 'network', 'viewer')
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES))
@@ -19,8 +19,6 @@ from .gamestate_filters import noiser, relocate_expired_food, update_food_age, i
 from .layout import get_legal_positions, initial_positions
 from .network import Controller, RemotePlayerFailure, RemotePlayerRecvTimeout, RemotePlayerSendError, ZMQPublisher
 from .team import RemoteTeam, make_team
-from .viewer import (AsciiViewer, ProgressViewer, ReplayWriter, ReplyToViewer,
-                     ResultPrinter)
 
 _logger = logging.getLogger(__name__)
 _mswindows = (sys.platform == "win32")
@@ -74,11 +72,12 @@ NFOOD = {
 
 class TkViewer:
     def __init__(self, *, address, controller, geometry=None, delay=None,
-                stop_after=None, stop_after_kill=False, fullscreen=False, debug=False):
+                stop_after=None, stop_after_kill=False, fullscreen=False, debug=False, render_fps=None):
         self.proc = self._run_external_viewer(address, controller, geometry=geometry, delay=delay,
-                                              stop_after=stop_after, stop_after_kill=stop_after_kill, fullscreen=fullscreen, debug=debug)
+                                              stop_after=stop_after, stop_after_kill=stop_after_kill, fullscreen=fullscreen, debug=debug,
+                                              render_fps=render_fps)
 
-    def _run_external_viewer(self, subscribe_sock, controller, geometry, delay, stop_after, stop_after_kill, fullscreen, debug):
+    def _run_external_viewer(self, subscribe_sock, controller, geometry, delay, stop_after, stop_after_kill, fullscreen, debug, render_fps):
         # Something on OS X prevents Tk from running in a forked process.
         # Therefore we cannot use multiprocessing here. subprocess works, though.
         viewer_args = [ str(subscribe_sock) ]
@@ -96,6 +95,8 @@ class TkViewer:
             viewer_args += ["--stop-after", str(stop_after)]
         if stop_after_kill:
             viewer_args += ["--stop-after-kill"]
+        if render_fps:
+            viewer_args += ["--render-fps", str(render_fps)]
 
         tkviewer = 'pelita.scripts.pelita_tkviewer'
         external_call = [sys.executable,
@@ -114,14 +115,89 @@ def controller_await(state, await_action='play_step'):
     """Wait for the controller to receive a action from a viewer
 
     action can be 'exit' (return True), 'play_setup', 'set_initial' (return True)
+
+    When waiting for 'play_step', the controller may also send 'play_until'
+    with a batch of steps (see `pelita.network.Controller`). The batch is
+    played without further round-trips; we only check (without blocking)
+    whether the controller wants to 'pause' or 'exit'. A 'play_step' or
+    another 'play_until' during a batch replaces it.
     """
 
-    if state['controller']:
-        todo = state['controller'].await_action(await_action)
+    controller = state['controller']
+    if not controller:
+        return
+
+    if await_action == 'play_step' and controller.batch is not None:
+        # a new request cancels the running batch
+        todo = controller.await_action(['pause', 'play_step', 'play_until'], timeout=0)
         if todo == 'exit':
             return True
-        elif todo in ('play_step', 'set_initial'):
-            return False
+        elif todo is None:
+            if not batch_finished(controller.batch, state):
+                return False
+            _logger.debug("Batch finished.")
+            controller.batch = None
+        else:
+            _logger.debug("Batch cancelled by controller.")
+            controller.batch = None
+            if todo == 'play_step':
+                return False
+            elif todo == 'play_until':
+                start_batch(controller, state)
+                return False
+
+    if await_action == 'play_step':
+        # a 'pause' without a running batch has nothing to do
+        todo = 'pause'
+        while todo == 'pause':
+            todo = controller.await_action(['play_step', 'play_until', 'pause'])
+    else:
+        todo = controller.await_action(await_action)
+
+    if todo == 'exit':
+        return True
+    elif todo == 'play_until':
+        start_batch(controller, state)
+        return False
+    elif todo in ('play_step', 'set_initial'):
+        return False
+
+def start_batch(controller, state):
+    """ Starts the batch of steps that the controller has requested with 'play_until'. """
+    conditions = controller.action_data or {}
+    controller.batch = {
+        'steps': conditions.get('steps'),
+        'round': conditions.get('round'),
+        'kill': conditions.get('kill', False),
+        'played': 0,
+        'bot_was_killed': list(state.get('bot_was_killed', [])),
+    }
+    _logger.debug("Starting batch %r.", conditions)
+
+def batch_finished(batch, state):
+    """ Checks whether a batch of steps requested by the controller is finished.
+
+    Must be called once before every turn in the batch.
+    (The first turn of a batch is always played.)
+    """
+    batch['played'] += 1
+
+    if state.get('gameover'):
+        return True
+
+    if batch['steps'] is not None and batch['played'] >= batch['steps']:
+        return True
+
+    if batch['round'] is not None and next_round_turn(state)['round'] >= batch['round']:
+        return True
+
+    bot_was_killed = list(state.get('bot_was_killed', []))
+    bot_killed_now = any(now and not last for last, now in zip(batch['bot_was_killed'], bot_was_killed))
+    batch['bot_was_killed'] = bot_was_killed
+    if batch['kill'] and bot_killed_now:
+        return True
+
+    return False
 
 def run_game(team_specs, *, layout_dict, max_rounds=300,
              rng=None, allow_camping=False, timeout_length=TIMEOUT_SECS,
@@ -246,6 +322,9 @@ def run_game(team_specs, *, layout_dict, max_rounds=300,
 
 def setup_viewers(viewers, print_result=True):
     """ Returns a list of viewers from the given strings. """
+    # the viewers need rich, which is slow to import
+    from .viewer import (AsciiViewer, ProgressViewer, ReplayWriter, ReplyToViewer,
+                         ResultPrinter)
 
     viewer_state = {
         'viewers': [],
@@ -270,7 +349,13 @@ def setup_viewers(viewers, print_result=True):
             viewer_state['viewers'].append(ReplayWriter(open(viewer_opts, 'w')))
         elif viewer == 'publish-to':
             zmq_context = zmq.Context()
-            zmq_external_publisher = ZMQPublisher(address=viewer_opts, bind=False, zmq_context=zmq_context)
+            if isinstance(viewer_opts, dict):
+                publisher_opts = dict(viewer_opts)
+                address = publisher_opts.pop('address')
+            else:
+                publisher_opts = {}
+                address = viewer_opts
+            zmq_external_publisher = ZMQPublisher(address=address, bind=False, zmq_context=zmq_context, **publisher_opts)
             viewer_state['viewers'].append(zmq_external_publisher)
         elif viewer == 'tk':
             zmq_context = zmq.Context()
@@ -284,7 +369,8 @@ def setup_viewers(viewers, print_result=True):
                             geometry=viewer_opts.get('geometry'),
                             delay=viewer_opts.get('delay'),
                             fullscreen=viewer_opts.get('fullscreen'),
-                            debug=viewer_opts.get('debug'))
+                            debug=viewer_opts.get('debug'),
+                            render_fps=viewer_opts.get('render_fps'))
 
         else:
             raise ValueError(f"Unknown viewer {viewer}.")
@@ -0,0 +1,341 @@
+""" A compact graph of a grid maze as an alternative to networkx.
+
+`GridGraph` implements the part of the networkx graph API that bots
+typically use for the maze graph: `nodes`, `edges`, `neighbors`,
+`has_node` plus `shortest_path`, `shortest_path_length` and `bfs`.
+The graph is stored in flat numpy arrays, so that building it for a
+maze is much cheaper than building a networkx graph. For anything else
+`to_networkx` returns the equivalent networkx graph.
+
+A team selects it for `bot.graph` by setting `GRAPH = "grid"` in its module.
+"""
+
+import collections.abc
+import heapq
+
+import numpy as np
+
+from .layout import wall_dimensions
+
+
+class NoPath(ValueError):
+    """ Raised when there is no path between two nodes. """
+    pass
+
+
+def bfs_path(graph, source, target):
+    """ Breadth-first search for a shortest path between the node indices
+    `source` and `target`. Returns the list of node indices or None. """
+    neighbors = graph.adjacency
+    parent = {source: source}
+    todo = collections.deque([source])
+    while todo:
+        node = todo.popleft()
+        if node == target:
+            path = [node]
+            while node != source:
+                node = parent[node]
+                path.append(node)
+            path.reverse()
+            return path
+        for neighbor in neighbors[node]:
+            if neighbor not in parent:
+                parent[neighbor] = node
+                todo.append(neighbor)
+    return None
+
+
+def astar_path(graph, source, target):
+    """ A* search for a shortest path between the node indices `source` and
+    `target` with the Manhattan distance as heuristic. Returns the list of
+    node indices or None. """
+    neighbors = graph.adjacency
+    coords = graph.coords
+    tx, ty = coords[target]
+
+    def heuristic(node):
+        x, y = coords[node]
+        return abs(x - tx) + abs(y - ty)
+
+    parent = {source: source}
+    cost = {source: 0}
+    # (estimated total cost, cost so far, node)
+    todo = [(heuristic(source), 0, source)]
+    while todo:
+        _estimate, node_cost, node = heapq.heappop(todo)
+        if node == target:
+            path = [node]
+            while node != source:
+                node = parent[node]
+                path.append(node)
+            path.reverse()
+            return path
+        if node_cost > cost[node]:
+            # outdated entry
+            continue
+        for neighbor in neighbors[node]:
+            new_cost = node_cost + 1
+            if new_cost < cost.get(neighbor, new_cost + 1):
+                cost[neighbor] = new_cost
+                parent[neighbor] = node
+                heapq.heappush(todo, (new_cost + heuristic(neighbor), new_cost, neighbor))
+    return None
+
+
+#: The available path search algorithms
+SEARCH_ALGORITHMS = {
+    'bfs': bfs_path,
+    'astar': astar_path,
+}
+
+
+class _NodeView(collections.abc.Sequence):
+    # the nodes of a GridGraph with a fast `in`
+    __slots__ = ('_graph',)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph.coords)
+
+    def __getitem__(self, index):
+        return self._graph.coords[index]
+
+    def __iter__(self):
+        return iter(self._graph.coords)
+
+    def __contains__(self, node):
+        return self._graph.has_node(node)
+
+    def __repr__(self):
+        return f'NodeView({tuple(self._graph.coords)!r})'
+
+
+class GridGraph:
+    """ Read-only graph of the free squares of a maze.
+
+    Nodes, their order and the order of the neighbors are the same as
+    in the networkx graph from `pelita.team.walls_to_graph`. As there
+    can be several shortest paths, `shortest_path` may return a different
+    (but equally long) path than networkx.
+
+    Parameters
+    ----------
+    walls : [(x0,y0), (x1,y1), ...]
+        a list of wall coordinates
+    shape : (int, int)
+        the shape of the maze
+    search : str or callable
+        the algorithm used by `shortest_path`: 'bfs', 'astar' or a function
+        `search(graph, source, target)` which returns a list of node
+        indices (see `bfs_path`)
+
+    Attributes
+    ----------
+    index : numpy array of shape (width, height)
+        the node index of each square, -1 for walls
+    neighbor_array : numpy array of shape (n_nodes, 4)
+        the neighbor indices of each node, padded with -1
+    coords : list of (x, y)
+        the square of each node index
+    adjacency : list of lists
+        the neighbor indices of each node index
+    """
+    def __init__(self, walls, shape=None, search='bfs'):
+        if shape is None:
+            shape = wall_dimensions(walls)
+        width, height = shape
+        self.walls = walls
+        self.shape = (width, height)
+        if not callable(search):
+            search = SEARCH_ALGORITHMS[search]
+        self._search = search
+
+        free = np.ones((width, height), dtype=bool)
+        if len(walls):
+            wx, wy = np.array(list(walls), dtype=np.intp).T
+            inside = (wx < width) & (wy < height)
+            free[wx[inside], wy[inside]] = False
+
+        # squares are connected to the right and to the bottom
+        right = np.zeros_like(free)
+        right[:-1, :] = free[:-1, :] & free[1:, :]
+        down = np.zeros_like(free)
+        down[:, :-1] = free[:, :-1] & free[:, 1:]
+        # only squares with at least one free neighbor are nodes
+        left = np.zeros_like(free)
+        left[1:, :] = right[:-1, :]
+        up = np.zeros_like(free)
+        up[:, 1:] = down[:, :-1]
+
+        # networkx adds the nodes in the order of the edges
+        # (x, y) - (x + 1, y) and (x, y) - (x, y + 1), iterating over x and y;
+        # a node gets its position from its first edge
+        first_seen = np.full((width, height), np.iinfo(np.int64).max, dtype=np.int64)
+        order = np.arange(width * height, dtype=np.int64).reshape(width, height) * 3
+        # the node itself (if it has an edge to the right or to the bottom)
+        own = right | down
+        first_seen[own] = order[own]
+        # as the right neighbor of (x - 1, y)
+        as_right = np.zeros_like(first_seen)
+        as_right[1:, :] = order[:-1, :] + 1
+        first_seen[left] = np.minimum(first_seen[left], as_right[left])
+        # as the bottom neighbor of (x, y - 1); comes after the right neighbor
+        as_down = np.zeros_like(first_seen)
+        as_down[:, 1:] = order[:, :-1] + np.where(right[:, :-1], 2, 1)
+        first_seen[up] = np.minimum(first_seen[up], as_down[up])
+
+        is_node = own | left | up
+        node_order = np.argsort(first_seen[is_node], kind='stable')
+        node_x, node_y = np.nonzero(is_node)
+        node_x = node_x[node_order]
+        node_y = node_y[node_order]
+
+        self.index = np.full((width, height), -1, dtype=np.int32)
+        self.index[node_x, node_y] = np.arange(len(node_x), dtype=np.int32)
+
+        # neighbors in the order of networkx: left, up, right, down
+        padded = np.full((width + 2, height + 2), -1, dtype=np.int32)
+        padded[1:-1, 1:-1] = self.index
+        px, py = node_x + 1, node_y + 1
+        self.neighbor_array = np.stack([
+            padded[px - 1, py],
+            padded[px, py - 1],
+            padded[px + 1, py],
+            padded[px, py + 1],
+        ], axis=1)
+
+        # plain Python lists are faster for the searches
+        self.coords = list(zip(node_x.tolist(), node_y.tolist()))
+        self.adjacency = [[n for n in row if n >= 0] for row in self.neighbor_array.tolist()]
+        self._index_list = self.index.tolist()
+
+    def _node_index(self, node):
+        try:
+            x, y = node
+            if x >= 0 and y >= 0:
+                idx = self._index_list[x][y]
+                if idx >= 0:
+                    return idx
+        except (TypeError, ValueError, IndexError):
+            pass
+        raise KeyError(f"Node {node!r} is not in the graph.")
+
+    def has_node(self, node):
+        """ Return True if `node` is in the graph. """
+        try:
+            self._node_index(node)
+        except KeyError:
+            return False
+        return True
+
+    __contains__ = has_node
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __iter__(self):
+        return iter(self.coords)
+
+    @property
+    def nodes(self):
+        """ The nodes of the graph (with a fast `in`). """
+        return _NodeView(self)
+
+    @property
+    def edges(self):
+        """ The list of edges of the graph in the same order as networkx. """
+        coords = self.coords
+        edges = []
+        for idx, neighbors in enumerate(self.adjacency):
+            for neighbor in neighbors:
+                # every edge is reported by the node which comes first
+                if neighbor > idx:
+                    edges.append((coords[idx], coords[neighbor]))
+        return edges
+
+    def neighbors(self, node):
+        """ Return an iterator over the neighbors of `node`. """
+        coords = self.coords
+        return iter([coords[idx] for idx in self.adjacency[self._node_index(node)]])
+
+    def degree(self, node):
+        """ Return the number of neighbors of `node`. """
+        return len(self.adjacency[self._node_index(node)])
+
+    def bfs(self, source, depth_limit=None):
+        """ Iterate over (node, distance) in breadth-first order from `source`. """
+        coords = self.coords
+        neighbors = self.adjacency
+        start = self._node_index(source)
+        distance = {start: 0}
+        todo = collections.deque([start])
+        while todo:
+            idx = todo.popleft()
+            dist = distance[idx]
+            yield coords[idx], dist
+            if depth_limit is not None and dist >= depth_limit:
+                continue
+            for neighbor in neighbors[idx]:
+                if neighbor not in distance:
+                    distance[neighbor] = dist + 1
+                    todo.append(neighbor)
+
+    def shortest_path(self, source, target):
+        """ Return a shortest path from `source` to `target` as a list of nodes.
+
+        Raises
+        ------
+        KeyError
+            if source or target are not in the graph
+        NoPath
+            if target cannot be reached from source
+        """
+        path = self._search(self, self._node_index(source), self._node_index(target))
+        if path is None:
+            raise NoPath(f"No path between {source} and {target}.")
+        coords = self.coords
+        return [coords[idx] for idx in path]
+
+    def shortest_path_length(self, source, target=None):
+        """ Return the length of the shortest path from `source` to `target`.
+
+        If target is None, return a dict {node: distance} for all nodes
+        reachable from `source`.
+        """
+        if target is None:
+            return dict(self.bfs(source))
+        return len(self.shortest_path(source, target)) - 1
+
+    def distance_matrix(self):
+        """ Return a numpy array of shape (n_nodes, n_nodes) with the distances
+        between all pairs of nodes (-1 if a node cannot be reached).
+
+        All breadth-first searches advance together with array operations.
+        Use `index` to get the row of a node.
+        """
+        n_nodes = len(self.coords)
+        dist = np.full((n_nodes, n_nodes), -1, dtype=np.int32)
+        np.fill_diagonal(dist, 0)
+        frontier = np.eye(n_nodes, dtype=bool)
+
+        # add an always False column for the -1 padding
+        neighbor_array = np.where(self.neighbor_array >= 0, self.neighbor_array, n_nodes)
+        step = 0
+        while frontier.any():
+            step += 1
+            padded = np.concatenate([frontier, np.zeros((n_nodes, 1), dtype=bool)], axis=1)
+            # a node is reached when any of its neighbors was in the frontier
+            reached = padded[:, neighbor_array].any(axis=2)
+            frontier = reached & (dist < 0)
+            dist[frontier] = step
+        return dist
+
+    def to_networkx(self):
+        """ Return the equivalent networkx graph. """
+        from .team import walls_to_graph
+        return walls_to_graph(self.walls, shape=self.shape)
+
+    def __repr__(self):
+        return f'<GridGraph: {len(self.coords)} nodes, shape {self.shape}>'
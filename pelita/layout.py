@@ -1,5 +1,5 @@
 
-import io
+import struct
 
 # bot to index conversion
 BOT_N2I = {'a': 0, 'b': 2, 'x': 1, 'y': 3}
@@ -42,16 +42,44 @@ def parse_layout(layout_str, food=None, bots=None, strict=True):
               bots specified this way override the coordinates of bots found in the string
     """
 
-    if bots is None:
-        bots = {}
-    if food is None:
-        food = []
+    rows, width = _layout_rows(layout_str, strict)
+    # height of the layout (y-axis)
+    height = len(rows)
 
     # set empty default values
     lwalls = set()
     lfood = []
     lbots = [None] * 4
 
+    # iterate through the grid of characters
+    for y, row in enumerate(rows):
+        for x, char in enumerate(row):
+            coord = (x, y)
+            # assign the char to the corresponding list
+            if char == '#':
+                # wall
+                lwalls.add(coord)
+            elif char == '.':
+                # food
+                lfood.append(coord)
+            elif char == ' ':
+                # empty
+                continue
+            elif char in BOT_N2I.keys():
+                # legal bots
+                bot_idx = BOT_N2I[char]
+                if lbots[bot_idx] is not None:
+                    # bot_idx has already been set before
+                    raise ValueError(f"Cannot set bot {BOT_I2N[bot_idx]} to {coord} (already at {lbots[bot_idx]}).")
+                lbots[bot_idx] = coord
+            else:
+                raise ValueError(f"Unknown character {char} in maze at {coord}!")
+    return _finish_layout(tuple(sorted(lwalls)), lfood, lbots, (width, height),
+                          food=food, bots=bots, strict=strict)
+
+
+def _layout_rows(layout_str, strict):
+    # returns the rows of the layout and its width
     width = None
     # list of layout rows
     rows = []
@@ -93,32 +121,20 @@ def parse_layout(layout_str, food=None, bots=None, strict=True):
         # layout has not been closed!
         raise ValueError(f"Layout must be enclosed by walls (line:{i})!")
 
-    # height of the layout (y-axis)
-    height = len(rows)
+    return rows, width
+
+
+def _finish_layout(walls, lfood, lbots, shape, *, food, bots, strict):
+    # check the bots, add the extra food and bots and build the layout dict
+    if bots is None:
+        bots = {}
+    if food is None:
+        food = []
+
+    width, height = shape
+    # only needed to check the additional food and bots
+    lwalls = set(walls) if (food or bots) else ()
 
-    # iterate through the grid of characters
-    for y, row in enumerate(rows):
-        for x, char in enumerate(row):
-            coord = (x, y)
-            # assign the char to the corresponding list
-            if char == '#':
-                # wall
-                lwalls.add(coord)
-            elif char == '.':
-                # food
-                lfood.append(coord)
-            elif char == ' ':
-                # empty
-                continue
-            elif char in BOT_N2I.keys():
-                # legal bots
-                bot_idx = BOT_N2I[char]
-                if lbots[bot_idx] is not None:
-                    # bot_idx has already been set before
-                    raise ValueError(f"Cannot set bot {BOT_I2N[bot_idx]} to {coord} (already at {lbots[bot_idx]}).")
-                lbots[bot_idx] = coord
-            else:
-                raise ValueError(f"Unknown character {char} in maze at {coord}!")
     missing_bots = []
     for i, bot in enumerate(lbots):
         if bot is None and BOT_I2N[i] not in bots:
@@ -133,8 +149,8 @@ def parse_layout(layout_str, food=None, bots=None, strict=True):
             raise ValueError(f"food item at {c} is outside of maze!")
         elif c in lwalls:
             raise ValueError(f"food item at {c} is on a wall!")
-        else:
-            lfood = sorted(list(set(food + lfood)))
+    if food:
+        lfood = sorted(set(food) | set(lfood))
 
     if not (set(bots.keys()) <= set(BOT_N2I.keys())):
         raise ValueError(f"Invalid Bot names in {bots}.")
@@ -149,10 +165,10 @@ def parse_layout(layout_str, food=None, bots=None, strict=True):
             # override bots
             lbots[BOT_N2I[bn]] = bpos
 
-    # build parsed layout, ensuring walls and food are sorted
+    # build parsed layout; walls and food are sorted already
     parsed_layout = {
-        'walls': tuple(sorted(lwalls)),
-        'food': sorted(lfood),
+        'walls': walls,
+        'food': lfood,
         'bots': lbots,
         'shape': (width, height)
     }
@@ -202,23 +218,145 @@ def layout_as_str(*, walls, food=None, bots=None, shape=None):
     if bots is None:
         bots = []
 
-    out = io.StringIO()
-    for y in range(height):
-        for x in range(width):
-            out_char = " "
-            if (x, y) in walls:
-                # always print walls
-                out_char = '#'
-            elif (x, y) in bots:
-                # Bot has the next priority
-                bot_ix = bots.index((x,y))
-                out_char = BOT_I2N[bot_ix]
-            elif (x, y) in food:
-                out_char = '.'
-             # close the row
-            out.write(out_char)
-        out.write('\n')
-    return out.getvalue()
+    grid = [[" "] * width for _ in range(height)]
+    # fill in reverse order of precedence
+    for x, y in food:
+        if 0 <= x < width and 0 <= y < height:
+            grid[y][x] = '.'
+    # for bots on the same position, the first one is shown
+    for bot_ix in reversed(range(len(bots))):
+        if bots[bot_ix] is None:
+            continue
+        x, y = bots[bot_ix]
+        if 0 <= x < width and 0 <= y < height:
+            grid[y][x] = BOT_I2N[bot_ix]
+    for x, y in walls:
+        if x >= 0 and y >= 0:
+            grid[y][x] = '#'
+
+    return ''.join(''.join(row) + '\n' for row in grid)
+
+
+def parse_layout_array(layout_str, food=None, bots=None, strict=True):
+    """Parse a layout string with numpy.
+
+    Same as `parse_layout`, but the grid of characters is viewed as a numpy
+    array and walls, food and bots are located with vectorised comparisons
+    instead of a loop over every character. This is considerably faster for
+    big layouts and for the bulk analysis of many layouts.
+
+    Invalid layouts are passed on to `parse_layout` so that the same error
+    is raised.
+    """
+    import numpy as np
+
+    rows, width = _layout_rows(layout_str, strict)
+    height = len(rows)
+    try:
+        data = ''.join(rows).encode('ascii')
+    except UnicodeEncodeError:
+        data = None
+    if not data:
+        return parse_layout(layout_str, food=food, bots=bots, strict=strict)
+
+    # transposed, so that the non-zero indices are sorted by (x, y)
+    grid = np.frombuffer(data, dtype=np.uint8).reshape(height, width).T
+
+    is_wall = grid == ord('#')
+    is_food = grid == ord('.')
+    known = is_wall | is_food | (grid == ord(' '))
+
+    lbots = [None] * 4
+    for char, bot_idx in BOT_N2I.items():
+        is_bot = grid == ord(char)
+        xs, ys = np.nonzero(is_bot)
+        if len(xs) > 1:
+            # bot has been set twice
+            return parse_layout(layout_str, food=food, bots=bots, strict=strict)
+        if len(xs):
+            lbots[bot_idx] = (int(xs[0]), int(ys[0]))
+            known |= is_bot
+
+    if not known.all():
+        # unknown characters
+        return parse_layout(layout_str, food=food, bots=bots, strict=strict)
+
+    walls = tuple(zip(*(coords.tolist() for coords in np.nonzero(is_wall))))
+    lfood = list(zip(*(coords.tolist() for coords in np.nonzero(is_food))))
+
+    return _finish_layout(walls, lfood, lbots, (width, height),
+                          food=food, bots=bots, strict=strict)
+
+
+#: Magic bytes of the binary layout encoding
+LAYOUT_MAGIC = b'PLY1'
+
+# magic, width, height, number of food pellets, number of bots
+_LAYOUT_HEADER = struct.Struct('<4sHHHH')
+
+# coordinate of a bot which is not in the layout
+_NO_POS = 0xFFFF
+
+
+def layout_to_bytes(layout):
+    """Encode a layout dict in a compact binary form.
+
+    The walls are stored as a bit-packed (height, width) grid followed by
+    the food and the bot coordinates as arrays of unsigned 16 bit integers.
+    A normal maze takes about 330 bytes.
+
+    The layout can be decoded with `layout_from_bytes`.
+    """
+    import numpy as np
+
+    walls = layout['walls']
+    shape = layout.get('shape') or wall_dimensions(walls)
+    width, height = shape
+
+    grid = np.zeros((height, width), dtype=bool)
+    if len(walls):
+        wx, wy = np.array(walls, dtype=np.intp).T
+        grid[wy, wx] = True
+
+    food = np.array(layout.get('food') or [], dtype='<u2').reshape(-1, 2)
+    bots = np.array([(_NO_POS, _NO_POS) if bot is None else bot
+                     for bot in layout.get('bots') or []], dtype='<u2').reshape(-1, 2)
+
+    header = _LAYOUT_HEADER.pack(LAYOUT_MAGIC, width, height, len(food), len(bots))
+    return header + np.packbits(grid).tobytes() + food.tobytes() + bots.tobytes()
+
+
+def layout_from_bytes(data):
+    """Decode a layout that has been encoded with `layout_to_bytes`.
+
+    Returns a layout dict as `parse_layout` does.
+    """
+    import numpy as np
+
+    magic, width, height, nfood, nbots = _LAYOUT_HEADER.unpack_from(data)
+    if magic != LAYOUT_MAGIC:
+        raise ValueError("Data is not a binary layout.")
+
+    offset = _LAYOUT_HEADER.size
+    wall_bytes = (width * height + 7) // 8
+    bits = np.frombuffer(data, dtype=np.uint8, count=wall_bytes, offset=offset)
+    grid = np.unpackbits(bits, count=width * height).reshape(height, width)
+    offset += wall_bytes
+
+    coords = np.frombuffer(data, dtype='<u2', count=2 * (nfood + nbots), offset=offset)
+    coords = coords.reshape(-1, 2).tolist()
+
+    # transposed, so that the non-zero indices are sorted by (x, y)
+    walls = tuple(zip(*(c.tolist() for c in np.nonzero(grid.T))))
+    food = [tuple(pos) for pos in coords[:nfood]]
+    bots = [None if pos == [_NO_POS, _NO_POS] else tuple(pos) for pos in coords[nfood:]]
+
+    return {
+        'walls': walls,
+        'food': food,
+        'bots': bots,
+        'shape': (width, height)
+    }
 
 
 def wall_dimensions(walls):
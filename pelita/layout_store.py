@@ -0,0 +1,231 @@
+""" Generate seeded maze layouts in bulk and store them in a single indexed file.
+
+A layout store is a binary file with the following structure:
+
+    MAGIC | record | record | ... | index (json) | index offset (8 bytes, little endian)
+
+Every record is a zlib-compressed blob containing the state of the random
+number generator after the maze has been generated followed by the layout
+string. The index maps (seed, width, height, trapped_food, total_food) to
+the offset and length of the record, so that a single layout can be loaded
+without reading the whole file.
+
+Storing the random state makes a stored layout a drop-in replacement for
+`generate_maze(rng=Random(seed))`: after `load_layout` the rng is in the
+same state as if the maze had been generated, so that the rest of the game
+plays out identically.
+"""
+
+import concurrent.futures
+import json
+import os
+import random
+import struct
+import zlib
+from pathlib import Path
+
+from .game import MSIZE, NFOOD
+from .layout import layout_as_str, parse_layout
+
+MAGIC = b'PELITAL1'
+
+# Mersenne Twister state: 624 words plus the position in the state
+_RNG_STATE = struct.Struct('<625I')
+_FOOTER = struct.Struct('<Q')
+
+
+def layout_size(size):
+    """ Return the (width, height) tuple for a maze size.
+
+    `size` may be a tuple, one of the names in `pelita.game.MSIZE`,
+    a 'WxH' string or None (for the normal size).
+    """
+    if size is None:
+        return MSIZE['normal']
+    if isinstance(size, str):
+        if size in MSIZE:
+            return MSIZE[size]
+        if 'x' in size:
+            width, height = size.split('x')
+            return (int(width), int(height))
+        return (int(size) * 2, int(size))
+    width, height = size
+    return (width, height)
+
+
+def _food_for(size, food):
+    if food is not None:
+        trapped_food, total_food = food
+        return (trapped_food, total_food)
+    try:
+        return NFOOD[size]
+    except KeyError:
+        raise ValueError(f"Food must be given for custom maze size {size}.") from None
+
+
+def generate_layout(seed, size, food=None):
+    """ Generate the layout for the given seed in the same way as `pelita`.
+
+    Returns
+    -------
+    tuple of (layout_dict, rng_state)
+        The layout and the state of the random number generator after the
+        layout was generated.
+    """
+    from .maze_generator import generate_maze
+
+    width, height = layout_size(size)
+    trapped_food, total_food = _food_for((width, height), food)
+    rng = random.Random(seed)
+    layout_dict = generate_maze(trapped_food=trapped_food, total_food=total_food,
+                                width=width, height=height, rng=rng)
+    return layout_dict, rng.getstate()
+
+
+def _generate_record(key):
+    seed, width, height, trapped_food, total_food = key
+    layout_dict, rng_state = generate_layout(seed, (width, height), (trapped_food, total_food))
+    _version, internal_state, _gauss_next = rng_state
+    blob = _RNG_STATE.pack(*internal_state) + layout_as_str(**layout_dict).encode('ascii')
+    return key, zlib.compress(blob, 9)
+
+
+def generate_layouts(seeds, sizes=('normal',), foods=(None,), processes=None):
+    """ Generate the layouts for all combinations of seeds, sizes and foods.
+
+    The layouts are generated in a process pool with `processes` workers
+    (default: number of CPUs). With `processes=1` everything is done in
+    the current process.
+
+    Returns
+    -------
+    list of (key, record) tuples sorted by key, where key is
+    (seed, width, height, trapped_food, total_food).
+    """
+    keys = set()
+    for size in sizes:
+        width, height = layout_size(size)
+        for food in foods:
+            trapped_food, total_food = _food_for((width, height), food)
+            for seed in seeds:
+                keys.add((seed, width, height, trapped_food, total_food))
+    keys = sorted(keys)
+
+    if processes == 1:
+        return [_generate_record(key) for key in keys]
+
+    workers = processes or os.cpu_count() or 1
+    chunksize = max(1, len(keys) // (4 * workers))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return sorted(executor.map(_generate_record, keys, chunksize=chunksize))
+
+
+def write_store(path, records):
+    """ Write the records returned by `generate_layouts` to a layout store file. """
+    index = []
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        for key, record in records:
+            index.append([*key, f.tell(), len(record)])
+            f.write(record)
+        index_offset = f.tell()
+        f.write(json.dumps(index, separators=(',', ':')).encode('ascii'))
+        f.write(_FOOTER.pack(index_offset))
+
+
+class LayoutStore:
+    """ Read access to a layout store file written by `write_store`.
+
+    Only the index is read on construction. The layouts are read
+    on demand with `load_layout`.
+
+    Parameters
+    ----------
+    path : str or Path
+        The layout store file
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a layout store.")
+            f.seek(-_FOOTER.size, 2)
+            footer_offset = f.tell()
+            index_offset, = _FOOTER.unpack(f.read(_FOOTER.size))
+            f.seek(index_offset)
+            index = json.loads(f.read(footer_offset - index_offset))
+
+        # (seed, width, height, trapped_food, total_food) -> (offset, length)
+        self._index = {tuple(entry[:5]): (entry[5], entry[6]) for entry in index}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def _key(self, seed, size, food):
+        width, height = layout_size(size)
+        trapped_food, total_food = _food_for((width, height), food)
+        return (seed, width, height, trapped_food, total_food)
+
+    def seeds(self, size=None, food=None):
+        """ Return the sorted list of seeds stored for the given size and food. """
+        _seed, *rest = self._key(None, size, food)
+        return sorted(key[0] for key in self._index if key[1:] == tuple(rest))
+
+    def has_layout(self, seed, size=None, food=None):
+        """ Return True if the layout for seed, size and food is in the store. """
+        return self._key(seed, size, food) in self._index
+
+    def load_layout(self, seed, size=None, food=None, rng=None):
+        """ Load the layout that `generate_maze` creates with `Random(seed)`.
+
+        Parameters
+        ----------
+        seed : int
+            The seed of the layout
+        size : tuple or str
+            The size of the maze (see `layout_size`)
+        food : tuple or None
+            (trapped_food, total_food) or None for the size specific default
+        rng : random.Random
+            If given, the state of `rng` is set to the state it would have
+            after generating the layout from `Random(seed)`.
+
+        Raises
+        ------
+        KeyError
+            If the layout is not in the store.
+        """
+        offset, length = self._index[self._key(seed, size, food)]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            blob = zlib.decompress(f.read(length))
+
+        if rng is not None:
+            internal_state = _RNG_STATE.unpack_from(blob)
+            rng.setstate((3, internal_state, None))
+        return parse_layout(blob[_RNG_STATE.size:].decode('ascii'))
+
+
+def load_or_generate_layout(seed, size=None, food=None, rng=None, store=None):
+    """ Load the layout from `store` if it is there, otherwise generate it.
+
+    `rng` must be `Random(seed)` in its initial state. Afterwards it is in
+    the same state in both cases.
+    """
+    if store is not None:
+        if not isinstance(store, LayoutStore):
+            store = LayoutStore(store)
+        try:
+            return store.load_layout(seed, size, food=food, rng=rng)
+        except KeyError:
+            pass
+
+    from .maze_generator import generate_maze
+
+    width, height = layout_size(size)
+    trapped_food, total_food = _food_for((width, height), food)
+    return generate_maze(trapped_food=trapped_food, total_food=total_food,
+                         width=width, height=height, rng=rng)
@@ -34,10 +34,7 @@ Rewritten again (but not completely) by Tiziano Zito
 Rewritten completely by Jakob Zahn & Tiziano Zito
 """
 
-import networkx as nx
-
 from .base_utils import default_rng
-from .team import walls_to_graph
 
 # constants in `u`-`v`-space including walls
 #
@@ -69,14 +66,155 @@ def rotate_180(nodes, width, height):
     return set((width - 1 - x, height - 1 - y) for x, y in nodes)
 
 
+class TileGraph:
+    """ Undirected graph of the free tiles in a maze.
+
+    Nodes are stored by a flat integer index and the edges as a list of
+    neighbor indices for each node. This is a lot cheaper than a networkx
+    graph for the few graph operations that the maze generator needs.
+
+    Attributes
+    ----------
+    nodes : list of (x, y)
+        the tile of each node index
+    index : dict
+        maps a tile to its node index
+    neighbors : list of lists
+        the neighbor indices of each node index
+    """
+    def __init__(self):
+        self.nodes = []
+        self.index = {}
+        self.neighbors = []
+
+    @classmethod
+    def from_walls(cls, walls, shape):
+        """ Build the graph of all free tiles in a maze of the given shape.
+
+        Like `pelita.team.walls_to_graph`, only tiles that have at least
+        one free neighbor become nodes.
+        """
+        width, height = shape
+        graph = cls()
+        for x in range(width):
+            for y in range(height):
+                if (x, y) in walls:
+                    continue
+                # Only positive neighbours are needed as we are iterating
+                # all fields
+                for neighbor in ((x + 1, y), (x, y + 1)):
+                    if neighbor not in walls and neighbor[0] < width and neighbor[1] < height:
+                        graph.add_edge((x, y), neighbor)
+        return graph
+
+    @classmethod
+    def from_graph(cls, graph):
+        """ Build from a graph with a networkx-like API (e.g. `walls_to_graph`). """
+        tile_graph = cls()
+        for node in graph.nodes:
+            tile_graph._add_node(node)
+        for node in graph.nodes:
+            for neighbor in graph.neighbors(node):
+                tile_graph.add_edge(node, neighbor)
+        return tile_graph
+
+    def _add_node(self, node):
+        try:
+            return self.index[node]
+        except KeyError:
+            idx = self.index[node] = len(self.nodes)
+            self.nodes.append(node)
+            self.neighbors.append([])
+            return idx
+
+    def add_edge(self, u, v):
+        u_idx = self._add_node(u)
+        v_idx = self._add_node(v)
+        # self-loops do not matter for connectivity
+        if u_idx != v_idx and v_idx not in self.neighbors[u_idx]:
+            self.neighbors[u_idx].append(v_idx)
+            self.neighbors[v_idx].append(u_idx)
+
+    def is_connected(self):
+        if not self.nodes:
+            return False
+        seen = [False] * len(self.nodes)
+        seen[0] = True
+        todo = [0]
+        count = 1
+        while todo:
+            for neighbor in self.neighbors[todo.pop()]:
+                if not seen[neighbor]:
+                    seen[neighbor] = True
+                    count += 1
+                    todo.append(neighbor)
+        return count == len(self.nodes)
+
+    def biconnected_components(self):
+        """ Yield the node indices of each biconnected component.
+
+        This is an iterative version of Tarjan’s algorithm which keeps
+        the visited edges on a stack and pops a component whenever the
+        dfs returns to an articulation point.
+        """
+        neighbors = self.neighbors
+        discovery = [-1] * len(self.nodes)
+        low = [0] * len(self.nodes)
+        counter = 0
+
+        for root in range(len(self.nodes)):
+            if discovery[root] != -1 or not neighbors[root]:
+                continue
+            discovery[root] = low[root] = counter
+            counter += 1
+
+            edge_stack = []
+            # (node, parent, iterator over the remaining neighbors)
+            dfs_stack = [(root, -1, iter(neighbors[root]))]
+            while dfs_stack:
+                node, parent, remaining = dfs_stack[-1]
+                for child in remaining:
+                    if child == parent:
+                        continue
+                    if discovery[child] == -1:
+                        discovery[child] = low[child] = counter
+                        counter += 1
+                        edge_stack.append((node, child))
+                        dfs_stack.append((child, node, iter(neighbors[child])))
+                        break
+                    if discovery[child] < discovery[node]:
+                        # back edge
+                        low[node] = min(low[node], discovery[child])
+                        edge_stack.append((node, child))
+                else:
+                    dfs_stack.pop()
+                    if parent == -1:
+                        continue
+                    low[parent] = min(low[parent], low[node])
+                    if low[node] >= discovery[parent]:
+                        # parent is an articulation point (or the root)
+                        component = set()
+                        while True:
+                            edge = edge_stack.pop()
+                            component.update(edge)
+                            if edge == (parent, node):
+                                break
+                        yield component
+
+
 def find_chamber_tiles(graph, border_gaps):
     # find all tiles which are inside a trap, i.e. inside a
     # subgraph which has only one tile - the articulation point -
     # in common with the rest of the chamber
+    if not isinstance(graph, TileGraph):
+        graph = TileGraph.from_graph(graph)
+
+    border_gaps = {graph.index[gap] for gap in border_gaps if gap in graph.index}
+
     main_chamber = set()
     chamber_tiles = set()
 
-    for chamber in nx.biconnected_components(graph):
+    for chamber in graph.biconnected_components():
         if (chamber & border_gaps):
             # main chambers intersect with border gaps
             main_chamber.update(chamber)
@@ -87,7 +225,7 @@ def find_chamber_tiles(graph, border_gaps):
     # remove shared articulation points with the main chamber
     chamber_tiles -= main_chamber
 
-    return chamber_tiles
+    return {graph.nodes[idx] for idx in chamber_tiles}
 
 
 def sample_nodes(nodes, k, rng=None):
@@ -155,6 +293,9 @@ def add_inner_walls(walls, pmin, pmax, ngaps, vertical, rng=None):
     # the orientation of the wall
     partitions = [(pmin, pmax, ngaps, vertical)]
 
+    # count the inner walls for the maze metrics
+    nwalls = 0
+
     # loop over all occuring partitions in the list;
     # the loop always exits because partitions always shrink by definition,
     # no new partitions are added once they shrank below a threshold and
@@ -243,6 +384,7 @@ def add_inner_walls(walls, pmin, pmax, ngaps, vertical, rng=None):
 
         # add the inner wall tiles to the global wall set
         walls |= set(transform((upos, v)) for v in sampled)
+        nwalls += 1
 
         #
         # PARTITIONING
@@ -264,8 +406,16 @@ def add_inner_walls(walls, pmin, pmax, ngaps, vertical, rng=None):
         # queue the new partitions next
         partitions.extend(new)
 
+    return nwalls
 
-def generate_half_maze(trapped_food, total_food, width, height, rng=None):
+
+def build_half_maze(width, height, rng=None):
+    """ Generate the walls of the left half of a maze and find its chambers.
+
+    Returns a dict with the walls, the tile graph (with the border gaps
+    wired up), the border gaps, the number of inner walls, the chamber
+    tiles and the free tiles available for food.
+    """
     #
     # CONSTANTS
     #
@@ -347,7 +497,7 @@ def generate_half_maze(trapped_food, total_food, width, height, rng=None):
     pmax = (x_border, height - 1)
 
     # run the binary space partitioning
-    add_inner_walls(walls, pmin, pmax, ngaps, vertical=False, rng=rng)
+    inner_walls = add_inner_walls(walls, pmin, pmax, ngaps, vertical=False, rng=rng)
 
     # make space for the pacmen
     walls -= pacmen_pos
@@ -359,11 +509,11 @@ def generate_half_maze(trapped_food, total_food, width, height, rng=None):
     # create a graph representing connections between free tiles;
     # used for detecting chambers and food distribution;
     # see the `FOOD` section below for application
-    graph = walls_to_graph(walls, shape=(width // 2, height))
+    graph = TileGraph.from_walls(walls, shape=(width // 2, height))
 
     # the algorithm should actually guarantee this, but just to make sure, let's
     # fail if the graph is not fully connected
-    if not nx.is_connected(graph):
+    if not graph.is_connected():
         raise ValueError("Generated maze is not fully connected, try a different random seed")
 
     # emulate the presence of the right maze side by wiring up
@@ -389,10 +539,11 @@ def generate_half_maze(trapped_food, total_food, width, height, rng=None):
     #
     # requirement: border gaps are sampled centrosymmetric with always a
     # wall segment in the middle on odd heights
-    graph.add_edges_from(border_bridges)
+    for upper, lower in border_bridges:
+        graph.add_edge(upper, lower)
 
     #
-    # FOOD
+    # CHAMBERS
     #
 
     # this gives us a set of tiles that are "trapped" within chambers, i.e. tunnels
@@ -400,18 +551,32 @@ def generate_half_maze(trapped_food, total_food, width, height, rng=None):
     # tile entrance
     chamber_tiles = find_chamber_tiles(graph, border_gaps)
 
-    # distribute food on the half maze with excluded border gaps and
+    # food is distributed on the half maze with excluded border gaps and
     # pacmen positions
     chamber_tiles -= pacmen_pos
-    free_tiles = graph.nodes - border_gaps - pacmen_pos
+    free_tiles = set(graph.nodes) - border_gaps - pacmen_pos
 
-    food = distribute_food(free_tiles, chamber_tiles, trapped_food, total_food, rng=rng)
+    return {
+        "walls": walls,
+        "graph": graph,
+        "border_gaps": border_gaps,
+        "inner_walls": inner_walls,
+        "chamber_tiles": chamber_tiles,
+        "free_tiles": free_tiles,
+    }
 
 
-    return walls, food
+def generate_half_maze(trapped_food, total_food, width, height, rng=None):
+    rng = default_rng(rng)
 
+    half_maze = build_half_maze(width, height, rng=rng)
+    food = distribute_food(half_maze["free_tiles"], half_maze["chamber_tiles"],
+                           trapped_food, total_food, rng=rng)
 
-def generate_maze(trapped_food=10, total_food=30, width=32, height=16, rng=None):
+    return half_maze["walls"], food
+
+
+def check_maze_shape(width, height):
     if width % 2 != 0:
         raise ValueError(f"Width must be even ({width} given)")
 
@@ -421,18 +586,11 @@ def generate_maze(trapped_food=10, total_food=30, width=32, height=16, rng=None)
     if height < 4:
         raise ValueError(f"Height must be at least 4, but {height} was given")
 
-    rng = default_rng(rng)
-
-    # generate a full maze, but only the left half is filled with random walls
-    # this allows us to cut the execution time in two, because the following
-    # graph operations are quite expensive
-
-    # generate the left half of a maze with half of the border being gaps
-    walls, food = generate_half_maze(trapped_food, total_food, width, height, rng=rng)
 
+def full_maze_layout(walls, food, width, height):
     # get the full maze with all walls and food by rotating the left half
-    walls |= rotate_180(walls, width, height)
-    food |= rotate_180(food, width, height)
+    walls = walls | rotate_180(walls, width, height)
+    food = food | rotate_180(food, width, height)
 
     # create a maze layout
     layout = { "walls" : tuple(sorted(walls)),
@@ -442,3 +600,198 @@ def generate_maze(trapped_food=10, total_food=30, width=32, height=16, rng=None)
                "shape" : (width, height) }
 
     return layout
+
+
+def generate_maze(trapped_food=10, total_food=30, width=32, height=16, rng=None):
+    check_maze_shape(width, height)
+
+    rng = default_rng(rng)
+
+    # generate a full maze, but only the left half is filled with random walls
+    # this allows us to cut the execution time in two, because the following
+    # graph operations are the most expensive part
+
+    # generate the left half of a maze with half of the border being gaps
+    walls, food = generate_half_maze(trapped_food, total_food, width, height, rng=rng)
+
+    return full_maze_layout(walls, food, width, height)
+
+
+#
+# MAZE METRICS
+#
+
+#: Metrics which only depend on the walls of a maze
+#:
+#: dead_end_ratio: fraction of free tiles with a single free neighbor
+#: chamber_ratio: fraction of the tiles available for food which are inside of chambers
+#: border_gaps: number of passages between the two homezones
+#: inner_walls: number of inner walls added by the binary space partitioning
+WALL_METRICS = ('dead_end_ratio', 'chamber_ratio', 'border_gaps', 'inner_walls')
+
+#: Metrics which depend on the distribution of the food
+#:
+#: chamber_food_share: fraction of a team’s food inside of chambers
+#: enemy_food_min_distance: distance from a team’s spawn points to the closest enemy food
+#: enemy_food_mean_distance: mean distance from the spawn points to the enemy food
+#: home_food_mean_distance: mean distance from the spawn points to the own food
+FOOD_METRICS = ('chamber_food_share', 'enemy_food_min_distance',
+                'enemy_food_mean_distance', 'home_food_mean_distance')
+
+
+def distance_grid(walls, shape, sources):
+    """ Return a numpy array of shape (height, width) with the maze distance
+    of each tile to the closest of the `sources`, or -1 if it cannot be reached.
+
+    The breadth-first search advances the whole frontier with array
+    operations, which is a lot faster than a search in Python for a
+    full maze.
+    """
+    import numpy as np
+
+    width, height = shape
+    free = np.ones((height, width), dtype=bool)
+    if walls:
+        wx, wy = np.array(list(walls)).T
+        free[wy, wx] = False
+
+    dist = np.full((height, width), -1, dtype=np.int32)
+    frontier = np.zeros((height, width), dtype=bool)
+    for x, y in sources:
+        frontier[y, x] = True
+    dist[frontier] = 0
+
+    step = 0
+    while frontier.any():
+        step += 1
+        reached = np.zeros_like(frontier)
+        reached[1:, :] |= frontier[:-1, :]
+        reached[:-1, :] |= frontier[1:, :]
+        reached[:, 1:] |= frontier[:, :-1]
+        reached[:, :-1] |= frontier[:, 1:]
+        frontier = reached & free & (dist < 0)
+        dist[frontier] = step
+    return dist
+
+
+def wall_metrics(half_maze):
+    """ Compute the `WALL_METRICS` from the result of `build_half_maze`.
+
+    As the maze is centrosymmetric, the metrics of the half maze are the
+    metrics of the full maze. (The border gaps are wired up in the graph,
+    so they have the same number of neighbors as in the full maze.)
+    """
+    graph = half_maze["graph"]
+    dead_ends = sum(1 for neighbors in graph.neighbors if len(neighbors) == 1)
+    free_tiles = half_maze["free_tiles"]
+    return {
+        "dead_end_ratio": dead_ends / len(graph.nodes),
+        "chamber_ratio": len(half_maze["chamber_tiles"]) / len(free_tiles) if free_tiles else 0.0,
+        "border_gaps": len(half_maze["border_gaps"]),
+        "inner_walls": half_maze["inner_walls"],
+    }
+
+
+def food_metrics(half_food, chamber_tiles, layout, distances):
+    """ Compute the `FOOD_METRICS` for the blue team (the red team’s
+    metrics are the same by symmetry).
+
+    `distances` is the `distance_grid` from the blue spawn points.
+    """
+    import numpy as np
+
+    width, _height = layout["shape"]
+    metrics = {
+        "chamber_food_share": len(half_food & chamber_tiles) / len(half_food) if half_food else 0.0,
+        "enemy_food_min_distance": None,
+        "enemy_food_mean_distance": None,
+        "home_food_mean_distance": None,
+    }
+    if not layout["food"]:
+        return metrics
+
+    fx, fy = np.array(layout["food"]).T
+    food_dist = distances[fy, fx]
+    home = fx < width // 2
+    if (~home).any():
+        metrics["enemy_food_min_distance"] = int(food_dist[~home].min())
+        metrics["enemy_food_mean_distance"] = float(food_dist[~home].mean())
+    if home.any():
+        metrics["home_food_mean_distance"] = float(food_dist[home].mean())
+    return metrics
+
+
+def _within(metrics, thresholds):
+    for name, (lower, upper) in thresholds.items():
+        if name not in metrics:
+            continue
+        value = metrics[name]
+        if value is None:
+            return False
+        if lower is not None and value < lower:
+            return False
+        if upper is not None and value > upper:
+            return False
+    return True
+
+
+def generate_maze_with_metrics(trapped_food=10, total_food=30, width=32, height=16, rng=None,
+                               thresholds=None, max_tries=100, food_tries=10):
+    """ Generate a maze like `generate_maze` and compute its metrics.
+
+    Without thresholds the same rng produces the same layout as
+    `generate_maze`.
+
+    If `thresholds` are given, mazes are generated until all metrics are
+    within the bounds. The wall metrics are checked first, before the
+    food is distributed; if only the food metrics fail, the food is
+    redistributed (up to `food_tries` times) on the same walls instead of
+    generating a new maze.
+
+    Parameters
+    ----------
+    thresholds : dict
+        maps a name from `WALL_METRICS` or `FOOD_METRICS` to a tuple
+        (lower, upper) of inclusive bounds; either bound can be None
+    max_tries : int
+        maximum number of mazes to generate
+
+    Returns
+    -------
+    tuple of (layout, metrics)
+
+    Raises
+    ------
+    ValueError
+        If no matching maze has been found in `max_tries` tries.
+    """
+    check_maze_shape(width, height)
+
+    if thresholds is None:
+        thresholds = {}
+    unknown = set(thresholds) - set(WALL_METRICS) - set(FOOD_METRICS)
+    if unknown:
+        raise ValueError(f"Unknown maze metrics: {sorted(unknown)}")
+
+    rng = default_rng(rng)
+
+    for _ in range(max_tries):
+        half_maze = build_half_maze(width, height, rng=rng)
+        metrics = wall_metrics(half_maze)
+        if not _within(metrics, thresholds):
+            continue
+
+        distances = None
+        for _ in range(food_tries):
+            food = distribute_food(half_maze["free_tiles"], half_maze["chamber_tiles"],
+                                   trapped_food, total_food, rng=rng)
+            layout = full_maze_layout(half_maze["walls"], food, width, height)
+
+            if distances is None:
+                # the distances only depend on the walls
+                distances = distance_grid(set(layout["walls"]), layout["shape"], layout["bots"][0::2])
+            metrics.update(food_metrics(food, half_maze["chamber_tiles"], layout, distances))
+            if _within(metrics, thresholds):
+                return layout, metrics
+
+    raise ValueError(f"No maze matching {thresholds} found in {max_tries} tries")
@@ -333,21 +333,74 @@ class RemotePlayerConnection:
     def __repr__(self):
         return "RemotePlayerConnection(%r)" % self.socket
 
+#: Keys of the viewer state that do not change during a game.
+#: In split-layout mode they are only published on the layout topic.
+LAYOUT_KEYS = ('walls', 'shape', 'layout_name')
+
+#: Topic for the static part of a game
+LAYOUT_TOPIC = b'layout'
+
+#: Topic for the per-turn game states
+STATE_TOPIC = b'state'
+
 class ZMQPublisher:
     """ Sets up a simple Publisher which sends all viewed events
     over a zmq connection.
 
+    By default, every state is sent to all subscribers and zmq silently
+    drops messages for subscribers which are too slow (see `hwm`). With
+    `conflate`, zmq keeps only the latest unsent state for every subscriber
+    instead: a slow subscriber skips the states that it could not keep up
+    with, but always gets the newest one (including the final state), while
+    the other subscribers are not affected. Sending never blocks.
+
+    With `split_layout`, the static part of the game (see LAYOUT_KEYS) is
+    sent once on the layout topic (and again, whenever a new subscriber
+    arrives), while the per-turn states on the state topic omit it.
+    Messages are then sent as two frames `[topic, json]`. As zmq can only
+    conflate single-frame messages (and the layout must not be replaced by
+    a state), `split_layout` cannot be combined with `conflate`.
+
     Parameters
     ----------
     address : string
         The address which the publisher binds or connects to.
     bind : bool
         Whether we are in bind or connect mode
+    hwm : int, optional
+        The send high-water mark (number of queued messages per subscriber)
+    conflate : bool
+        Keep only the latest state for every subscriber
+    split_layout : bool
+        Publish the layout and the per-turn states on separate topics
+
+    Raises
+    ------
+    ValueError
+        if both `conflate` and `split_layout` are given
     """
-    def __init__(self, address, bind=True, zmq_context=None):
+    def __init__(self, address, bind=True, zmq_context=None, hwm=None, conflate=False, split_layout=False):
+        if conflate and split_layout:
+            raise ValueError("A conflating publisher cannot split the layout.")
         self.address = address
         self.context = default_zmq_context(zmq_context)
-        self.socket = self.context.socket(zmq.PUB)
+        self.conflate = conflate
+        self.split_layout = split_layout
+
+        if split_layout:
+            # XPUB gives us the subscription messages
+            self.socket = self.context.socket(zmq.XPUB)
+            self.socket.setsockopt(zmq.XPUB_VERBOSE, 1)
+        else:
+            self.socket = self.context.socket(zmq.PUB)
+        if conflate:
+            # a queue of length one with the latest message for every subscriber
+            self.socket.setsockopt(zmq.CONFLATE, 1)
+        if hwm is not None:
+            self.socket.setsockopt(zmq.SNDHWM, hwm)
+
+        self._layout = None
+
         if bind:
             self.socket_addr = bind_socket(self.socket, self.address, '--publish')
             _logger.debug("Bound zmq.PUB to {}".format(self.socket_addr))
@@ -361,15 +414,66 @@ class ZMQPublisher:
         if data['gameover']:
             info['gameover'] = True
         _logger.debug(f"--#> [{action}] %r", info)
+
+        if self.socket.type == zmq.XPUB:
+            self._handle_subscriptions()
+
+        if self.split_layout:
+            layout = {key: data[key] for key in LAYOUT_KEYS if key in data}
+            if layout != self._layout:
+                self._layout = layout
+                self._publish(LAYOUT_TOPIC, "layout", layout)
+            data = {key: value for key, value in data.items() if key not in LAYOUT_KEYS}
+            self._publish(STATE_TOPIC, action, data)
+        else:
+            self._publish(None, action, data)
+
+    def _publish(self, topic, action, data):
         message = {"__action__": action, "__data__": data}
         as_json = json.dumps(message, cls=SetEncoder)
-        self.socket.send_unicode(as_json)
+        if topic is None:
+            self.socket.send(as_json.encode('utf-8'))
+        else:
+            self.socket.send_multipart([topic, as_json.encode('utf-8')])
+
+    def _handle_subscriptions(self):
+        """ Re-sends the layout when a new subscriber arrives. """
+        while self.socket.poll(0, zmq.POLLIN):
+            msg = self.socket.recv()
+            if self._layout is None:
+                continue
+            if msg[:1] == b'\x01' and LAYOUT_TOPIC.startswith(msg[1:]):
+                _logger.debug("New subscription %r. Re-sending layout.", msg[1:])
+                self._publish(LAYOUT_TOPIC, "layout", self._layout)
 
     def show_state(self, game_state):
         self._send(action="observe", data=game_state)
 
 
 class Controller:
+    """ Receives actions from a controlling viewer.
+
+    Besides single steps (`play_step`), a viewer may request a batch of
+    steps with the `play_until` action. Its data may contain any of
+
+        steps : int
+            stop after this many turns
+        round : int
+            stop before the first turn of this round
+        kill : bool
+            stop after a bot has been killed
+
+    and the game master plays until the first of these conditions is met
+    (or until the end of the game, if none is given) without waiting for
+    further requests. A `pause` action cancels the running batch; a
+    `play_step` or `play_until` during a batch cancels it and is
+    handled as usual.
+
+    Attributes
+    ----------
+    batch : dict or None
+        The currently running batch (as handled by `pelita.game.controller_await`)
+    """
     def __init__(self, address='tcp://127.0.0.1', zmq_context=None):
         self.address = address
         self.context = default_zmq_context(zmq_context)
@@ -383,18 +487,34 @@ class Controller:
         self.pollin.register(self.socket, zmq.POLLIN)
         _logger.debug("Bound zmq.ROUTER to {}".format(self.socket_addr))
 
+        self.batch = None
+        self.action_data = None
+
     def await_action(self, await_action, timeout=None, accept_exit=True):
-        """ Waits `timeout` seconds to receive an action. """
+        """ Waits `timeout` seconds to receive an action.
+
+        `await_action` may also be a list of acceptable actions. Returns the
+        action (or None, if the timeout has passed) and stores the data that
+        was sent with it in `action_data`.
+        """
         t_start = time.monotonic()
         if timeout is None:
             t_end = float("inf")
         else:
             t_end = t_start + timeout
 
-        while time.monotonic() < t_end:
+        if isinstance(await_action, str):
+            expected_actions = [await_action]
+        else:
+            expected_actions = list(await_action)
+        if accept_exit:
+            expected_actions.append('exit')
 
-            # TODO: Proper time left handling
-            timeoutmillis = timeout * 1000 if timeout is not None else None
+        while True:
+            if timeout is None:
+                timeoutmillis = None
+            else:
+                timeoutmillis = max(t_end - time.monotonic(), 0) * 1000
 
             sock = dict(self.pollin.poll(timeoutmillis)) # poll needs milliseconds
             if sock.get(self.socket) == zmq.POLLIN:
@@ -410,9 +530,10 @@ class Controller:
                     _logger.warning('No action in message from %r', sender)
                     continue
 
-                expected_actions = [await_action]
-                if accept_exit:
-                    expected_actions.append('exit')
                 if action in expected_actions:
+                    self.action_data = msg.get('__data__')
                     return action
                 _logger.warning('Unexpected action %r. (Expected: %s) Ignoring.', action, ", ".join(expected_actions))
+
+            if time.monotonic() >= t_end:
+                return None
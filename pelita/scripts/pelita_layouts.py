@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+import time
+
+from ..layout_store import LayoutStore, generate_layouts, write_store
+
+
+def seed_range(s):
+    """Parse a seed specification and return a range.
+
+    100 -> range(100, 101)
+    0:1000 -> range(0, 1000)
+    """
+    try:
+        if ':' in s:
+            start, stop = [int(item) for item in s.split(':')]
+        else:
+            start = int(s)
+            stop = start + 1
+    except ValueError:
+        msg = "%s is not a valid seed specification" %s
+        raise argparse.ArgumentTypeError(msg) from None
+    return range(start, stop)
+
+def parse_food_string(s):
+    try:
+        trapped, total = [int(item) for item in s.split(':')]
+    except ValueError:
+        msg = "%s is not a valid food specification" %s
+        raise argparse.ArgumentTypeError(msg) from None
+    return trapped, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate seeded maze layouts in bulk and write them to a layout store.',
+                                     epilog='The layout store can be used with `pelita --layout-store FILE` '
+                                            'and with the `layout_store` setting of pelita-tournament.')
+    parser.add_argument('storefile', metavar='STOREFILE', help='The layout store to write.')
+    parser.add_argument('--seeds', type=seed_range, metavar='A:B', action='append', required=True,
+                        help='Generate layouts for all seeds in [A, B). Can be given multiple times.')
+    parser.add_argument('--size', metavar='STRING', action='append',
+                        help="Maze size: 'small', 'normal', 'big', 'WxH' etc. Can be given multiple times. "
+                        "Default: 'normal'")
+    parser.add_argument('--food', type=parse_food_string, metavar='T:F', action='append',
+                        help='Food specification (see `pelita --help`). Can be given multiple times. '
+                        'If not set use maze size specific defaults.')
+    parser.add_argument('--processes', '-j', type=int, metavar='N', default=None,
+                        help='Number of worker processes (default: number of CPUs).')
+    args = parser.parse_args()
+
+    seeds = sorted({seed for seeds in args.seeds for seed in seeds})
+    sizes = args.size or ['normal']
+    foods = args.food or [None]
+
+    start = time.monotonic()
+    try:
+        records = generate_layouts(seeds, sizes=sizes, foods=foods, processes=args.processes)
+    except ValueError as e:
+        parser.error(str(e))
+    write_store(args.storefile, records)
+
+    store = LayoutStore(args.storefile)
+    print(f"Wrote {len(store)} layouts to {args.storefile} in {time.monotonic() - start:.1f} s.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -240,6 +240,9 @@ layout_opt.add_argument('--layout', metavar='FILENAME', help='Use layout from FI
 layout_opt.add_argument('--size', type=w_h_string, metavar="STRING", default='normal',
                         help="Pick a random maze layout of specified size."
                         " Possible sizes: 'small' (24x12), 'normal' (32x16), 'big' (48x24), 'WxH' where W and H are integers. Default: 'normal'")
+game_settings.add_argument('--layout-store', metavar='STOREFILE', default=None,
+                           help=long_help('Load the random maze layout from a layout store written by pelita-layouts '
+                                          'instead of generating it (if the store contains it).'))
 
 timeout_opt = game_settings.add_mutually_exclusive_group()
 timeout_opt.add_argument('--timeout', type=float, metavar="SEC",
@@ -263,6 +266,9 @@ viewer_settings.add_argument('--debug', const=True, action='store_const',
                     help='Start viewer in debug mode')
 viewer_settings.add_argument('--fps', type=float, default=40,
                     help='Set (approximate) number of frames per second in a graphical viewer.')
+viewer_settings.add_argument('--render-fps', type=float, metavar='FPS', default=None,
+                    help=long_help('Decouple rendering from the game speed: draw at most FPS frames per second '
+                                   'and skip intermediate frames (they remain available in the history).'))
 
 viewer_opt = viewer_settings.add_mutually_exclusive_group()
 viewer_opt.add_argument('--null', action='store_const', const='null',
@@ -280,6 +286,13 @@ advanced_settings.add_argument('--reply-to', type=str, metavar='URL', dest='repl
                                help=long_help('Communicate the result of the game on this channel.'))
 advanced_settings.add_argument('--publish', type=str, metavar='URL', dest='publish_to',
                                help=long_help('Publish the game to this zmq socket.'))
+advanced_settings.add_argument('--publish-hwm', type=int, metavar='N', default=None,
+                               help=long_help('High-water mark (queued messages per subscriber) for --publish.'))
+advanced_settings.add_argument('--publish-conflate', action='store_true',
+                               help=long_help('Only keep the latest state for slow subscribers of --publish. '
+                                              'Cannot be combined with --publish-split-layout.'))
+advanced_settings.add_argument('--publish-split-layout', action='store_true',
+                               help=long_help('Publish the layout and the per-turn states on separate topics.'))
 advanced_settings.add_argument('--controller', type=str, metavar='URL', default="tcp://127.0.0.1",
                                help=long_help('Channel for controlling the game.'))
 
@@ -326,6 +339,9 @@ def main():
     if args.rounds < 1:
         parser.error(f"Must play at least one round (rounds={args.rounds}).")
 
+    if args.publish_conflate and args.publish_split_layout:
+        parser.error("--publish-conflate cannot be combined with --publish-split-layout.")
+
     if args.viewer == 'null':
         viewers = []
     elif args.viewer == 'tk':
@@ -345,7 +361,8 @@ def main():
             "delay": delay,
             "debug": debug,
             "stop_at": stop_at,
-            "stop_after_kill": stop_after_kill
+            "stop_after_kill": stop_after_kill,
+            "render_fps": args.render_fps,
         }
         viewers = [('tk', viewer_options)]
     else:
@@ -354,7 +371,13 @@ def main():
     if args.reply_to:
         viewers.append(('reply-to', args.reply_to))
     if args.publish_to:
-        viewers.append(('publish-to', args.publish_to))
+        publish_opts = {
+            "address": args.publish_to,
+            "hwm": args.publish_hwm,
+            "conflate": args.publish_conflate,
+            "split_layout": args.publish_split_layout,
+        }
+        viewers.append(('publish-to', publish_opts))
     if args.write_replay:
         viewers.append(('write-replay-to', args.write_replay))
 
@@ -374,7 +397,9 @@ def main():
             state['food'] = list(map(tuple, state['food']))
             for viewer in viewer_state['viewers']:
                 viewer.show_state(state)
-            if pelita.game.controller_await(viewer_state):
+            # batch commands of the controller are checked against the replayed state
+            state['controller'] = viewer_state['controller']
+            if pelita.game.controller_await(state):
                 break
 
         sys.exit(0)
@@ -433,10 +458,15 @@ def main():
         else:
             parser.error('--food option must be specified if a custom maze size is set')
 
-        layout_dict = pelita.maze_generator.generate_maze(trapped_food=trapped_food,
-                                                          total_food=total_food,
-                                                          width=width,
-                                                          height=height, rng=rng)
+        if args.layout_store:
+            from pelita.layout_store import load_or_generate_layout
+            layout_dict = load_or_generate_layout(seed, (width, height), food=(trapped_food, total_food),
+                                                  rng=rng, store=args.layout_store)
+        else:
+            layout_dict = pelita.maze_generator.generate_maze(trapped_food=trapped_food,
+                                                              total_food=total_food,
+                                                              width=width,
+                                                              height=height, rng=rng)
 
     if args.layoutfile:
         # We only want to print this, when no seed has been given.
@@ -5,7 +5,9 @@ import hashlib
 import importlib
 import json
 import logging
+import os
 import sys
+import time
 from pathlib import Path
 
 import click
@@ -102,9 +104,26 @@ def player_handle_request(socket, poller, team, team_name_override=False, silent
     # answer from the player.
 
     try:
-        socks = dict(poller.poll(timeout=TIMEOUT_SECS * 1000))
+        waiting_until = time.monotonic() + TIMEOUT_SECS
+        # Use the time until the next request for pondering.
+        # Every step is followed by a check for a new request.
+        # A request that is found after a step may have arrived
+        # when the step started and has been waiting since then.
+        arrived = None
+        while time.monotonic() < waiting_until:
+            step_started = time.monotonic()
+            more = team.ponder_step()
+            if poller.poll(timeout=0):
+                arrived = step_started
+                break
+            if not more:
+                break
+        time_left = max(waiting_until - time.monotonic(), 0)
+
+        socks = dict(poller.poll(timeout=time_left * 1000))
         if socks.get(socket) == zmq.POLLIN:
             json_message = socket.recv_unicode()
+            received = time.monotonic() if arrived is None else arrived
         else:
             # TODO: Would be nice to tell Pelita main that we’re exiting
             _logger.warning(f"No request in {TIMEOUT_SECS} seconds. Exiting player.")
@@ -126,12 +145,16 @@ def player_handle_request(socket, poller, team, team_name_override=False, silent
         if action == "set_initial":
             retval = team.set_initial(**data)
         elif action == "get_move":
-            retval = team.get_move(**data)
+            retval = team.get_move(**data, received=received)
             if silent_bots:
                 try:
                     del retval['say']
                 except KeyError:
                     pass
+            if 'error' not in retval:
+                # time spent in the player, so that the game can
+                # estimate the transport delay
+                retval['duration'] = time.monotonic() - received
 
         elif action == "team_name":
             if isinstance(team_name_override, str):
@@ -307,24 +330,35 @@ def team_from_module(module):
     """ Looks for a move function and a team name in
     `module` and returns a team.
 
+    The module may select the implementation of `bot.graph`
+    with the variable `GRAPH` ('networkx' or 'grid').
+
+    The module may define a function `ponder(bot, state)`, which
+    runs while the team waits for its next turn (see `Team.ponder_step`).
+
     Raises
     ------
     TypeError
-        move not a function or TEAM_NAME not a string
+        move or ponder not a function or TEAM_NAME not a string
     AttributeError
         no move or no TEAM_NAME attribute
+    ValueError
+        unknown GRAPH
 
     """
     # look for a new-style team
     move = module.move
     name = sanitize_team_name(module.TEAM_NAME)
+    ponder = getattr(module, 'ponder', None)
 
     if not callable(move):
         raise TypeError("move is not a function")
     if not isinstance(name, str):
         raise TypeError("TEAM_NAME is not a string")
+    if ponder is not None and not callable(ponder):
+        raise TypeError("ponder is not a function")
 
-    team = Team(move, team_name=name)
+    team = Team(move, team_name=name, graph=getattr(module, 'GRAPH', 'networkx'), ponder=ponder)
     return team
 
 
@@ -357,14 +391,23 @@ def cli_check_team(team):
     return check_team(team)
 
 @main.command("hash-team", help="Load team and print its hash.")
+@click.option('--json', 'as_json',
+              is_flag=True,
+              default=False,
+              help='Print the hash, the hashed files and their fingerprint as json')
 @click.argument('team')
-def cli_hash_team(team):
-    print(hash_team(team))
+def cli_hash_team(team, as_json):
+    if as_json:
+        print(json.dumps(hash_team_files(team)))
+    else:
+        print(hash_team(team))
 
 def check_team(team):
     print(load_team(team).team_name)
 
-def hash_team(team):
+def team_files(team):
+    """ Load the team and return the sorted list of (module name, path) of
+    all modules that have been imported from the folder of the team. """
     # Load the team so that we have the modules ready
     load_team(team)
 
@@ -375,17 +418,65 @@ def hash_team(team):
             path = Path(module.__file__)
             if path.is_relative_to(folder):
                 modules.append([name, path])
+    return sorted(modules)
 
-    _logger.debug(f"Hashing module {team}")
+def files_fingerprint(paths):
+    """ Return a cheap fingerprint of the files in `paths` from their size,
+    modification time and inode, without reading them.
+
+    Returns None if one of the files does not exist.
+    """
+    sha1 = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        sha1.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\0{stat.st_ino}\n".encode())
+    return sha1.hexdigest()
+
+def hash_files(paths):
+    """ Return the SHA1 of the concatenated contents of the files in `paths`.
+
+    The files are read in parallel. All files are read every time: the hash
+    of a team runs over the contents of all of its files, so per-file digests
+    cannot be combined into it. Callers that want to skip unchanged teams
+    compare the `files_fingerprint` of the hashed files instead.
+    """
+    from concurrent.futures import ThreadPoolExecutor
 
-    # sort relative paths by module name and generate our sha
     sha1 = hashlib.sha1()
-    for module, path in sorted(modules):
+    with ThreadPoolExecutor(max_workers=min(8, len(paths) or 1)) as executor:
+        for content in executor.map(lambda path: Path(path).read_bytes(), paths):
+            sha1.update(content)
+    return sha1.hexdigest()
+
+def hash_team_files(team):
+    """ Hash the modules of a team.
+
+    Returns
+    -------
+    dict with keys 'hash' (see `hash_team`), 'files' (the hashed files) and
+    'fingerprint' (their `files_fingerprint` before they were read). As long
+    as the fingerprint of the files is unchanged, the hash is still valid.
+    """
+    _logger.debug(f"Hashing module {team}")
+    modules = team_files(team)
+    for module, path in modules:
         _logger.debug(f"Hashing {team}: Adding {module}")
-        sha1.update(path.read_bytes())
-    res = sha1.hexdigest()
+    paths = [str(path) for _module, path in modules]
+
+    # take the fingerprint first so that a file which changes
+    # while we are reading it makes the fingerprint invalid
+    fingerprint = files_fingerprint(paths)
+    res = hash_files(paths)
     _logger.debug(f"SHA1 for {team}: {res}.")
-    return res
+    return {'hash': res, 'files': paths, 'fingerprint': fingerprint}
+
+def hash_team(team):
+    """ Return the SHA1 of the contents of all modules of the team,
+    sorted by module name. """
+    return hash_team_files(team)['hash']
 
 
 if __name__ == '__main__':
@@ -40,6 +40,10 @@ parser.add_argument('--debug', const=True, action='store_const',
                      help='debug mode')
 parser.add_argument('--delay', type=int,
                     help='delay')
+parser.add_argument('--render-fps', type=float, metavar="FPS",
+                    help='Render at most FPS frames per second and let the game run at its own pace.')
+parser.add_argument('--history-limit', type=int, metavar="MB",
+                    help='Memory limit for older frames in the playback history.')
 parser.add_argument('--stop-after', type=int, metavar="N",
                     help='Stop after N rounds.')
 parser.add_argument('--stop-after-kill', action='store_true',
@@ -66,6 +70,8 @@ def main():
         'geometry': args.geometry,
         'fullscreen' : args.fullscreen,
         'delay': args.delay,
+        'render_fps': args.render_fps,
+        'history_max_bytes': args.history_limit * 1024 * 1024 if args.history_limit is not None else None,
         'debug': args.debug,
         'standalone_mode': args.standalone_mode,
         'stop_after': args.stop_after,
@@ -196,12 +196,20 @@ def main():
     parser.add_argument('--non-interactive', dest='interactive', action='store_false', help='do not ask before proceeding')
     parser.set_defaults(interactive=None)
 
+    parser.add_argument('--parallel', '-j', type=int, metavar='N',
+                        help='play N matches of the first round at the same time (without viewer)')
+    parser.add_argument('--round1-mode', choices=['roundrobin', 'swiss', 'adaptive'],
+                        help='how the teams are paired in the first round: everybody vs everybody (default), '
+                             'Swiss system or adaptive pairing until the best teams are known')
+
     parser.add_argument('--setup', action='store_true')
 
     parser.add_argument('--state', help='store state',
-                        metavar="STATEFILE", default='state.yaml')
+                        metavar="STATEFILE", default='state.jsonl')
     parser.add_argument('--load-state', help='load state from file',
                         action='store_true')
+    parser.add_argument('--export-state', help='write the state from the state file as YAML and exit',
+                        metavar="YAMLFILE")
     parser.add_argument('--no-log', help='do not store the log data',
                         action='store_true')
     parser.add_argument('--dry-run', help='do not actually play',
@@ -215,6 +223,9 @@ def main():
         setup()
         sys.exit(0)
 
+    if args.parallel is not None and args.parallel < 1:
+        parser.error("--parallel must be at least 1.")
+
     try:
         with open(args.config) as f:
             config_data = yaml.load(f, Loader=yaml.FullLoader)
@@ -223,12 +234,19 @@ def main():
             config_data['statefile'] = args.state
             config_data['speak'] = firstNN(args.speak, config_data.get('speak'))
             config_data['speaker'] = args.speaker or config_data.get('speaker')
+            config_data['parallel'] = args.parallel or config_data.get('parallel')
+            config_data['round1_mode'] = args.round1_mode or config_data.get('round1_mode')
 
             config = tournament.Config(config_data)
     except FileNotFoundError:
         print("‘{}’ not found. Create a new tournament with ‘--setup’.".format(args.config))
         sys.exit(1)
 
+    if args.export_state:
+        state = tournament.State.load(config, args.state)
+        state.export_yaml(args.export_state)
+        sys.exit(0)
+
     if not args.no_log:
         # create a directory for the dumps
         def escape(s):
@@ -265,8 +283,7 @@ def main():
         tournament.present_teams(config)
 
     rr_ranking = tournament.play_round1(config, state, rng)
-    state.round2["round_robin_ranking"] = rr_ranking
-    state.save(args.state)
+    state.record_ranking(rr_ranking)
 
     winner = tournament.play_round2(config, rr_ranking, state, rng)
 
@@ -1,18 +1,20 @@
 
+import collections.abc
 import logging
+import math
 import os
 import shlex
 import subprocess
 import sys
 import time
 import traceback
+from array import array
 from io import StringIO
 from pathlib import Path
 from random import Random
 import typing
 from urllib.parse import urlparse
 
-import networkx as nx
 import zmq
 
 from . import layout
@@ -66,6 +68,9 @@ def walls_to_graph(walls, shape=None):
     adjacent squares. Adjacent means that you can go from one square to one of
     its adjacent squares by making one single step (up, down, left, or right).
     """
+    # networkx is slow to import; only load it when a graph is needed
+    import networkx as nx
+
     graph = nx.Graph()
     if shape is not None:
         width, height = shape
@@ -91,6 +96,238 @@ def walls_to_graph(walls, shape=None):
     return graph
 
 
+#: The graph implementations that a team can choose for `bot.graph`
+GRAPH_KINDS = ('networkx', 'grid')
+
+#: Seconds that `bot.deadline` lies before the end of the timeout, to leave
+#: time for returning the move
+DEADLINE_MARGIN = 0.05
+
+#: How fast the estimated transport delay of a `RemoteTeam` decays per request
+TRANSPORT_DELAY_DECAY = 0.8
+
+
+class LazyGraph:
+    """ Builds the graph of a maze on first access and caches it.
+
+    Parameters
+    ----------
+    walls : [(x0,y0), (x1,y1), ...]
+        a list of wall coordinates
+    shape : (int, int)
+        the shape of the maze
+    graph : networkx.Graph, optional
+        an already built graph
+    kind : str
+        'networkx' for a networkx graph (see `walls_to_graph`) or
+        'grid' for a `pelita.grid_graph.GridGraph`
+    """
+    def __init__(self, walls, shape=None, graph=None, kind='networkx'):
+        if kind not in GRAPH_KINDS:
+            raise ValueError(f"Unknown graph kind {kind!r} (must be one of {GRAPH_KINDS}).")
+        self._walls = walls
+        self._shape = shape
+        self._graph = graph
+        self.kind = kind
+
+    def get(self):
+        """ Return a read-only view of the graph. """
+        if self._graph is None:
+            if self.kind == 'grid':
+                # GridGraph is read-only already
+                from .grid_graph import GridGraph
+                self._graph = GridGraph(self._walls, shape=self._shape)
+            else:
+                # store a read-only view of the graph, so that local
+                # modifications in the move function are not carried over
+                self._graph = walls_to_graph(self._walls, shape=self._shape).copy(as_view=True)
+        return self._graph
+
+
+class FoodView(collections.abc.Sequence):
+    """ An immutable, ordered view of food positions with fast membership tests.
+
+    It can be used like a list of positions (indexing, iteration, `len`, `+`)
+    but `pos in food` is a set lookup. Slicing, `+` and `copy` return a new
+    list, so that `bot.food[:]` can be modified as before. Set operations
+    (`&`, `|`, `-`, `^`) return sets.
+
+    The views are shared by the bots of a turn.
+    """
+    __slots__ = ('_items', '_set')
+
+    def __init__(self, positions=()):
+        self._items = tuple(tuple(pos) for pos in positions)
+        self._set = frozenset(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._items[index])
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __reversed__(self):
+        return reversed(self._items)
+
+    def __contains__(self, pos):
+        try:
+            return pos in self._set
+        except TypeError:
+            # unhashable, e.g. a list
+            return tuple(pos) in self._set
+
+    def __add__(self, other):
+        return list(self._items) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self._items)
+
+    def __eq__(self, other):
+        if isinstance(other, FoodView):
+            return self._items == other._items
+        if isinstance(other, (list, tuple)):
+            return list(self._items) == list(other)
+        if isinstance(other, collections.abc.Set):
+            return self._set == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __and__(self, other):
+        return set(self._set & set(other))
+
+    def __or__(self, other):
+        return set(self._set | set(other))
+
+    def __sub__(self, other):
+        return set(self._set - set(other))
+
+    def __xor__(self, other):
+        return set(self._set ^ set(other))
+
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+    def __rsub__(self, other):
+        return set(other) - self._set
+
+    def isdisjoint(self, other):
+        return self._set.isdisjoint(other)
+
+    def copy(self):
+        """ Return the positions as a new list. """
+        return list(self._items)
+
+    def __repr__(self):
+        return repr(list(self._items))
+
+
+class BotTrack:
+    """ The history of the positions of a bot.
+
+    Positions are packed into a single append-only array of ints. When the
+    bot is killed, the track is not cleared but a new segment is started at
+    the current end of the array. `view` returns a read-only `TrackView` of
+    the current segment, which is cheap to create, as it does not copy the
+    positions.
+    """
+    __slots__ = ('_positions', '_start')
+
+    def __init__(self):
+        self._positions = array('L')
+        self._start = 0
+
+    def __len__(self):
+        return len(self._positions) - self._start
+
+    def append(self, position):
+        x, y = position
+        self._positions.append(x << 16 | y)
+
+    def reset(self):
+        """ Start a new segment. """
+        self._start = len(self._positions)
+
+    def view(self):
+        """ Return a read-only view of the positions in the current segment. """
+        return TrackView(self._positions, self._start, len(self._positions))
+
+
+class TrackView(collections.abc.Sequence):
+    """ A read-only list of positions in a `BotTrack`.
+
+    The view is fixed to the positions that were in the track when it was
+    created. Slicing, `+` and `copy` return a new list.
+    """
+    __slots__ = ('_positions', '_start', '_stop')
+
+    def __init__(self, positions, start, stop):
+        self._positions = positions
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._unpack(packed) for packed in
+                    self._positions[self._start:self._stop][index]]
+        length = self._stop - self._start
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("track index out of range")
+        return self._unpack(self._positions[self._start + index])
+
+    def __iter__(self):
+        for idx in range(self._start, self._stop):
+            yield self._unpack(self._positions[idx])
+
+    def __contains__(self, position):
+        try:
+            x, y = position
+            packed = x << 16 | y
+        except (TypeError, ValueError):
+            return False
+        # search in C without copying the segment
+        try:
+            self._positions.index(packed, self._start, self._stop)
+        except ValueError:
+            return False
+        return True
+
+    @staticmethod
+    def _unpack(packed):
+        return (packed >> 16, packed & 0xFFFF)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, (TrackView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def copy(self):
+        """ Return the positions as a new list. """
+        return list(self)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 def sanitize_say(string):
     """Make input string sane (for a certain definition of sane)"""
     sane = []
@@ -173,18 +410,35 @@ class Team:
         the team’s move function
     team_name :
         the name of the team (optional)
+    graph : str
+        the implementation of `bot.graph`: 'networkx' (default) or 'grid'
+        for the lighter `pelita.grid_graph.GridGraph`
+    ponder : function with (bot, state)
+        the team’s ponder function (optional). It is called with the bot
+        of the last move and the team state while the team waits for its
+        next turn (see `ponder_step`). If it is a generator function, it is
+        interrupted at the next `yield` as soon as a new request arrives.
 
     Raises
     ------
-    TypeError : Move is not a function or team_name is not a string
+    TypeError : Move or ponder is not a function or team_name is not a string
+    ValueError : Unknown graph
     """
-    def __init__(self, team_move: typing.Callable[[typing.Any, typing.Any], typing.Tuple[int, int]], *, team_name=""):
+    def __init__(self, team_move: typing.Callable[[typing.Any, typing.Any], typing.Tuple[int, int]], *, team_name="",
+                 graph='networkx', ponder=None):
         if not callable(team_move):
             raise TypeError("move is not a function")
 
+        if ponder is not None and not callable(ponder):
+            raise TypeError("ponder is not a function")
+
         if not isinstance(team_name, str):
             raise TypeError("TEAM_NAME is not a string")
 
+        if graph not in GRAPH_KINDS:
+            raise ValueError(f"Unknown graph {graph!r} (must be one of {GRAPH_KINDS}).")
+        self._graph_kind = graph
+
         self._team_move = team_move
         self.team_name = team_name
 
@@ -195,7 +449,12 @@ class Team:
         self._rng = None
 
         #: The history of bot positions
-        self._bot_track = [[], []]
+        self._bot_track = [BotTrack(), BotTrack()]
+
+        #: The ponder function, the bot to ponder with and the running ponder generator
+        self._ponder = ponder
+        self._ponder_bot = None
+        self._pondering = None
 
 
     def set_initial(self, team_id, game_state):
@@ -209,7 +468,8 @@ class Team:
         game_state : dict
             The initial game state
         """
-        # Reset the team state
+        # Stop pondering about the last game and reset the team state
+        self.stop_pondering()
         self._state.clear()
 
         # Initialize the random number generator
@@ -217,10 +477,12 @@ class Team:
         self._rng = Random(game_state['seed'])
 
         # Reset the bot tracks
-        self._bot_track = [[], []]
+        self._bot_track = [BotTrack(), BotTrack()]
 
         # Store the walls, which are only transmitted once
         self._walls = _ensure_tuple_tuples(game_state['walls'])
+        # and a set of the walls for fast lookups
+        self._walls_set = frozenset(self._walls)
 
         # Store the shape, which is only transmitted once
         self._shape = tuple(game_state['shape'])
@@ -231,13 +493,12 @@ class Team:
         # Cache the homezone so that we don’t have to create it at each step
         self._homezone = create_homezones(self._shape, self._walls)
 
-        # Cache the graph representation of the maze -> stores a read-only view of the
-        # graph, so that local modifications in the move function are not carried
-        # over
-        self._graph = walls_to_graph(self._walls, shape=self._shape).copy(as_view=True)
+        # Cache the graph representation of the maze. It is only built
+        # when a bot accesses bot.graph for the first time
+        self._graph = LazyGraph(self._walls, shape=self._shape, kind=self._graph_kind)
 
     # TODO: get_move could also take the main game state???
-    def get_move(self, game_state):
+    def get_move(self, game_state, received=None):
         """ Requests a move from the Player who controls the Bot with id `bot_id`.
 
         This method returns a dict with a key `move` and a value specifying the direction
@@ -247,12 +508,30 @@ class Team:
         ----------
         game_state : dict
             The initial game state
+        received : float or None
+            The `time.monotonic()` when the request arrived, if it had to
+            wait (e.g. for a ponder step). The deadline is counted from
+            there. Default: now.
 
         Returns
         -------
         move : dict
         """
+        if received is None:
+            received = time.monotonic()
+        self.stop_pondering()
+
+        timeout_length = game_state.get('timeout_length')
+        if timeout_length is None:
+            deadline = None
+        else:
+            # the time that the request spent on its way to us (and that
+            # the reply will spend on its way back) is not available to the bot
+            transport_delay = game_state.get('transport_delay', 0)
+            deadline = received + timeout_length - transport_delay - DEADLINE_MARGIN
+
         me = make_bots(walls=self._walls,
+                       walls_set=self._walls_set,
                        shape=self._shape,
                        initial_positions=self._initial_positions,
                        homezone=self._homezone,
@@ -261,18 +540,19 @@ class Team:
                        round=game_state['round'],
                        bot_turn=game_state['bot_turn'],
                        rng=self._rng,
-                       graph=self._graph)
+                       graph=self._graph,
+                       deadline=deadline)
 
         team = me._team
 
         for idx, mybot in enumerate(team):
             # If a bot has been killed, we reset its bot track
             if mybot.was_killed:
-                self._bot_track[idx] = []
+                self._bot_track[idx].reset()
 
         # Add our track
         if len(self._bot_track[me._bot_turn]) == 0:
-            self._bot_track[me._bot_turn] = [me.position]
+            self._bot_track[me._bot_turn].append(me.position)
 
         for idx, mybot in enumerate(team):
             # If the track of any bot is empty,
@@ -280,14 +560,68 @@ class Team:
             if me._bot_turn != idx:
                 self._bot_track[idx].append(mybot.position)
 
-            mybot.track = self._bot_track[idx][:]
+            # a read-only view on the shared track; this does not copy
+            mybot.track = self._bot_track[idx].view()
 
         move = self.apply_move_fn(self._team_move, team[me._bot_turn], self._state)
         if "error" not in move:
             move["say"] = me._say
             move["overlay"] = convert_overlay_to_json(me._overlay)
+            if self._ponder is not None:
+                self._ponder_bot = me
         return move
 
+    def ponder_step(self):
+        """ Runs the team’s ponder function for a single step.
+
+        After a successful move, the first step calls the ponder function
+        with the bot of that move and the team state. If the ponder function
+        returns an iterator (e.g. because it is a generator function), every
+        following step advances it to its next `yield`. Exceptions are
+        printed and end the pondering until the next move.
+
+        Returns
+        -------
+        more : bool
+            True if there is more pondering to do
+        """
+        if self._pondering is None:
+            if self._ponder_bot is None:
+                return False
+            bot, self._ponder_bot = self._ponder_bot, None
+            try:
+                pondering = self._ponder(bot, self._state)
+            except Exception:
+                traceback.print_exc()
+                return False
+            if not isinstance(pondering, collections.abc.Iterator):
+                # a plain function has done all its work
+                return False
+            self._pondering = pondering
+
+        try:
+            next(self._pondering)
+        except StopIteration:
+            self._pondering = None
+            return False
+        except Exception:
+            traceback.print_exc()
+            self._pondering = None
+            return False
+        return True
+
+    def stop_pondering(self):
+        """ Stops the running ponder function (if any) at its current `yield`. """
+        self._ponder_bot = None
+        if self._pondering is not None:
+            pondering, self._pondering = self._pondering, None
+            close = getattr(pondering, 'close', None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    traceback.print_exc()
+
     @staticmethod
     def apply_move_fn(move_fn, bot: "Bot", state):
         try:
@@ -388,6 +722,9 @@ class RemoteTeam:
         self.remote_is_running = True
         self.time_sent_exit = 0
 
+        #: Estimate of the time a get_move request and its reply spend in transit
+        self.transport_delay = 0.0
+
     @property
     def team_name(self):
         return self._team_name
@@ -412,14 +749,24 @@ class RemoteTeam:
     def get_move(self, game_state):
         timeout_length = game_state['timeout_length']
 
-        msg_id = self.conn.send_req("get_move", {"game_state": game_state})
+        sent = time.monotonic()
+        msg_id = self.conn.send_req("get_move", {"game_state": dict(game_state, transport_delay=self.transport_delay)})
         reply = self.conn.recv_reply(msg_id, timeout_length)
+        round_trip = time.monotonic() - sent
 
         if "error" in reply:
             # The remote client produced an error and exited
             self.remote_is_running = False
             self.time_sent_exit = time.monotonic()
             return reply
+
+        # the player reports how long it took to answer; the rest of the
+        # round trip was spent in transit. A slow request is taken over
+        # immediately, otherwise the estimate decays slowly
+        duration = reply.pop("duration", None) if isinstance(reply, dict) else None
+        if isinstance(duration, (int, float)):
+            self.transport_delay = max(round_trip - duration, TRANSPORT_DELAY_DECAY * self.transport_delay, 0.0)
+
         # make sure that the move is a tuple
         try:
             reply["move"] = tuple(reply.get("move"))
@@ -655,6 +1002,13 @@ def make_team(team_spec, team_name=None, zmq_context=None, idx=None, store_outpu
 
 
 class Bot:
+    __slots__ = ('_view', '_bots', '_say', '_overlay', 'track', '_is_on_team',
+                 'random', 'position', '_initial_position', 'walls', 'homezone',
+                 '_food', '_shaded_food', 'shape', 'score', 'kills', 'deaths',
+                 'was_killed', '_bot_index', 'round', 'char', 'is_blue', 'team_name',
+                 'team_time', 'is_noisy', 'has_exact_position', '_graph',
+                 '_legal_positions', '_bot_turn', 'deadline')
+
     def __init__(self, *, bot_index,
                           is_on_team,
                           position,
@@ -676,8 +1030,12 @@ class Bot:
                           team_name,
                           team_time,
                           is_noisy,
-                          bot_turn=None):
-        self._bots = None
+                          bot_turn=None,
+                          deadline=None,
+                          view=None):
+        #: The shared data of the current turn (see `_TurnView`)
+        self._view = view
+        self._bots = view
         self._say = None
         self._overlay = {}
 
@@ -693,8 +1051,9 @@ class Bot:
         self.walls = walls
 
         self.homezone = homezone
-        self.food = food
-        self.shaded_food = shaded_food
+        # food and shaded_food may be None when they are provided by the view
+        self._food = food
+        self._shaded_food = shaded_food
         self.shape = shape
         self.score  = score
         self.kills = kills
@@ -708,23 +1067,80 @@ class Bot:
         self.team_time = team_time
         self.is_noisy = is_noisy
         self.has_exact_position = not is_noisy
-        self.graph = graph
+        if not isinstance(graph, LazyGraph):
+            graph = LazyGraph(walls, shape=shape, graph=graph)
+        self._graph = graph
 
-        # The legal positions that the bot can reach from its current position,
-        # including the current position.
-        self.legal_positions = []
+        # computed on first access
+        self._legal_positions = None
 
-        for direction in [(0, 0), (-1, 0), (1, 0), (0, 1), (0, -1)]:
-            new_pos = (position[0] + direction[0],
-                       position[1] + direction[1])
-            if new_pos not in self.walls:
-                self.legal_positions.append(new_pos)
+        #: The `time.monotonic()` value by which the move must be returned
+        #: (None if there is no time limit)
+        self.deadline = deadline
 
         # Attributes for Bot
         if self._is_on_team:
             assert bot_turn is not None
             self._bot_turn = bot_turn
 
+    def time_left(self):
+        """ The number of seconds left until `deadline` (never negative).
+
+        Returns `math.inf` if there is no time limit. Anytime algorithms can
+        use this to decide whether to search deeper or to return their best
+        move so far (see also `pelita.utils.iterative_deepening`).
+        """
+        if self.deadline is None:
+            return math.inf
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    @property
+    def food(self):
+        """ The positions of the food pellets of this bot’s team (a `FoodView`). """
+        if self._food is None:
+            self._food = self._view.food(self._is_on_team, 'food')
+        return self._food
+
+    @food.setter
+    def food(self, food):
+        self._food = food
+
+    @property
+    def shaded_food(self):
+        """ The positions of the food pellets of this bot’s team which are
+        in the shadow of a bot of the team (empty for enemy bots). """
+        if self._shaded_food is None:
+            self._shaded_food = self._view.food(self._is_on_team, 'shaded_food')
+        return self._shaded_food
+
+    @shaded_food.setter
+    def shaded_food(self, shaded_food):
+        self._shaded_food = shaded_food
+
+    @property
+    def legal_positions(self):
+        """ The legal positions that the bot can reach from its current position,
+        including the current position. """
+        if self._legal_positions is None:
+            walls = self.walls if self._view is None else self._view.walls_set
+            x, y = self.position
+            self._legal_positions = [
+                new_pos
+                for new_pos in ((x, y), (x - 1, y), (x + 1, y), (x, y + 1), (x, y - 1))
+                if new_pos not in walls
+            ]
+        return self._legal_positions
+
+    @legal_positions.setter
+    def legal_positions(self, legal_positions):
+        self._legal_positions = legal_positions
+
+    @property
+    def graph(self):
+        """ A read-only graph of the maze: a networkx graph (see `walls_to_graph`)
+        or a `pelita.grid_graph.GridGraph` if the team selected it. """
+        return self._graph.get()
+
     @property
     def _team(self):
        """ Both of our bots.
@@ -925,70 +1341,104 @@ class Bot:
         return f'<Bot: {self.char} (team {"blue" if self.is_blue else "red"}), pos: {self.position}, turn: {self.turn}, round: {self.round}>'
 
 
-# def __init__(self, *, bot_index, position, initial_position, walls, homezone, food, is_noisy, score, random, round, is_blue):
-def make_bots(*, walls, shape, initial_positions, homezone, team, enemy, round, bot_turn, rng, graph):
-    bots = {}
-
-    team_index = team['team_index']
-    enemy_index = enemy['team_index']
-
-    team_initial_positions = initial_positions[team_index::2]
-    enemy_initial_positions = initial_positions[enemy_index::2]
-
-    team_bots = []
-    for idx, position in enumerate(team['bot_positions']):
-        b = Bot(bot_index=idx,
-            is_on_team=True,
-            score=team['score'],
-            deaths=team['deaths'][idx],
-            kills=team['kills'][idx],
-            was_killed=team['bot_was_killed'][idx],
-            is_noisy=False,
-            food=_ensure_list_tuples(team['food']),
-            shaded_food=_ensure_list_tuples(team['shaded_food']),
-            walls=walls,
-            shape=shape,
-            round=round,
-            bot_turn=bot_turn,
-            bot_char=BOT_I2N[team_index + idx*2],
-            random=rng,
-            graph=graph,
-            position=team['bot_positions'][idx],
-            initial_position=team_initial_positions[idx],
-            is_blue=team_index % 2 == 0,
-            homezone=homezone[team_index],
-            team_name=team['name'],
-            team_time=team['team_time'])
-        b._bots = bots
-        team_bots.append(b)
-
-    enemy_bots = []
-    for idx, position in enumerate(enemy['bot_positions']):
-        b = Bot(bot_index=idx,
-            is_on_team=False,
-            score=enemy['score'],
-            kills=enemy['kills'][idx],
-            deaths=enemy['deaths'][idx],
-            was_killed=enemy['bot_was_killed'][idx],
-            is_noisy=enemy['is_noisy'][idx],
-            food=_ensure_list_tuples(enemy['food']),
-            shaded_food=[],
-            walls=walls,
-            shape=shape,
-            round=round,
-            bot_char = BOT_I2N[team_index + idx*2],
-            random=rng,
-            graph=graph,
-            position=enemy['bot_positions'][idx],
-            initial_position=enemy_initial_positions[idx],
-            is_blue=enemy_index % 2 == 0,
-            homezone=homezone[enemy_index],
-            team_name=enemy['name'],
-            team_time=enemy['team_time'])
-        b._bots = bots
-        enemy_bots.append(b)
-
-    bots['team'] = team_bots
-    bots['enemy'] = enemy_bots
-    return team_bots[bot_turn]
+class _TurnView:
+    """ The data of a single turn which is shared by the four `Bot` objects.
+
+    The bots of a team are created on first access with `view['team']` or
+    `view['enemy']` and the food lists are converted on first access, so
+    that a move function only pays for the parts of the state that it uses.
+    """
+    __slots__ = ('walls', 'walls_set', 'shape', 'initial_positions', 'homezone',
+                 'team', 'enemy', 'round', 'bot_turn', 'rng', 'graph', 'deadline',
+                 '_bots', '_food')
+
+    def __init__(self, *, walls, walls_set, shape, initial_positions, homezone,
+                 team, enemy, round, bot_turn, rng, graph, deadline=None):
+        self.walls = walls
+        self.walls_set = walls_set
+        self.shape = shape
+        self.initial_positions = initial_positions
+        self.homezone = homezone
+        self.team = team
+        self.enemy = enemy
+        self.round = round
+        self.bot_turn = bot_turn
+        self.rng = rng
+        self.graph = graph
+        self.deadline = deadline
+        self._bots = {}
+        self._food = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._bots[key]
+        except KeyError:
+            bots = self._bots[key] = self._make_bots(key == 'team')
+            return bots
 
+    def food(self, is_on_team, key):
+        """ Return the `FoodView` of the (shaded) food of our team or of the enemy. """
+        try:
+            return self._food[is_on_team, key]
+        except KeyError:
+            team = self.team if is_on_team else self.enemy
+            food = self._food[is_on_team, key] = FoodView(team[key])
+            return food
+
+    def _make_bots(self, is_on_team):
+        team_index = self.team['team_index']
+        if is_on_team:
+            team = self.team
+            bot_turn = self.bot_turn
+            is_noisy = [False, False]
+        else:
+            team = self.enemy
+            bot_turn = None
+            is_noisy = team['is_noisy']
+
+        initial_positions = self.initial_positions[team['team_index']::2]
+
+        bots = []
+        for idx, position in enumerate(team['bot_positions']):
+            b = Bot(bot_index=idx,
+                is_on_team=is_on_team,
+                score=team['score'],
+                deaths=team['deaths'][idx],
+                kills=team['kills'][idx],
+                was_killed=team['bot_was_killed'][idx],
+                is_noisy=is_noisy[idx],
+                food=None,
+                # the enemy’s shaded food is not known
+                shaded_food=None if is_on_team else FoodView(),
+                walls=self.walls,
+                shape=self.shape,
+                round=self.round,
+                bot_turn=bot_turn,
+                bot_char=BOT_I2N[team_index + idx*2],
+                random=self.rng,
+                graph=self.graph,
+                position=position,
+                initial_position=initial_positions[idx],
+                is_blue=team['team_index'] % 2 == 0,
+                homezone=self.homezone[team['team_index']],
+                team_name=team['name'],
+                team_time=team['team_time'],
+                deadline=self.deadline,
+                view=self)
+            bots.append(b)
+        return bots
+
+
+def make_bots(*, walls, shape, initial_positions, homezone, team, enemy, round, bot_turn, rng, graph,
+              walls_set=None, deadline=None):
+    """ Create the bots for the current turn and return the bot whose turn it is.
+
+    The enemy bots are only created when they are accessed with `bot.enemy`.
+    """
+    if walls_set is None:
+        walls_set = set(walls)
+    view = _TurnView(walls=walls, walls_set=walls_set, shape=shape,
+                     initial_positions=initial_positions, homezone=homezone,
+                     team=team, enemy=enemy, round=round, bot_turn=bot_turn,
+                     rng=rng, graph=graph, deadline=deadline)
+    return view['team'][bot_turn]
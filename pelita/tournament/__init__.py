@@ -1,16 +1,22 @@
+import collections
+import concurrent.futures
 import contextlib
+import functools
 import io
 import json
 import logging
 import os
+import random
 import re
 import shlex
 import signal
 import subprocess
 import sys
 import tempfile
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from pathlib import Path
 
 import yaml
 import zmq
@@ -99,7 +105,8 @@ def run_and_terminate_process(args, **kwargs):
 
 
 def call_pelita(team_specs, *, rounds, size, viewer, seed, timeout=3, initial_timeout=6,
-                team_infos=None, write_replay=False, store_output=False, exit_flag=None):
+                team_infos=None, write_replay=False, store_output=False, exit_flag=None,
+                layout_store=None):
     """ Starts a new process with the given command line arguments and waits until finished.
 
     Returns
@@ -139,6 +146,7 @@ def call_pelita(team_specs, *, rounds, size, viewer, seed, timeout=3, initial_ti
     initial_timeout = ['--initial-timeout', str(initial_timeout)]
     write_replay = ['--write-replay', write_replay] if write_replay else []
     store_output = ['--store-output', store_output] if store_output else []
+    layout_store = ['--layout-store', str(layout_store)] if layout_store else []
     append_blue = ['--append-blue', team_infos[0]] if team_infos[0] else []
     append_red = ['--append-red', team_infos[1]] if team_infos[1] else []
 
@@ -154,7 +162,8 @@ def call_pelita(team_specs, *, rounds, size, viewer, seed, timeout=3, initial_ti
            *timeout,
            *initial_timeout,
            *write_replay,
-           *store_output]
+           *store_output,
+           *layout_store]
 
     # We need to run a process in the background in order to await the zmq events
     # stdout and stderr are written to temporary files in order to be more portable
@@ -213,6 +222,170 @@ def call_pelita(team_specs, *, rounds, size, viewer, seed, timeout=3, initial_ti
 
 
 
+#: Per-thread buffers for `capture_thread_output`
+_thread_output = threading.local()
+_capture_lock = threading.Lock()
+_capture_count = 0
+
+
+class _ThreadStream:
+    """ Stand-in for sys.stdout or sys.stderr which writes to the buffer of
+    the current thread (if one is set) and to the original stream otherwise. """
+    def __init__(self, name, stream):
+        self._name = name
+        self._stream = stream
+
+    def _target(self):
+        buffer = getattr(_thread_output, self._name, None)
+        return self._stream if buffer is None else buffer
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        return self._target().flush()
+
+    def isatty(self):
+        return self._target().isatty()
+
+    def __getattr__(self, attr):
+        return getattr(self._target(), attr)
+
+
+@contextlib.contextmanager
+def capture_thread_output():
+    """ Captures everything that the current thread prints to sys.stdout and sys.stderr.
+
+    Unlike `contextlib.redirect_stdout` this can be used in several threads
+    at the same time. Output of other threads is not affected.
+
+    Yields
+    ======
+    tuple of (stdout, stderr) StringIO buffers
+    """
+    global _capture_count
+    stdout, stderr = io.StringIO(), io.StringIO()
+
+    with _capture_lock:
+        if _capture_count == 0:
+            sys.stdout = _ThreadStream('stdout', sys.stdout)
+            sys.stderr = _ThreadStream('stderr', sys.stderr)
+        _capture_count += 1
+
+    _thread_output.stdout, _thread_output.stderr = stdout, stderr
+    try:
+        yield stdout, stderr
+    finally:
+        _thread_output.stdout = _thread_output.stderr = None
+        with _capture_lock:
+            _capture_count -= 1
+            if _capture_count == 0:
+                if isinstance(sys.stdout, _ThreadStream):
+                    sys.stdout = sys.stdout._stream
+                if isinstance(sys.stderr, _ThreadStream):
+                    sys.stderr = sys.stderr._stream
+
+
+@dataclass
+class MatchResult:
+    """The outcome of a match played with `run_match`."""
+    #: The final game state as the viewers see it (None if the match was cancelled)
+    final_state: dict | None
+    #: The output of the game master
+    stdout: str = ""
+    stderr: str = ""
+    #: The (stdout, stderr) of the blue and the red player
+    team_output: list = field(default_factory=lambda: [("", ""), ("", "")])
+
+
+def run_match(team_specs, *, rounds, size, viewer, seed, timeout=3, initial_timeout=6,
+              team_infos=None, write_replay=False, store_output=False, exit_flag=None,
+              layout_store=None):
+    """ Plays a match in the current process and waits until finished.
+
+    This takes the same arguments as `call_pelita` and plays the same match,
+    but calls the game master directly instead of starting `pelita_main`
+    in a subprocess. The players still run in their own subprocesses.
+    It can be called from several threads at the same time.
+
+    The match is cancelled before the next turn when `exit_flag` is set.
+
+    Returns
+    =======
+    MatchResult
+    """
+    from ..game import cleanup_remote_teams, controller_await, play_turn, prepare_viewer_state, setup_game
+    from ..layout_store import load_or_generate_layout
+    from ..network import SetEncoder
+
+    if team_infos is None:
+        team_infos = [None, None]
+
+    if seed is None:
+        seed = random.randint(0, sys.maxsize)
+    elif isinstance(seed, (int, str)):
+        try:
+            seed = int(seed)
+        except ValueError:
+            raise ValueError("seed must be an int, a string that can be converted to int or None.") from None
+    else:
+        raise ValueError("seed must be an int, a string that can be converted to int or None.")
+
+    if viewer is None:
+        # the default of pelita_main
+        viewer = 'tk'
+    if viewer == 'null':
+        viewers = []
+    elif viewer == 'tk':
+        viewers = [('tk', {'delay': 25})]
+    else:
+        viewers = [viewer]
+    if write_replay:
+        viewers.append(('write-replay-to', write_replay))
+
+    rng = random.Random(seed)
+    layout_dict = load_or_generate_layout(seed, size, rng=rng, store=layout_store)
+
+    with contextlib.ExitStack() as stack:
+        if not store_output:
+            # the player output is always captured
+            store_output = stack.enter_context(tempfile.TemporaryDirectory())
+        stdout, stderr = stack.enter_context(capture_thread_output())
+
+        state = setup_game(team_specs, layout_dict=layout_dict, max_rounds=rounds or 300, rng=rng,
+                           timeout_length=timeout, initial_timeout_length=initial_timeout,
+                           viewers=viewers, store_output=store_output, team_infos=team_infos)
+        try:
+            while state['game_phase'] == 'RUNNING':
+                if exit_flag and exit_flag.is_set():
+                    # An external thread tells us to quit
+                    _logger.info("Received exit signal")
+                    break
+                if controller_await(state):
+                    break
+                state = play_turn(state)
+        finally:
+            if state['game_phase'] == 'RUNNING':
+                # the match was cancelled; this also tells the players to exit
+                cleanup_remote_teams(state)
+
+        team_output = []
+        for color in ['blue', 'red']:
+            outputs = []
+            for ext in ['out', 'err']:
+                path = Path(store_output) / f'{color}.{ext}'
+                outputs.append(path.read_text() if path.exists() else "")
+            team_output.append(tuple(outputs))
+
+        if state['gameover']:
+            # the same data that call_pelita receives
+            final_state = json.loads(json.dumps(prepare_viewer_state(state), cls=SetEncoder))
+        else:
+            final_state = None
+
+        return MatchResult(final_state, stdout.getvalue(), stderr.getvalue(), team_output)
+
+
 def create_team_id(team_id, idx):
     """ Checks that the team_id in the config is valid or else
     creates one from the given index. """
@@ -278,8 +451,27 @@ class Config:
 
         self.rounds = config.get("rounds")
         self.size = config.get("size")
+        #: Layout store written by pelita-layouts.
+        #: Match seeds are then picked from the layouts in the store.
+        self.layout_store = config.get("layout_store")
+        self._layout_seeds = None
 
         self.viewer = config.get("viewer")
+        #: Play the matches with `run_match` instead of a pelita_main subprocess
+        self.in_process = config.get("in_process", False)
+        #: Number of round robin matches that are played at the same time
+        self.parallel = config.get("parallel") or 1
+        #: How the first round is played: 'roundrobin' (everybody vs everybody),
+        #: 'swiss' or 'adaptive' (see `roundrobin.adaptive_pairings`)
+        self.round1_mode = config.get("round1_mode") or "roundrobin"
+        if self.round1_mode not in ("roundrobin", *roundrobin.RATED_MODES):
+            raise ValueError("Unknown round1_mode {}.".format(self.round1_mode))
+        #: Number of best teams that the swiss and adaptive modes should find
+        self.round1_top = config.get("round1_top", 8)
+        #: The adaptive mode stops when the best teams are known with this confidence
+        self.round1_confidence = config.get("round1_confidence", 0.9)
+        #: Number of rounds in swiss mode
+        self.swiss_rounds = config.get("swiss_rounds") or roundrobin.swiss_rounds(len(self.teams), self.round1_top)
         self.interactive = config.get("interactive")
         self.statefile = config.get("statefile")
 
@@ -300,6 +492,14 @@ class Config:
         self.tournament_log_folder = None
         self.tournament_log_file = None
 
+    @property
+    def layout_seeds(self):
+        """ The seeds in the layout store for the configured size. """
+        if self._layout_seeds is None:
+            from ..layout_store import LayoutStore
+            self._layout_seeds = LayoutStore(self.layout_store).seeds(self.size)
+        return self._layout_seeds
+
     @property
     def team_ids(self):
         return self.teams.keys()
@@ -400,19 +600,60 @@ class Config:
             _logger.debug("Noninteractive. Not asking for keypress.")
 
 
+_MISSING = object()
+
+
 class State:
-    def __init__(self, config, rng, state=None):
+    """ The state of a tournament: the matches of the first round, their
+    results and the results of the knock-out round.
+
+    The state is persisted in an append-only journal with one JSON record
+    per line. The first record is a snapshot of the state, every further
+    record is a single result. Every record is flushed to disk before the
+    tournament goes on, so that after a crash the tournament can be resumed
+    with all finished matches. Every `COMPACT_EVERY` records the journal is
+    replaced by a new snapshot.
+
+    Parameters
+    ----------
+    config : Config
+        the tournament config
+    rng : Random
+        used to create the match plan of a new tournament
+    state : dict
+        the state to start from (see `load`)
+    journal : str or Path
+        the journal file (default: config.statefile). Nothing is written if None.
+    """
+    #: Number of appended records after which the journal is compacted
+    COMPACT_EVERY = 256
+
+    def __init__(self, config, rng, state=None, *, journal=_MISSING):
         if state is None:
+            if config.round1_mode in roundrobin.RATED_MODES:
+                # the matches are scheduled as the first round goes on
+                unplayed = []
+            else:
+                unplayed = roundrobin.create_matchplan(config.team_ids, rng=rng)
             self.state = {
                 "round1": {
                     "played": [],
-                    "unplayed": roundrobin.create_matchplan(config.team_ids, rng=rng)
+                    "unplayed": unplayed
                 },
                 "round2": {}
             }
         else:
             self.state = state
 
+        if journal is _MISSING:
+            journal = getattr(config, 'statefile', None)
+        self.journal = journal
+        #: results of the knock-out round as [round index, match index, winner]
+        self._round2_results = []
+        # the journal must be started with a snapshot before we can append to it
+        self._journal_started = False
+        self._records = 0
+
     @property
     def round1(self):
         return self.state["round1"]
@@ -421,16 +662,176 @@ class State:
     def round2(self):
         return self.state["round2"]
 
+    def record_round1(self, match, winner):
+        """ Moves `match` from the unplayed to the played matches of the first round. """
+        with contextlib.suppress(ValueError):
+            self.round1["unplayed"].remove(match)
+        self.round1["played"].append({ "match": match, "winner": winner })
+        self._append({ "event": "round1", "match": list(match), "winner": winner })
+
+    def schedule_round1(self, matches):
+        """ Adds matches to the unplayed matches of the first round.
+
+        The matches are played in the given order.
+        """
+        # the unplayed matches are played from the end of the list
+        self.round1["unplayed"][:0] = reversed(matches)
+        self._append({ "event": "schedule", "matches": [list(match) for match in matches] })
+
+    def record_ranking(self, ranking):
+        """ Stores the ranking of the first round. """
+        self.round2["round_robin_ranking"] = ranking
+        self._append({ "event": "ranking", "ranking": list(ranking) })
+
+    def record_round2(self, round_idx, match_idx, winner):
+        """ Stores the winner of a match in the knock-out tree `round2["tournament"]`. """
+        self._round2_results.append([round_idx, match_idx, winner])
+        self._append({ "event": "round2", "round": round_idx, "match": match_idx, "winner": winner })
+
+    def _snapshot(self):
+        return {
+            "event": "snapshot",
+            "round1": self.round1,
+            "ranking": self.round2.get("round_robin_ranking"),
+            "round2": self._round2_results,
+        }
+
+    def _append(self, record):
+        if not self.journal:
+            return
+        if not self._journal_started or self._records >= self.COMPACT_EVERY:
+            # the snapshot already contains the record
+            self.compact()
+            return
+        with open(self.journal, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._records += 1
+
+    def compact(self):
+        """ Replaces the journal with a single snapshot of the current state. """
+        if not self.journal:
+            return
+        journal = Path(self.journal)
+        tmp_file = journal.with_name(journal.name + '.tmp')
+        with open(tmp_file, 'w') as f:
+            f.write(json.dumps(self._snapshot()) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, journal)
+        if not _mswindows:
+            # make the rename durable
+            dir_fd = os.open(journal.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self._journal_started = True
+        self._records = 0
+
     def save(self, filename):
+        """ Writes the state to the journal `filename` (if not None). """
         if filename:
-            with open(filename, 'w') as f:
-                yaml.dump(self.state, f, indent=2)
+            self.journal = filename
+            self.compact()
+
+    def export_yaml(self, filename):
+        """ Writes the state as YAML (in the format of earlier versions). """
+        with open(filename, 'w') as f:
+            yaml.dump(self.state, f, indent=2)
 
     @classmethod
     def load(cls, config, filename):
-        if filename:
-            with open(filename) as f:
-                return cls(config=config, state=yaml.load(f, Loader=yaml.FullLoader))
+        """ Loads the state from a journal (or from a YAML file of earlier versions). """
+        if not filename:
+            return None
+        with open(filename) as f:
+            content = f.read()
+
+        if not content.startswith('{'):
+            state = cls(config=config, rng=None, state=yaml.load(content, Loader=yaml.FullLoader), journal=None)
+            # continue with a journal next to the YAML file, which is left untouched
+            # for earlier versions; it is written with the first new record
+            journal = Path(filename).with_suffix('.jsonl')
+            if journal.exists():
+                raise FileExistsError(f"{filename} has already been converted to {journal}. Load {journal} instead.")
+            _logger.warning("Converting the YAML state %s to the journal %s.", filename, journal)
+            state.journal = journal
+            return state
+
+        lines = content.splitlines()
+        records = []
+        complete = content.endswith("\n")
+        for idx, line in enumerate(lines):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                if idx == len(lines) - 1:
+                    # the last record was not completely written
+                    _logger.warning("Ignoring incomplete last record in %s.", filename)
+                    complete = False
+                    break
+                raise
+
+        snapshot, *results = records
+        if snapshot.get("event") != "snapshot":
+            raise ValueError(f"{filename} does not start with a snapshot.")
+
+        # JSON has no tuples; the matches are tuples as in the match plan
+        round1 = {
+            "played": [{ "match": tuple(played["match"]), "winner": played["winner"] }
+                       for played in snapshot["round1"]["played"]],
+            "unplayed": [],
+        }
+        # replay the unplayed matches without searching the list for every record:
+        # each unplayed match has a position key and `unplayed` maps a match to the
+        # keys of its occurrences in ascending order. Scheduled matches are prepended
+        # and get keys below all earlier keys.
+        unplayed = collections.defaultdict(collections.deque)
+        for key, match in enumerate(snapshot["round1"]["unplayed"]):
+            unplayed[tuple(match)].append(key)
+        first_key = 0
+        state = cls(config=config, rng=None, state={"round1": round1, "round2": {}}, journal=None)
+        ranking = snapshot["ranking"]
+        round2_results = [tuple(result) for result in snapshot["round2"]]
+        for record in results:
+            match record["event"]:
+                case "round1":
+                    match_ = tuple(record["match"])
+                    if unplayed.get(match_):
+                        # the first occurrence in the list
+                        unplayed[match_].popleft()
+                    state.round1["played"].append({ "match": match_, "winner": record["winner"] })
+                case "schedule":
+                    batch = [tuple(match) for match in reversed(record["matches"])]
+                    first_key -= len(batch)
+                    for offset, match in reversed(list(enumerate(batch))):
+                        unplayed[match].appendleft(first_key + offset)
+                case "ranking":
+                    ranking = record["ranking"]
+                case "round2":
+                    round2_results.append((record["round"], record["match"], record["winner"]))
+        state.round1["unplayed"] = [match for _key, match in
+                                    sorted((key, match) for match, keys in unplayed.items() for key in keys)]
+
+        if ranking is not None:
+            state.round2["round_robin_ranking"] = ranking
+            if round2_results:
+                # rebuild the knock-out tree and apply the results
+                last_match = knockout_mode.prepare_matches(ranking, bonusmatch=config.bonusmatch)
+                tournament = knockout_mode.tree_enumerate(last_match)
+                for round_idx, match_idx, winner in round2_results:
+                    tournament[round_idx][match_idx].winner = winner
+                state.round2["last_match"] = last_match
+                state.round2["tournament"] = tournament
+                state._round2_results = [list(result) for result in round2_results]
+
+        state.journal = filename
+        # an incomplete journal is replaced with a snapshot before appending to it
+        state._journal_started = complete
+        state._records = len(results)
+        return state
 
 
 def present_teams(config):
@@ -464,8 +865,29 @@ def set_name(team):
         raise
 
 
-def play_game_with_config(config, teams, rng, *, match_id=None):
+def draw_match_seed(config, rng):
+    """ Draws the seed for the next match from rng. """
+    seed = rng.randint(0, sys.maxsize)
+    if config.layout_store and config.layout_seeds:
+        # use a pre-generated layout; this draws the same number of random
+        # values from rng as without a layout store
+        seed = config.layout_seeds[seed % len(config.layout_seeds)]
+    return seed
+
+
+def play_game_with_config(config, teams, rng, *, match_id=None, seed=None, viewer=None):
+    """ Plays a match between the two teams with the settings from config.
+
+    The seed for the match is drawn from rng unless it is given.
+    `viewer` overrides the viewer from config.
+
+    Returns
+    =======
+    tuple of (game_state, stdout, stderr)
+    """
     team1, team2 = teams
+    if viewer is None:
+        viewer = config.viewer
 
     if config.tournament_log_folder:
         if match_id:
@@ -482,16 +904,30 @@ def play_game_with_config(config, teams, rng, *, match_id=None):
         log_folder = None
         log_kwargs = {}
 
-    seed = str(rng.randint(0, sys.maxsize))
+    if seed is None:
+        seed = draw_match_seed(config, rng)
+    seed = str(seed)
     team_infos = [config.team_group(team1), config.team_group(team2)]
 
-    res = call_pelita([config.team_spec(team1), config.team_spec(team2)],
-                                rounds=config.rounds,
-                                size=config.size,
-                                viewer=config.viewer,
-                                team_infos=team_infos,
-                                seed=seed,
-                                **log_kwargs)
+    if config.in_process:
+        match = run_match([config.team_spec(team1), config.team_spec(team2)],
+                          rounds=config.rounds,
+                          size=config.size,
+                          viewer=viewer,
+                          team_infos=team_infos,
+                          seed=seed,
+                          layout_store=config.layout_store,
+                          **log_kwargs)
+        res = (match.final_state, match.stdout, match.stderr)
+    else:
+        res = call_pelita([config.team_spec(team1), config.team_spec(team2)],
+                                    rounds=config.rounds,
+                                    size=config.size,
+                                    viewer=viewer,
+                                    team_infos=team_infos,
+                                    seed=seed,
+                                    layout_store=config.layout_store,
+                                    **log_kwargs)
 
     if log_folder:
         (_final_state, stdout, stderr) = res
@@ -512,28 +948,49 @@ def start_match(config, teams, rng, *, shuffle=False, match_id=None):
     if shuffle:
         rng.shuffle(teams)
 
-    team1, team2 = teams
+    announce_match(config, teams)
+    config.wait_for_keypress()
+
+    (final_state, stdout, stderr) = play_game_with_config(config, teams, rng=rng, match_id=match_id)
+    return report_match(config, teams, final_state, stdout, stderr)
+
 
+def announce_match(config, teams):
+    team1, team2 = teams
     config.print()
     config.print('Starting match: '+ config.team_name_group(team1)+' vs ' + config.team_name_group(team2))
     config.print()
-    config.wait_for_keypress()
 
-    (final_state, stdout, stderr) = play_game_with_config(config, teams, rng=rng, match_id=match_id)
+
+def match_winner(teams, final_state):
+    """Return the team that won, False if there was a draw or None if the
+    result could not be found in final_state.
+    """
     try:
         whowins = final_state['whowins']
+    except (TypeError, KeyError):
+        return None
+    if whowins == 2:
+        return False
+    elif whowins == 0 or whowins == 1:
+        return teams[whowins]
+    return None
 
-        if whowins == 2:
-            config.print('‘{t1}’ and ‘{t2}’ had a draw.'.format(t1=config.team_name(team1),
-                                                                t2=config.team_name(team2)))
-            return False
-        elif whowins == 0 or whowins == 1:
-            winner = teams[whowins]
-            config.print('‘{team}’ wins'.format(team=config.team_name(winner)))
-            return winner
-        else:
-            raise ValueError
-    except (TypeError, ValueError, KeyError):
+
+def report_match(config, teams, final_state, stdout, stderr):
+    """Print the result of a match. Return the team that won, False if there was a draw
+    or None if the result could not be found.
+    """
+    team1, team2 = teams
+    winner = match_winner(teams, final_state)
+    if winner is False:
+        config.print('‘{t1}’ and ‘{t2}’ had a draw.'.format(t1=config.team_name(team1),
+                                                            t2=config.team_name(team2)))
+        return False
+    elif winner is not None:
+        config.print('‘{team}’ wins'.format(team=config.team_name(winner)))
+        return winner
+    else:
         config.print("Unable to parse winning result :(")
         config.print("*** ERROR: Apparently the game crashed. At least I could not find the outcome of the game.")
         config.print("*** Maybe stdout helps you to debug the problem")
@@ -548,6 +1005,11 @@ def start_match_with_replay(config, match, rng, *, shuffle=False, match_id=None)
     """ Runs start_match until it returns a proper output or manual intervention. """
 
     winner = start_match(config, match, rng=rng, shuffle=shuffle, match_id=match_id)
+    return resolve_missing_winner(config, match, winner, rng, shuffle=shuffle, match_id=match_id)
+
+
+def resolve_missing_winner(config, match, winner, rng, *, shuffle=False, match_id=None):
+    """ Asks to re-play the match or to enter a winner manually as long as winner is None. """
     while winner is None:
         config.print("Do you want to re-play the game or enter a winner manually?")
         res = config.input("(r)e-play/(0){}/(1){}/(d)raw > ".format(config.team_name(match[0]),
@@ -592,7 +1054,15 @@ def start_deathmatch(config, team1, team2, rng, *, match_id=None):
 
 
 def round1_ranking(config, rr_played):
-    import collections
+    """ Returns the list of (team_id, points) sorted by points.
+
+    In the swiss and adaptive modes, the points are the Elo rating
+    fitted to the played matches (see `roundrobin.fit_ratings`).
+    """
+    if config.round1_mode in roundrobin.RATED_MODES:
+        ratings = roundrobin.fit_ratings(config.team_ids, rr_played)
+        return [(team_id, ratings[team_id].elo) for team_id in roundrobin.rating_order(ratings)]
+
     points = collections.Counter()
     for match in rr_played:
         winner = match["winner"]
@@ -637,8 +1107,12 @@ def play_round1(config, state, rng):
 
     config.wait_for_keypress()
     config.print()
-    config.print("ROUND 1 (Everybody vs Everybody)")
-    config.print('================================', speak=False)
+    title = {
+        "swiss": "ROUND 1 (Swiss system)",
+        "adaptive": "ROUND 1 (Adaptive pairing)",
+    }.get(config.round1_mode, "ROUND 1 (Everybody vs Everybody)")
+    config.print(title)
+    config.print('=' * len(title), speak=False)
     config.print()
 
 
@@ -659,25 +1133,119 @@ def play_round1(config, state, rng):
     if not rr_unplayed:
         pp_round1_results(config, rr_played, rr_unplayed)
 
-    while rr_unplayed:
-        match = rr_unplayed.pop()
+    while True:
+        if not rr_unplayed:
+            matches = next_round1_matches(config, rr_played, rng)
+            if not matches:
+                break
+            state.schedule_round1(matches)
 
-        winner = start_match_with_replay(config, match, rng=rng, match_id=match_id)
-        match_id.next_match()
-        config.wait_for_keypress()
+        if config.parallel > 1:
+            play_round1_parallel(config, state, rng, match_id)
 
-        if winner is False or winner is None:
-            rr_played.append({ "match": match, "winner": False })
-        else:
-            rr_played.append({ "match": match, "winner": winner })
+        while rr_unplayed:
+            match = rr_unplayed[-1]
+
+            winner = start_match_with_replay(config, match, rng=rng, match_id=match_id)
+            match_id.next_match()
+            config.wait_for_keypress()
+
+            if winner is False or winner is None:
+                state.record_round1(match, False)
+            else:
+                state.record_round1(match, winner)
 
-        pp_round1_results(config, rr_played, rr_unplayed, highlight=match)
+            pp_round1_results(config, rr_played, rr_unplayed, highlight=match)
 
-        state.save(config.statefile)
+    if config.round1_mode in roundrobin.RATED_MODES:
+        ratings = roundrobin.fit_ratings(config.team_ids, rr_played)
+        confidence = roundrobin.top_confidence(ratings, config.round1_top)
+        config.print("The best {top} teams are known with a confidence of {confidence:.0%} after {n} matches.".format(
+            top=min(config.round1_top, len(ratings)), confidence=confidence, n=len(rr_played)))
 
     return [team_id for team_id, p in round1_ranking(config, rr_played)]
 
 
+def next_round1_matches(config, rr_played, rng):
+    """ Returns the next matches of the first round in the swiss and adaptive
+    modes or an empty list if the first round is over.
+
+    In the adaptive mode up to `config.parallel` matches are scheduled at once.
+    """
+    if config.round1_mode == "swiss":
+        return roundrobin.swiss_pairings(config.team_ids, rr_played, rng, rounds=config.swiss_rounds)
+    elif config.round1_mode == "adaptive":
+        return roundrobin.adaptive_pairings(config.team_ids, rr_played, rng,
+                                            top=config.round1_top,
+                                            confidence=config.round1_confidence,
+                                            batch=config.parallel)
+    return []
+
+
+def play_round1_parallel(config, state, rng, match_id):
+    """Play the unplayed matches of the first round in `config.parallel` threads.
+
+    The matches are played without a viewer. A match is stored in the state
+    as soon as it has finished, but the results are presented one by one
+    in the order of the match plan. Matches without a valid result are
+    resolved (re-played or decided manually) when it is their turn.
+    """
+    rr_unplayed = state.round1["unplayed"]
+    rr_played = state.round1["played"]
+
+    # the matches in the order in which play_round1 would play them, with
+    # the seeds that they would get if no match needs to be re-played
+    plan = []
+    for match in reversed(rr_unplayed):
+        seed = draw_match_seed(config, rng)
+        plan.append((match, seed, MatchID(round=match_id.round, match=match_id.match)))
+        match_id.next_match()
+
+    # the played matches as far as they have been presented
+    presented = list(rr_played)
+    # the results are recorded by the worker threads as soon as a match has
+    # finished, even when the presentation waits for a keypress
+    state_lock = threading.Lock()
+
+    def record(match, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        final_state, _stdout, _stderr = future.result()
+        winner = match_winner(match, final_state)
+        if winner is not None:
+            with state_lock:
+                state.record_round1(match, winner)
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.parallel)
+    try:
+        futures = []
+        for match, seed, plan_match_id in plan:
+            future = executor.submit(play_game_with_config, config, match, None,
+                                     match_id=plan_match_id, seed=seed, viewer='null')
+            future.add_done_callback(functools.partial(record, match))
+            futures.append(future)
+
+        # present the matches in the order of the plan
+        for idx, future in enumerate(futures):
+            match, _seed, plan_match_id = plan[idx]
+            (final_state, stdout, stderr) = future.result()
+
+            announce_match(config, match)
+            winner = report_match(config, match, final_state, stdout, stderr)
+            if winner is None:
+                winner = resolve_missing_winner(config, match, None, rng, match_id=plan_match_id)
+                with state_lock:
+                    state.record_round1(match, winner)
+            config.wait_for_keypress()
+
+            presented.append({ "match": match, "winner": winner })
+            pp_round1_results(config, presented, plan[idx + 1:], highlight=match)
+    finally:
+        # do not play the queued matches after an interruption or an error;
+        # the running matches are still recorded
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def recur_match_winner(match):
     """ Returns the team id of the unambiguous winner.
 
@@ -730,8 +1298,8 @@ def play_round2(config, teams, state, rng):
     config.print(knockout_mode.print_knockout(last_match, config.team_name), speak=False)
 
     match_id = MatchID(round=2, match=1)
-    for round in tournament:
-        for match in round:
+    for round_idx, round in enumerate(tournament):
+        for match_idx, match in enumerate(round):
             if isinstance(match, knockout_mode.Match):
                 t1_id = recur_match_winner(match.t1)
                 t2_id = recur_match_winner(match.t2)
@@ -741,8 +1309,7 @@ def play_round2(config, teams, state, rng):
 
                     config.print(knockout_mode.print_knockout(last_match, config.team_name, highlight=[match]), speak=False)
 
-                    state.round2["tournament"] = tournament
-                    state.save(config.statefile)
+                    state.record_round2(round_idx, match_idx, winner)
                 else:
                     _logger.debug("Skipping match {}.".format(match))
                     config.print("Already played match between {t1} and {t2}. ({winner} won.) Skipping.".format(t1=config.team_name_group(t1_id),
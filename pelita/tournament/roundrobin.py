@@ -1,6 +1,21 @@
 import itertools
+import math
 from collections import Counter
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+#: Modes of the first round that pair the teams based on their ratings
+RATED_MODES = ('swiss', 'adaptive')
+
+#: Standard deviation of the prior of the team strengths (in logistic units)
+PRIOR_SIGMA = 1.5
+
+#: Maximum number of tried pairs when searching a Swiss round without rematches
+SWISS_SEARCH_BUDGET = 10000
+
+# conversion of the logistic strength to the usual Elo scale
+ELO_SCALE = 400 / math.log(10)
+ELO_BASE = 1500
 
 
 def create_matchplan(teams: List[str], rng) -> List[Tuple[str, str]]:
@@ -155,3 +170,285 @@ def rotate_with_fixed(lst: List, index: int) -> List:
     # insert again
     lst.insert(index, removed_team)
     return lst
+
+
+@dataclass
+class Rating:
+    """ The estimated strength of a team after the matches of the first round. """
+    #: strength in logistic units (the win probability is 1 / (1 + exp(mu_b - mu_a)))
+    mu: float
+    #: standard deviation of the strength
+    sigma: float
+    #: number of matches played
+    games: int
+    #: number of wins plus half the number of draws
+    score: float
+
+    @property
+    def elo(self) -> int:
+        return round(ELO_BASE + ELO_SCALE * self.mu)
+
+
+def win_probability(mu_a: float, mu_b: float) -> float:
+    """ The probability that a team with strength mu_a wins against mu_b. """
+    return 1 / (1 + math.exp(mu_b - mu_a))
+
+
+def _normal_cdf(x):
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def _results(played):
+    # (team_a, team_b, score of team_a) for all played matches
+    for entry in played:
+        team_a, team_b = entry["match"]
+        if team_a == team_b:
+            continue
+        winner = entry["winner"]
+        if winner == team_a:
+            score = 1.0
+        elif winner == team_b:
+            score = 0.0
+        else:
+            score = 0.5
+        yield team_a, team_b, score
+
+
+def fit_ratings(teams, played, prior_sigma=PRIOR_SIGMA, max_iter=100, tol=1e-6) -> Dict:
+    """ Estimates the strength of the teams from the played matches.
+
+    Fits a Bradley-Terry model (draws count as half a win for both teams)
+    with a Gaussian prior on the strengths. The result does not depend on
+    the order of the matches. The standard deviation of each strength is
+    approximated from the curvature at the maximum.
+
+    Parameters
+    ----------
+    teams : list of team ids
+    played : list of dicts
+        the played matches as in the tournament state: {"match": (a, b), "winner": a, b or False}
+
+    Returns
+    -------
+    dict of team id -> Rating
+    """
+    teams = list(teams)
+    games = {team: [] for team in teams}
+    for team_a, team_b, score in _results(played):
+        games[team_a].append((team_b, score))
+        games[team_b].append((team_a, 1 - score))
+
+    prior_precision = 1 / prior_sigma ** 2
+    mu = dict.fromkeys(teams, 0.0)
+    # the log posterior is concave, so that Newton steps for one team
+    # after the other converge to the maximum
+    for _iteration in range(max_iter):
+        max_step = 0.0
+        for team in teams:
+            gradient = -prior_precision * mu[team]
+            curvature = prior_precision
+            for opponent, score in games[team]:
+                p = win_probability(mu[team], mu[opponent])
+                gradient += score - p
+                curvature += p * (1 - p)
+            step = gradient / curvature
+            mu[team] += step
+            max_step = max(max_step, abs(step))
+        if max_step < tol:
+            break
+
+    ratings = {}
+    for team in teams:
+        information = prior_precision
+        for opponent, _score in games[team]:
+            p = win_probability(mu[team], mu[opponent])
+            information += p * (1 - p)
+        ratings[team] = Rating(mu=mu[team], sigma=1 / math.sqrt(information),
+                               games=len(games[team]),
+                               score=sum(score for _opponent, score in games[team]))
+    return ratings
+
+
+def rating_order(ratings: Dict) -> List:
+    """ The team ids sorted from the strongest to the weakest team. """
+    return sorted(ratings, key=lambda team: ratings[team].mu, reverse=True)
+
+
+def misclassification(ratings: Dict, top: int) -> Dict:
+    """ For every team, the probability that it is on the wrong side of
+    the cut between the `top` best teams and the rest.
+
+    If `top` is not smaller than the number of teams, the complete ranking
+    counts and every cut between two neighbouring teams is considered.
+    """
+    order = rating_order(ratings)
+    if 0 < top < len(order):
+        cuts = [top]
+    else:
+        cuts = range(1, len(order))
+    boundaries = [(ratings[order[cut - 1]].mu + ratings[order[cut]].mu) / 2 for cut in cuts]
+    return {
+        team: max((_normal_cdf(-abs(rating.mu - boundary) / rating.sigma) for boundary in boundaries), default=0.0)
+        for team, rating in ratings.items()
+    }
+
+
+def top_confidence(ratings: Dict, top: int) -> float:
+    """ The expected fraction of the `top` best rated teams that are really
+    among the `top` best teams.
+
+    If `top` is not smaller than the number of teams, it is the expected
+    fraction of teams that are on the right side of their neighbours.
+    """
+    uncertainty = misclassification(ratings, top)
+    best = rating_order(ratings)[:top]
+    if not best:
+        return 1.0
+    return 1 - sum(uncertainty[team] for team in best) / len(best)
+
+
+def _orient(match, blue_games, rng):
+    # let the team that has played blue less often start
+    team_a, team_b = match
+    if blue_games[team_a] > blue_games[team_b] or (blue_games[team_a] == blue_games[team_b] and rng.random() < 0.5):
+        return (team_b, team_a)
+    return (team_a, team_b)
+
+
+def swiss_rounds(num_teams: int, top: int) -> int:
+    """ The default number of rounds of a Swiss-system first round.
+
+    log2(num_teams) rounds find the best team, another log2(top) rounds
+    separate the `top` best teams.
+    """
+    if num_teams < 2:
+        return 0
+    rounds = math.ceil(math.log2(num_teams)) + math.ceil(math.log2(max(min(top, num_teams), 1)))
+    return min(rounds, num_teams - 1)
+
+
+def swiss_pairings(teams, played, rng, *, rounds) -> List[Tuple]:
+    """ Returns the matches of the next round of a Swiss-system tournament
+    or an empty list after `rounds` rounds.
+
+    In every round each team plays one match (with an odd number of teams,
+    one of the lowest ranked teams sits out). Teams are paired with the
+    next team in the standings (by score, then rating) such that there are
+    no rematches in the round, if possible.
+    """
+    teams = list(teams)
+    per_round = len(teams) // 2
+    if per_round == 0 or len(played) // per_round >= rounds:
+        return []
+
+    ratings = fit_ratings(teams, played)
+    met = {frozenset(entry["match"]) for entry in played}
+    blue_games = Counter({team: 0 for team in teams})
+    blue_games.update(entry["match"][0] for entry in played)
+
+    shuffled = list(teams)
+    rng.shuffle(shuffled)
+    standings = sorted(shuffled, key=lambda team: (ratings[team].score, ratings[team].mu), reverse=True)
+    if len(standings) % 2:
+        # the lowest ranked team with the most games sits out
+        # (unless that makes a round without rematches impossible)
+        byes = sorted(reversed(standings), key=lambda team: ratings[team].games, reverse=True)
+    else:
+        byes = [None]
+
+    for bye in byes:
+        pairs = _pair_without_rematches([team for team in standings if team != bye], met, budget=[SWISS_SEARCH_BUDGET])
+        if pairs is not None:
+            break
+    else:
+        # every team has met all the others (or the search took too long):
+        # pair neighbours in the standings
+        remaining = [team for team in standings if team != byes[0]]
+        pairs = list(zip(remaining[::2], remaining[1::2]))
+
+    return [_orient(pair, blue_games, rng) for pair in pairs]
+
+
+def _pair_without_rematches(standings, met, budget):
+    # pairs the first team with the next possible team in the standings
+    # and backtracks if the remaining teams cannot be paired
+    if not standings:
+        return []
+    team, rest = standings[0], standings[1:]
+    for idx, other in enumerate(rest):
+        if frozenset((team, other)) in met:
+            continue
+        budget[0] -= 1
+        if budget[0] < 0:
+            return None
+        pairs = _pair_without_rematches(rest[:idx] + rest[idx + 1:], met, budget)
+        if pairs is not None:
+            return [(team, other), *pairs]
+    return None
+
+
+def adaptive_pairings(teams, played, rng, *, top, confidence, batch=1, max_matches=None) -> List[Tuple]:
+    """ Returns the next matches that tell the most about the `top` best
+    teams or an empty list if they are known with the given confidence
+    (see `top_confidence`).
+
+    The value of a match is its Fisher information (p (1 - p) for win
+    probability p) times the combined variance of the strengths, weighted
+    by how likely both teams are on the wrong side of the cut.
+    Up to `batch` matches with distinct teams are returned; a team that
+    played in the last match is only chosen if there is no alternative.
+
+    Parameters
+    ----------
+    teams : list of team ids
+    played : list of dicts
+        the played matches as in the tournament state
+    rng : Random
+        breaks ties between equally good pairings
+    top : int
+        the number of teams that should be separated from the rest
+    confidence : float
+        stop when this fraction of the `top` best rated teams is expected to be correct
+    batch : int
+        maximum number of matches to return
+    max_matches : int
+        stop after this many matches (default: the number of matches of a round robin)
+    """
+    teams = list(teams)
+    if max_matches is None:
+        max_matches = len(teams) * (len(teams) - 1) // 2
+    if len(played) >= max_matches:
+        return []
+
+    ratings = fit_ratings(teams, played)
+    if top_confidence(ratings, top) >= confidence:
+        return []
+    uncertainty = misclassification(ratings, top)
+
+    blue_games = Counter({team: 0 for team in teams})
+    blue_games.update(entry["match"][0] for entry in played)
+    last_match = set(played[-1]["match"]) if played else set()
+
+    def value(pair):
+        team_a, team_b = pair
+        rating_a, rating_b = ratings[team_a], ratings[team_b]
+        p = win_probability(rating_a.mu, rating_b.mu)
+        return (p * (1 - p) * (rating_a.sigma ** 2 + rating_b.sigma ** 2)
+                * (uncertainty[team_a] + uncertainty[team_b]))
+
+    candidates = list(itertools.combinations(teams, 2))
+    rng.shuffle(candidates)
+    # pairs without a team from the last match come first
+    candidates.sort(key=lambda pair: (not last_match.intersection(pair), value(pair)), reverse=True)
+
+    batch = min(batch, max_matches - len(played))
+    matches = []
+    busy = set()
+    for pair in candidates:
+        if len(matches) >= batch:
+            break
+        if busy.intersection(pair):
+            continue
+        busy.update(pair)
+        matches.append(_orient(pair, blue_games, rng))
+    return matches
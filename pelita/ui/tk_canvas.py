@@ -1,3 +1,4 @@
+import collections
 import logging
 import platform
 
@@ -21,6 +22,7 @@ from .. import layout
 from ..game import next_round_turn
 from ..gamestate_filters import in_homezone
 from ..team import _ensure_list_tuples
+from .tk_history import MAX_BYTES, GameHistory
 from .tk_sprites import (
     BLUE,
     GREY,
@@ -39,6 +41,11 @@ from .tk_sprites import (
 
 _logger = logging.getLogger(__name__)
 
+# Number of not yet rendered game states that are kept in the frame buffer
+# when rendering is decoupled from the game speed (see `render_fps`).
+# Older frames are dropped from the buffer but remain in the history.
+FRAME_BUFFER_SIZE = 32
+
 # Design variables
 #
 # The size of the status section on the bottom is generated automatically.
@@ -258,7 +265,7 @@ class Trafo:
 class TkApplication:
     def __init__(self, window, controller_address=None,
                  geometry=None, delay=1, stop_after=None, stop_after_kill=False,
-                 fullscreen=False, debug=False):
+                 fullscreen=False, debug=False, render_fps=None, history_max_bytes=MAX_BYTES):
         self.window = window
         self.window.configure(background="white")
 
@@ -291,7 +298,17 @@ class TkApplication:
         self.init_bot_sprites([None] * 4)
 
         self._game_state = {}
-        self.history = {}
+        # the most recent game state that we have received
+        # (may be ahead of self._game_state when frames are dropped)
+        self._observed_state = {}
+        self.history = GameHistory(max_bytes=history_max_bytes)
+
+        # When render_fps is given, observed game states are not drawn
+        # immediately but put in a bounded frame buffer. A separate render
+        # loop then only draws the newest frame at the given rate, so that
+        # slow rendering does not slow down the game itself.
+        self._render_fps = render_fps
+        self._frames = collections.deque(maxlen=FRAME_BUFFER_SIZE)
 
         self.ui_game_canvas = tkinter.Canvas(self.window)
         self.ui_game_canvas.configure(background="white", bd=0, highlightthickness=0, relief='flat')
@@ -403,12 +420,18 @@ class TkApplication:
         if self._stop_after is not None:
             self._delay = self._min_delay
         self._stop_after_kill = stop_after_kill
+        # The round up to which the game master is playing a batch
+        # of steps for us (or None)
+        self._batch_round = None
         # This will be set once we get data
         self._last_bot_was_killed = []
 
         self._check_speed_button_state()
 
-        self._observed_steps = set()
+        # pointer of the most recently observed step; game states arrive in order,
+        # so anything up to this pointer has already been requested
+        self._last_observed_pointer = None
+        self._observed_any = False
 
         self.running = True
 
@@ -429,6 +452,9 @@ class TkApplication:
         if self.controller_socket:
             self.window.after_idle(self.request_initial)
 
+        if self._render_fps:
+            self.window.after_idle(self.render_frame)
+
     def update(self, game_state=None, redraw=False):
         if game_state is not None:
             if self._game_state.get("shape") != game_state.get("shape"):
@@ -1155,6 +1181,19 @@ class TkApplication:
         self.running = not self.running
         if self.running:
             self.request_step()
+        elif self._batch_round is not None:
+            # stop the fast-forward
+            self.pause_batch()
+            self._stop_after = None
+            self._delay = self._stop_after_delay
+
+    def pause_batch(self):
+        """ Cancel the batch that the game master is playing for us. """
+        if self._batch_round is None:
+            return
+        _logger.debug('---> pause')
+        self.controller_socket.send_json({"__action__": "pause"})
+        self._batch_round = None
 
     def request_initial(self):
         if self.controller_socket:
@@ -1165,16 +1204,24 @@ class TkApplication:
         if not self.controller_socket:
             return
 
-        if self._game_state['gameover']:
+        if self._observed_state['gameover']:
             return
 
         if self._stop_after is not None:
-            next_step = next_round_turn(self._game_state)
+            next_step = next_round_turn(self._observed_state)
             if (next_step['round'] < self._stop_after):
-
-                _logger.debug('---> play_step')
-                self.controller_socket.send_json({"__action__": "play_step"})
+                # let the game master play up to the requested round on its own
+                if self._batch_round != self._stop_after:
+                    # the target has changed; the running batch must not play past it
+                    self.pause_batch()
+                    _logger.debug('---> play_until round %r', self._stop_after)
+                    self.controller_socket.send_json({"__action__": "play_until",
+                                                      "__data__": {"round": self._stop_after}})
+                    self._batch_round = self._stop_after
             else:
+                if self._batch_round != self._stop_after:
+                    self.pause_batch()
+                self._batch_round = None
                 self._stop_after = None
                 self.running = False
                 self._delay = self._stop_after_delay
@@ -1183,8 +1230,13 @@ class TkApplication:
             self.controller_socket.send_json({"__action__": "play_step"})
 
     def get_current_pointer(self):
-        GS = self._game_state
+        return self.get_pointer(self._game_state)
 
+    @staticmethod
+    def get_pointer(GS):
+        """
+        Get the history pointer for the given game state.
+        """
         # the game state might be empty;
         # happens before any message has been received
         if not GS:
@@ -1215,6 +1267,13 @@ class TkApplication:
         else:
             new = current - 1
 
+        if new not in self.history:
+            # this part of the history has been dropped
+            return
+
+        # pending frames would otherwise move us forward again
+        self._frames.clear()
+
         # set the currently displayed game state
         self._game_state = self.history[new]
 
@@ -1246,12 +1305,32 @@ class TkApplication:
             # we need to get it from the message queue
             self.request_step()
         else:
+            # pending frames would otherwise move us forward again
+            self._frames.clear()
             # set the currently displayed game state
             self._game_state = self.history[pointer]
 
         # update ui
         self.update()
 
+    def has_pending_frames(self):
+        """
+        Whether there are observed game states which have not been rendered yet.
+        """
+        return bool(self._frames)
+
+    def render_frame(self):
+        """
+        Draw the newest buffered frame and skip all older ones.
+
+        Reschedules itself to run `render_fps` times per second.
+        """
+        if self._frames:
+            game_state = self._frames[-1]
+            self._frames.clear()
+            self.update(game_state)
+        self.window.after(max(int(1000 / self._render_fps), 1), self.render_frame)
+
     def button_show_previous(self):
         # put game in pause automatically when pushing the button
         self.running = False
@@ -1266,11 +1345,11 @@ class TkApplication:
         if not self.controller_socket:
             return
 
-        if self._game_state['gameover']:
+        if self._observed_state['gameover']:
             return
 
-        if self._game_state['round'] is not None:
-            next_step = next_round_turn(self._game_state)
+        if self._observed_state['round'] is not None:
+            next_step = next_round_turn(self._observed_state)
             self._stop_after = next_step['round'] + 1
         else:
             self._stop_after = 1
@@ -1283,12 +1362,20 @@ class TkApplication:
         if standalone_mode:
             self.running = False
         else:
-            step = (game_state['round'], game_state['turn'])
-            if step in self._observed_steps:
+            pointer = self.get_pointer(game_state)
+            if not self._observed_any:
+                skip_request = False
+            elif pointer is None:
+                # another INIT state
+                skip_request = True
+            elif self._last_observed_pointer is not None and pointer <= self._last_observed_pointer:
                 skip_request = True
             else:
                 skip_request = False
-                self._observed_steps.add(step)
+
+            if not skip_request:
+                self._observed_any = True
+                self._last_observed_pointer = pointer
 
         # ensure walls, foods and bots positions are list of tuples
         game_state['walls'] = _ensure_list_tuples(game_state['walls'])
@@ -1309,7 +1396,12 @@ class TkApplication:
         if self._stop_after_kill and bot_was_killed:
             self.running = False
 
-        self.update(game_state)
+        self._observed_state = game_state
+        if self._render_fps:
+            # the render loop will pick up the newest frame
+            self._frames.append(game_state)
+        else:
+            self.update(game_state)
         if self._stop_after is not None:
             if self._stop_after == 0:
                 self._stop_after = None
@@ -0,0 +1,111 @@
+""" Bounded storage for the game states that the Tk viewer keeps for playback. """
+
+import collections
+import logging
+import pickle
+import zlib
+
+_logger = logging.getLogger(__name__)
+
+#: Number of most recent game states which are kept uncompressed
+KEEP_FULL = 64
+
+#: Default upper limit (in bytes) for the compressed part of the history
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class GameHistory:
+    """ Maps history pointers to game states with bounded memory usage.
+
+    The most recently stored `keep_full` game states are kept as they are,
+    so that stepping through the latest part of the game is cheap. Older
+    game states are pickled and zlib-compressed. As the walls rarely change
+    during a match, they are not stored with each compressed state but only
+    once per distinct maze.
+
+    When the compressed states exceed `max_bytes`, the oldest ones are
+    dropped and are no longer available for navigation.
+
+    Parameters
+    ----------
+    keep_full : int
+        Number of game states that are kept uncompressed
+    max_bytes : int or None
+        Memory cap for the compressed game states. None means no limit.
+    """
+    def __init__(self, keep_full=KEEP_FULL, max_bytes=MAX_BYTES):
+        self.keep_full = keep_full
+        self.max_bytes = max_bytes
+
+        # pointer -> game_state; in insertion order
+        self._full = collections.OrderedDict()
+        # pointer -> (walls_idx, compressed bytes); in insertion order
+        self._packed = collections.OrderedDict()
+        self._packed_bytes = 0
+        # walls_idx -> [walls, number of packed states using them]
+        self._walls = {}
+        self._next_walls_idx = 0
+
+    def __contains__(self, pointer):
+        return pointer in self._full or pointer in self._packed
+
+    def __len__(self):
+        return len(self._full) + len(self._packed)
+
+    def __getitem__(self, pointer):
+        try:
+            return self._full[pointer]
+        except KeyError:
+            pass
+        walls_idx, blob = self._packed[pointer]
+        game_state = pickle.loads(zlib.decompress(blob))
+        game_state['walls'] = self._walls[walls_idx][0]
+        return game_state
+
+    def __setitem__(self, pointer, game_state):
+        # a new game may reuse the pointers of an older one
+        self._discard(pointer)
+
+        self._full[pointer] = game_state
+        while len(self._full) > self.keep_full:
+            old_pointer, old_state = self._full.popitem(last=False)
+            self._pack(old_pointer, old_state)
+
+        if self.max_bytes is not None:
+            while self._packed and self._packed_bytes > self.max_bytes:
+                old_pointer = next(iter(self._packed))
+                _logger.debug("Dropping game state %r from history.", old_pointer)
+                self._discard(old_pointer)
+
+    def _discard(self, pointer):
+        self._full.pop(pointer, None)
+        packed = self._packed.pop(pointer, None)
+        if packed is not None:
+            walls_idx, blob = packed
+            self._packed_bytes -= len(blob)
+            self._walls[walls_idx][1] -= 1
+            if not self._walls[walls_idx][1]:
+                del self._walls[walls_idx]
+
+    def _walls_index(self, walls):
+        # compare with the most recent walls first
+        for idx, entry in reversed(self._walls.items()):
+            if entry[0] is walls or entry[0] == walls:
+                entry[1] += 1
+                return idx
+        idx = self._next_walls_idx
+        self._next_walls_idx += 1
+        self._walls[idx] = [walls, 1]
+        return idx
+
+    def _pack(self, pointer, game_state):
+        state = dict(game_state)
+        walls_idx = self._walls_index(state.pop('walls', None))
+        blob = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+        self._packed[pointer] = (walls_idx, blob)
+        self._packed_bytes += len(blob)
+
+    @property
+    def packed_bytes(self):
+        """ The number of bytes used by the compressed game states. """
+        return self._packed_bytes
@@ -64,6 +64,14 @@ class TkViewer:
     geometry: tuple, default = None
         The size (in pixel) of the game root window. None means
         using a bit less than the screen size.
+    render_fps : float, default = None
+        If given, rendering is decoupled from the game speed: the game
+        advances at its own pace and only the newest game state is drawn,
+        at most `render_fps` times per second. Skipped states are still
+        available in the history.
+    history_max_bytes : int, default = None
+        Memory cap for the compressed part of the playback history.
+        None uses the default of `GameHistory`.
 
     Attributes
     ----------
@@ -73,7 +81,7 @@ class TkViewer:
     """
     def __init__(self, address, controller_address=None, standalone_mode=False,
                        geometry=None, delay=1, stop_after=None, stop_after_kill=False,
-                       fullscreen=False, debug=False):
+                       fullscreen=False, debug=False, render_fps=None, history_max_bytes=None):
         self.address = address
         self.controller_address = controller_address
         self.delay = delay
@@ -83,6 +91,8 @@ class TkViewer:
         self.stop_after = stop_after
         self.stop_after_kill = stop_after_kill
         self.standalone_mode = standalone_mode
+        self.render_fps = render_fps
+        self.history_max_bytes = history_max_bytes
 
         self.context = zmq.Context()
         self.socket = self.context.socket(zmq.SUB)
@@ -95,6 +105,7 @@ class TkViewer:
         self.poll.register(self.socket, zmq.POLLIN)
 
         self._delay = 2
+        self._layout = None
 
     def run(self):
         try:
@@ -117,6 +128,10 @@ class TkViewer:
             # put the root window in some sensible position
             self.root.geometry(root_geometry+'+40+40')
 
+        history_args = {}
+        if self.history_max_bytes is not None:
+            history_args['history_max_bytes'] = self.history_max_bytes
+
         self.app = TkApplication(window=self.root,
                                  controller_address=self.controller_address,
                                  geometry=self.geometry,
@@ -124,7 +139,9 @@ class TkViewer:
                                  stop_after=self.stop_after,
                                  stop_after_kill=self.stop_after_kill,
                                  fullscreen=self.fullscreen,
-                                 debug=self.debug)
+                                 debug=self.debug,
+                                 render_fps=self.render_fps,
+                                 **history_args)
         # schedule next read
         self.root.after_idle(self.read_queue)
         try:
@@ -143,25 +160,23 @@ class TkViewer:
             self._delay = 100
         try:
             next_history_pointer = self.app.get_next_pointer()
-            if self.app.running and next_history_pointer in self.app.history:
+            if (self.app.running and next_history_pointer in self.app.history
+                and not self.app.has_pending_frames()):
                 # we are running in history, so just show the next game state
                 # in history until we run out of states
                 self.app.show_next()
+            elif self.render_fps:
+                # rendering happens in its own loop, so we can
+                # consume everything that has arrived in the meantime
+                self.read_message()
+                while self.poll.poll(0):
+                    self.read_message()
             else:
                 # read all events.
                 # if queue is empty, try again in a few ms
                 # we don’t want to block here and lock
                 # Tk animations
-                message = self.socket.recv_unicode(flags=zmq.NOBLOCK)
-                message = json.loads(message)
-
-                _logger.debug(message["__action__"])
-                # we currently don’t care about the action
-                game_state = message["__data__"]
-
-                if game_state:
-                    self.app.observe(game_state, self.standalone_mode)
-                    self.app.history[self.app.get_current_pointer()] = game_state
+                self.read_message()
             self._delay = 2
             self._after(2, self.read_queue)
         except zmq.Again:
@@ -173,6 +188,34 @@ class TkViewer:
             self._after(self._delay, self.read_queue)
             self._delay = self._delay * 2
 
+    def read_message(self):
+        """ Reads a single message from the socket and passes it to the app.
+
+        Raises zmq.Again if no message is waiting.
+        """
+        frames = self.socket.recv_multipart(flags=zmq.NOBLOCK)
+        # a publisher in split-layout mode sends [topic, message]
+        message = json.loads(frames[-1])
+
+        _logger.debug(message["__action__"])
+        if message["__action__"] == "layout":
+            # static part of the game; later states will be completed with it
+            self._layout = message["__data__"]
+            return
+
+        # we currently don’t care about the action
+        game_state = message["__data__"]
+
+        if game_state and len(frames) > 1:
+            if self._layout is None:
+                _logger.debug("No layout received yet. Dropping state.")
+                return
+            game_state.update(self._layout)
+
+        if game_state:
+            self.app.observe(game_state, self.standalone_mode)
+            self.app.history[self.app.get_pointer(game_state)] = game_state
+
     def _after(self, delay, fun, *args):
         """ Execute fun(*args) after delay milliseconds.
 
@@ -1,22 +1,23 @@
+import time
 from random import Random
 
 from .base_utils import default_rng
 from .game import SHADOW_DISTANCE, split_food
 from .gamestate_filters import manhattan_dist
 from .layout import BOT_N2I, initial_positions, parse_layout
-from .maze_generator import generate_maze
-from .team import create_homezones, make_bots
+from .team import LazyGraph, create_homezones, make_bots
 
 # this import is needed for backward compatibility, do not remove or you'll break
 # older clients!
-from .team import walls_to_graph  # isort: skip
+from .team import walls_to_graph  # isort: skip  # noqa: F401
 
 
 # this is a dumbed-down version of pelita.game.run_game, useful to be exposed to the
 # users to run background games. It hides most of the parameters of run_game which
 # are not relevant to the user in this setup and reformats the rest so that we
 # don't leak internal implementation details and indices.
-def run_background_game(*, blue_move, red_move, layout=None, max_rounds=300, seed=None):
+def run_background_game(*, blue_move, red_move, layout=None, max_rounds=300, seed=None,
+                        layout_store=None):
     """Run a pelita match.
 
     Parameters
@@ -45,6 +46,11 @@ def run_background_game(*, blue_move, red_move, layout=None, max_rounds=300, see
     seed : int
         seed used to initialize the random number generator.
 
+    layout_store : str
+        path to a layout store written by `pelita-layouts`. When layout is None
+        and a seed is given, the layout is loaded from the store instead of
+        being generated (if the store contains it).
+
 
     Returns
     -------
@@ -92,13 +98,18 @@ def run_background_game(*, blue_move, red_move, layout=None, max_rounds=300, see
     from .game import run_game
 
     # if the seed is not set explicitly, set it here
+    seed_given = seed is not None
     if seed is None:
         rng = Random()
         seed = rng.randint(1, 2**31)
     else:
         rng = Random(seed)
 
-    if layout is None:
+    if layout is None and layout_store is not None and seed_given:
+        from .layout_store import load_or_generate_layout
+        layout_dict = load_or_generate_layout(seed, rng=rng, store=layout_store)
+    elif layout is None:
+        from .maze_generator import generate_maze
         layout_dict = generate_maze(rng=rng)
     else:
         layout_dict = parse_layout(layout)
@@ -141,7 +152,7 @@ def shaded_food(pos, food, radius):
 
 
 def setup_test_game(*, layout, is_blue=True, round=None, score=None, seed=None,
-                    food=None, bots=None, is_noisy=None):
+                    food=None, bots=None, is_noisy=None, time_left=None):
     """Setup a test game environment useful for testing move functions.
 
     Parameters
@@ -179,6 +190,9 @@ def setup_test_game(*, layout, is_blue=True, round=None, score=None, seed=None,
     is_noisy : dict{"a": True, "b": False, "x": True, "y": False}
               Dict of bot names and booleans for the bots' is_noisy property.
 
+    time_left : float
+              seconds until the bot's deadline (see `Bot.time_left`). If None,
+              the bot has no deadline.
 
     Returns
     -------
@@ -199,6 +213,7 @@ def setup_test_game(*, layout, is_blue=True, round=None, score=None, seed=None,
 
 
     if layout is None:
+        from .maze_generator import generate_maze
         layout = generate_maze(rng=rng)
     else:
         layout = parse_layout(layout, food=food, bots=bots)
@@ -256,6 +271,62 @@ def setup_test_game(*, layout, is_blue=True, round=None, score=None, seed=None,
                     round=round,
                     bot_turn=0,
                     rng=rng,
-                    graph=walls_to_graph(layout['walls']))
+                    graph=LazyGraph(layout['walls']),
+                    deadline=None if time_left is None else time.monotonic() + time_left)
     return bot
 
+
+def iterative_deepening(search, bot, *, start=1, max_depth=None, reserve=0.0):
+    """Run `search` with increasing depth for as long as the bot has time left.
+
+    `search(depth)` is called with depth = start, start + 1, … The first
+    search is always run. Before each further search its duration is
+    predicted from the previous ones (assuming that every level takes as
+    much longer as the last one did), and the loop stops when the prediction
+    does not fit into `bot.time_left() - reserve`.
+
+    Parameters
+    ----------
+    search : callable
+        function `search(depth)` returning the result for the given depth
+    bot : Bot
+        the bot whose deadline is used
+    start : int
+        the first depth
+    max_depth : int
+        the maximum depth (unlimited if None)
+    reserve : float
+        seconds which are kept free for the rest of the move function
+
+    Returns
+    -------
+    (depth, result) : tuple
+        the deepest completed depth and its result
+
+    Example
+    -------
+    >>> def move(bot, state):
+    ...     depth, path = iterative_deepening(lambda depth: best_path(bot, depth), bot)
+    ...     return path[1]
+    """
+    depth = start
+    started = time.monotonic()
+    result = search(depth)
+    duration = time.monotonic() - started
+    previous_duration = None
+
+    while max_depth is None or depth < max_depth:
+        if previous_duration:
+            growth = max(duration / previous_duration, 1.0)
+        else:
+            growth = 2.0
+        if duration * growth > bot.time_left() - reserve:
+            break
+
+        started = time.monotonic()
+        next_result = search(depth + 1)
+        previous_duration, duration = duration, time.monotonic() - started
+        depth, result = depth + 1, next_result
+
+    return depth, result
+
@@ -0,0 +1,7 @@
+TEAM_NAME = "deadline checker"
+def move(b, s):
+    # the game runs with a timeout of 2 seconds
+    assert b.deadline is not None
+    assert 1 < b.time_left() < 2
+    assert b.enemy[0].deadline == b.deadline
+    return b.position
@@ -0,0 +1,24 @@
+import time
+
+TEAM_NAME = "ponder"
+
+def ponder(bot, state):
+    state['pondering'] = True
+    try:
+        while True:
+            state['steps'] += 1
+            yield
+    finally:
+        state['pondering'] = False
+
+def move(b, s):
+    # pondering is stopped before each move
+    assert not s.get('pondering')
+    if 'steps' in s:
+        # the team has pondered since its last move
+        assert s['steps'] > s['last_steps']
+    else:
+        s['steps'] = 0
+    s['last_steps'] = s['steps']
+    time.sleep(0.02)
+    return b.position
@@ -4,12 +4,15 @@ import inspect
 import itertools
 import os
 import sys
+import threading
+import time
 from contextlib import contextmanager
 from pathlib import Path
 from random import Random
 
-from pelita.network import RemotePlayerRecvTimeout
+from pelita.network import Controller, RemotePlayerRecvTimeout
 import pytest
+import zmq
 
 from pelita import game, layout, maze_generator
 from pelita.exceptions import NoFoodWarning, PelitaBotError
@@ -1411,3 +1414,122 @@ def test_replay_writer_writes_jsonl():
 
         # Check that records with new lines are correct
         assert replay_file.read_text().split("\n") == ['{"a":"\\n"}', '{"b":"\\r"}', '']
+
+
+def test_controller_play_until():
+    context = zmq.Context()
+    controller = Controller(zmq_context=context)
+    viewer = context.socket(zmq.DEALER)
+    viewer.connect(controller.socket_addr)
+
+    state = setup_game([stopping_player, stopping_player], layout_dict=parse_layout(small_layout), max_rounds=10)
+    state['controller'] = controller
+
+    played = []
+    def play(state):
+        while state['game_phase'] == 'RUNNING':
+            if game.controller_await(state):
+                break
+            state = play_turn(state)
+            played.append((state['round'], state['turn']))
+
+    def wait_for(n_turns):
+        t_end = time.monotonic() + 10
+        while len(played) < n_turns and time.monotonic() < t_end:
+            time.sleep(0.01)
+        # give the game the chance to play further (which it should not)
+        time.sleep(0.2)
+        return len(played)
+
+    thread = threading.Thread(target=play, args=(state,))
+    thread.start()
+    try:
+        # play the first two rounds without further requests
+        viewer.send_json({"__action__": "play_until", "__data__": {"round": 3}})
+        assert wait_for(8) == 8
+        assert played[-1] == (2, 3)
+
+        viewer.send_json({"__action__": "play_until", "__data__": {"steps": 3}})
+        assert wait_for(11) == 11
+
+        # single steps still work after a batch
+        viewer.send_json({"__action__": "play_step"})
+        assert wait_for(12) == 12
+
+        # an empty batch plays to the end
+        viewer.send_json({"__action__": "play_until", "__data__": {}})
+        thread.join(10)
+        assert not thread.is_alive()
+        assert played[-1] == (10, 3)
+    finally:
+        viewer.send_json({"__action__": "exit"})
+        thread.join()
+        context.destroy()
+
+
+def test_controller_pause():
+    context = zmq.Context()
+    controller = Controller(zmq_context=context)
+    viewer = context.socket(zmq.DEALER)
+    viewer.connect(controller.socket_addr)
+
+    def slow_player(bot, state):
+        time.sleep(0.02)
+        return bot.position
+
+    state = setup_game([slow_player, slow_player], layout_dict=parse_layout(small_layout), max_rounds=10)
+    state['controller'] = controller
+
+    played = []
+    def play(state):
+        while state['game_phase'] == 'RUNNING':
+            if game.controller_await(state):
+                break
+            state = play_turn(state)
+            played.append((state['round'], state['turn']))
+
+    def wait_until_stable():
+        # wait until no more turns are played
+        n_played = -1
+        while n_played != len(played):
+            n_played = len(played)
+            time.sleep(0.2)
+        return n_played
+
+    thread = threading.Thread(target=play, args=(state,))
+    thread.start()
+    try:
+        # a pause without a batch is ignored
+        viewer.send_json({"__action__": "pause"})
+        viewer.send_json({"__action__": "play_step"})
+        assert wait_until_stable() == 1
+
+        # a pause stops the batch
+        viewer.send_json({"__action__": "play_until", "__data__": {"round": 10}})
+        while len(played) < 3:
+            time.sleep(0.01)
+        viewer.send_json({"__action__": "pause"})
+        n_paused = wait_until_stable()
+        assert n_paused < 36
+
+        # a lower target replaces the running batch
+        viewer.send_json({"__action__": "play_until", "__data__": {"round": 10}})
+        while len(played) < n_paused + 2:
+            time.sleep(0.01)
+        target = played[-1][0] + 1
+        viewer.send_json({"__action__": "pause"})
+        viewer.send_json({"__action__": "play_until", "__data__": {"round": target}})
+        wait_until_stable()
+        assert played[-1] == (target - 1, 3)
+
+        # a single step during a batch ends the batch
+        viewer.send_json({"__action__": "play_until", "__data__": {"round": 10}})
+        while played[-1][0] < target + 1:
+            time.sleep(0.01)
+        viewer.send_json({"__action__": "play_step"})
+        assert wait_until_stable() < 36
+        assert thread.is_alive()
+    finally:
+        viewer.send_json({"__action__": "exit"})
+        thread.join()
+        context.destroy()
@@ -0,0 +1,119 @@
+from random import Random
+from types import SimpleNamespace
+
+import networkx as nx
+import pytest
+
+from pelita.grid_graph import GridGraph, NoPath
+from pelita.layout import parse_layout
+from pelita.maze_generator import generate_maze
+from pelita.scripts.pelita_player import team_from_module
+from pelita.team import LazyGraph, walls_to_graph
+
+
+def random_walls(seed):
+    rng = Random(seed)
+    width, height = rng.choice([(16, 8), (32, 16), (48, 24)])
+    walls = set(generate_maze(3, 10, width, height, rng=rng)['walls'])
+    # add a few random walls, which may disconnect the maze
+    for _ in range(5):
+        walls.add((rng.randrange(width), rng.randrange(height)))
+    return walls, (width, height), rng
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_grid_graph_matches_networkx(seed):
+    walls, shape, _rng = random_walls(seed)
+    nx_graph = walls_to_graph(walls, shape=shape)
+    graph = GridGraph(walls, shape=shape)
+
+    assert list(graph.nodes) == list(nx_graph.nodes)
+    assert len(graph) == len(nx_graph)
+    assert graph.edges == list(nx_graph.edges)
+    for node in nx_graph.nodes:
+        assert node in graph
+        assert graph.has_node(node)
+        assert list(graph.neighbors(node)) == list(nx_graph.neighbors(node))
+        assert graph.degree(node) == nx_graph.degree(node)
+    for wall in walls:
+        assert wall not in graph
+    assert (-1, 0) not in graph
+    assert 'abc' not in graph
+
+    converted = graph.to_networkx()
+    assert list(converted.nodes) == list(nx_graph.nodes)
+    assert list(converted.edges) == list(nx_graph.edges)
+
+
+@pytest.mark.parametrize('search', ['bfs', 'astar'])
+@pytest.mark.parametrize('seed', range(5))
+def test_grid_graph_shortest_paths(seed, search):
+    walls, shape, rng = random_walls(seed)
+    nx_graph = walls_to_graph(walls, shape=shape)
+    graph = GridGraph(walls, shape=shape, search=search)
+    nodes = list(nx_graph.nodes)
+
+    for _ in range(20):
+        source, target = rng.choice(nodes), rng.choice(nodes)
+        try:
+            length = nx.shortest_path_length(nx_graph, source, target)
+        except nx.NetworkXNoPath:
+            with pytest.raises(NoPath):
+                graph.shortest_path(source, target)
+            continue
+        path = graph.shortest_path(source, target)
+        assert len(path) == length + 1
+        assert path[0] == source and path[-1] == target
+        for pos, next_pos in zip(path, path[1:]):
+            assert nx_graph.has_edge(pos, next_pos)
+        assert graph.shortest_path_length(source, target) == length
+
+        distances = nx.single_source_shortest_path_length(nx_graph, source)
+        assert graph.shortest_path_length(source) == distances
+        assert dict(graph.bfs(source, depth_limit=3)) == {node: dist for node, dist in distances.items() if dist <= 3}
+
+    with pytest.raises(KeyError):
+        graph.shortest_path((0, 0), nodes[0])
+
+
+def test_grid_graph_distance_matrix():
+    walls, shape, _rng = random_walls(0)
+    nx_graph = walls_to_graph(walls, shape=shape)
+    graph = GridGraph(walls, shape=shape)
+    matrix = graph.distance_matrix()
+    for source, distances in nx.all_pairs_shortest_path_length(nx_graph):
+        row = matrix[graph.index[source]]
+        for target in nx_graph.nodes:
+            assert row[graph.index[target]] == distances.get(target, -1)
+
+
+def test_grid_graph_custom_search():
+    layout = parse_layout("""
+    ########
+    #a x   #
+    #b y   #
+    ########
+    """)
+    calls = []
+    def search(graph, source, target):
+        calls.append((graph.coords[source], graph.coords[target]))
+        return [source, target]
+    graph = GridGraph(layout['walls'], search=search)
+    assert graph.shortest_path((1, 1), (1, 2)) == [(1, 1), (1, 2)]
+    assert calls == [((1, 1), (1, 2))]
+
+
+def test_team_selects_grid_graph():
+    def move(bot, state):
+        return bot.position
+
+    team = team_from_module(SimpleNamespace(move=move, TEAM_NAME='grid', GRAPH='grid'))
+    assert team._graph_kind == 'grid'
+    team = team_from_module(SimpleNamespace(move=move, TEAM_NAME='nx'))
+    assert team._graph_kind == 'networkx'
+    with pytest.raises(ValueError):
+        team_from_module(SimpleNamespace(move=move, TEAM_NAME='bad', GRAPH='igraph'))
+
+    walls = ((0, 0), (0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2))
+    assert isinstance(LazyGraph(walls, kind='grid').get(), GridGraph)
+    assert isinstance(LazyGraph(walls).get(), nx.Graph)
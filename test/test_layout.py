@@ -6,7 +6,9 @@ import pytest
 
 from pelita.scripts.pelita_main import w_h_string
 from pelita.layout import (BOT_N2I, get_legal_positions, layout_as_str,
-                           parse_layout, wall_dimensions)
+                           layout_from_bytes, layout_to_bytes, parse_layout,
+                           parse_layout_array, wall_dimensions)
+from pelita.maze_generator import generate_maze
 
 
 def test_legal_layout():
@@ -456,3 +458,107 @@ def test_layout_spec(spec, check):
             assert w_h_string(spec)
     else:
         assert w_h_string(spec) == check
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('size', [(16, 8), (32, 16), (64, 32)])
+def test_parse_layout_array_generated(seed, size):
+    width, height = size
+    layout = generate_maze(trapped_food=3, total_food=10, width=width, height=height, rng=seed)
+    layout_str = layout_as_str(**layout)
+    assert parse_layout_array(layout_str) == parse_layout(layout_str) == layout
+
+    food = [(1, 1), (width - 2, height - 2)]
+    bots = {'y': (1, 1)}
+    assert parse_layout_array(layout_str, food=food, bots=bots) == parse_layout(layout_str, food=food, bots=bots)
+
+
+@pytest.mark.parametrize('layout_str, kwargs', [
+    ("""
+     ########
+     #a  . y#
+     #bx ...#
+     ########
+     """, {}),
+    # unknown character
+    ("""
+     ########
+     #a  ? y#
+     #bx ...#
+     ########
+     """, {}),
+    ("""
+     ########
+     #a  ä y#
+     #bx ...#
+     ########
+     """, {}),
+    # bot twice
+    ("""
+     ########
+     #a  a y#
+     #bx ...#
+     ########
+     """, {}),
+    # missing bot
+    ("""
+     ########
+     #a    y#
+     # x ...#
+     ########
+     """, {}),
+    ("""
+     ########
+     #a    y#
+     # x ...#
+     ########
+     """, {'strict': False}),
+    ("""
+     ########
+     #a    y#
+     # x ...#
+     ########
+     """, {'bots': {'b': (1, 2)}}),
+    # broken walls
+    ("""
+     ########
+     #a    y
+     #bx ...#
+     ########
+     """, {}),
+    # food on a wall
+    ("""
+     ########
+     #a    y#
+     #bx ...#
+     ########
+     """, {'food': [(0, 0)]}),
+    ("", {}),
+])
+def test_parse_layout_array_equivalence(layout_str, kwargs):
+    try:
+        expected = parse_layout(layout_str, **kwargs)
+    except ValueError as e:
+        with pytest.raises(ValueError) as exc_info:
+            parse_layout_array(layout_str, **kwargs)
+        assert str(exc_info.value) == str(e)
+    else:
+        assert parse_layout_array(layout_str, **kwargs) == expected
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('size', [(16, 8), (32, 16), (30, 15)])
+def test_layout_bytes_roundtrip(seed, size):
+    width, height = size
+    layout = generate_maze(trapped_food=3, total_food=10, width=width, height=height, rng=seed)
+    data = layout_to_bytes(layout)
+    assert layout_from_bytes(data) == layout
+    # walls are bit-packed
+    assert len(data) < width * height // 8 + 4 * (len(layout['food']) + 4) + 16
+
+    # missing bots survive the roundtrip
+    layout['bots'][1] = None
+    assert layout_from_bytes(layout_to_bytes(layout)) == layout
+
+    with pytest.raises(ValueError):
+        layout_from_bytes(b'XXXX' + data[4:])
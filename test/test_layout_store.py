@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from pelita.layout_store import LayoutStore, generate_layouts, load_or_generate_layout, write_store
+from pelita.maze_generator import generate_maze
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_store_roundtrip(tmp_path, processes):
+    path = tmp_path / 'layouts.store'
+    records = generate_layouts(range(5), sizes=['small', 'normal'], foods=[None, (3, 12)], processes=processes)
+    write_store(path, records)
+
+    store = LayoutStore(path)
+    assert len(store) == 5 * 2 * 2
+    assert store.seeds('small') == [0, 1, 2, 3, 4]
+    assert store.seeds((24, 12), food=(3, 12)) == [0, 1, 2, 3, 4]
+    assert store.seeds('big') == []
+
+    for seed in range(5):
+        for size, (width, height) in [('small', (24, 12)), ('normal', (32, 16))]:
+            for food in [None, (3, 12)]:
+                if food is None:
+                    trapped_food, total_food = {'small': (5, 15), 'normal': (10, 30)}[size]
+                else:
+                    trapped_food, total_food = food
+                rng_generated = random.Random(seed)
+                expected = generate_maze(trapped_food=trapped_food, total_food=total_food,
+                                         width=width, height=height, rng=rng_generated)
+                rng_loaded = random.Random(seed)
+                loaded = store.load_layout(seed, size, food=food, rng=rng_loaded)
+                assert loaded == expected
+                # the rng has been advanced as if the layout had been generated
+                assert rng_loaded.getstate() == rng_generated.getstate()
+
+
+def test_load_or_generate(tmp_path):
+    path = tmp_path / 'layouts.store'
+    write_store(path, generate_layouts([1], processes=1))
+    store = LayoutStore(path)
+
+    with pytest.raises(KeyError):
+        store.load_layout(2)
+
+    for seed in [1, 2]:
+        rng = random.Random(seed)
+        layout = load_or_generate_layout(seed, rng=rng, store=path)
+        rng_generated = random.Random(seed)
+        assert layout == generate_maze(rng=rng_generated)
+        assert rng.random() == rng_generated.random()
+
+
+def test_not_a_store(tmp_path):
+    path = tmp_path / 'layout.txt'
+    path.write_text('########\n')
+    with pytest.raises(ValueError):
+        LayoutStore(path)
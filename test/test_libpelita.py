@@ -2,12 +2,14 @@ import re
 import subprocess
 import sys
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
 from pelita.network import RemotePlayerFailure
 from pelita.scripts.pelita_tournament import firstNN
-from pelita.tournament import call_pelita, check_team
+from pelita.tournament import call_pelita, capture_thread_output, check_team, run_match
 
 _mswindows = (sys.platform == "win32")
 
@@ -67,6 +69,54 @@ def test_bad_seeds(seed, success):
                 call_pelita(teams, rounds=rounds, viewer=viewer, size=size, seed=seed)
 
 
+def test_run_match():
+    teams = ["pelita/player/SmartEatingPlayer", "pelita/player/StoppingPlayer"]
+    result = run_match(teams, rounds=30, viewer='null', size='tiny', seed=12)
+    assert result.final_state['gameover'] is True
+    assert "Finished" in result.stdout
+    # the player output is captured
+    assert len(result.team_output) == 2
+
+    # the same match as in a pelita_main subprocess
+    (state, _stdout, _stderr) = call_pelita(teams, rounds=30, viewer='null', size='tiny', seed=12)
+    for key in ['bots', 'score', 'whowins', 'round', 'food', 'team_names']:
+        assert result.final_state[key] == state[key]
+
+    with pytest.raises(ValueError):
+        run_match(teams, rounds=2, viewer='null', size='tiny', seed="1.0")
+
+def test_run_match_exit_flag():
+    teams = ["pelita/player/StoppingPlayer", "pelita/player/StoppingPlayer"]
+    exit_flag = threading.Event()
+    exit_flag.set()
+    result = run_match(teams, rounds=30, viewer='null', size='tiny', seed=1, exit_flag=exit_flag)
+    assert result.final_state is None
+
+def test_run_match_threads():
+    teams = ["pelita/player/StoppingPlayer", "pelita/player/SmartEatingPlayer"]
+    def play(seed):
+        return run_match(teams, rounds=5, viewer='null', size='tiny', seed=seed)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(play, range(3)))
+    for result in results:
+        assert result.final_state['gameover'] is True
+        # every match has only its own output
+        assert result.stdout.count("Finished") == 1
+
+def test_capture_thread_output():
+    def write(text):
+        with capture_thread_output() as (stdout, stderr):
+            print(text)
+            print(text, file=sys.stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outputs = list(executor.map(write, map(str, range(8))))
+    assert outputs == [(f"{i}\n", f"{i}\n") for i in range(8)]
+    assert sys.stdout.__class__.__name__ != '_ThreadStream'
+
+
 def test_check_team_external():
     assert check_team("pelita/player/StoppingPlayer") == "Stopping Players"
 
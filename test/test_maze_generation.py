@@ -370,3 +370,71 @@ def test_reproducer_for_issue_893():
     trapped_food = 0
     ld = mg.generate_maze(trapped_food, total_food, width, height, rng = SEED)
     assert len(ld['walls']) >= (2*width + 2*(height-2))
+
+@pytest.mark.parametrize('iteration', range(20))
+def test_tile_graph_matches_networkx(iteration):
+    rng = Random(SEED + iteration)
+    width, height = rng.choice([(16, 8), (32, 16), (48, 24), (20, 11)])
+    ld = mg.generate_maze(width=width, height=height, trapped_food=3, total_food=10, rng=rng)
+    shape = (width // 2, height)
+    # only take the left half of the maze, so that there are articulation points
+    walls = {pos for pos in ld['walls'] if pos[0] < width // 2}
+
+    nx_graph = pt.walls_to_graph(walls, shape=shape)
+    tile_graph = mg.TileGraph.from_walls(walls, shape)
+
+    assert set(tile_graph.nodes) == set(nx_graph.nodes)
+    assert tile_graph.is_connected() == nx.is_connected(nx_graph)
+
+    nx_components = sorted(sorted(component) for component in nx.biconnected_components(nx_graph))
+    tile_components = sorted(sorted(tile_graph.nodes[idx] for idx in component)
+                             for component in tile_graph.biconnected_components())
+    assert tile_components == nx_components
+
+@pytest.mark.parametrize('iteration', range(10))
+def test_maze_metrics(iteration):
+    seed = SEED + iteration
+    width, height = Random(seed).choice([(16, 8), (32, 16), (48, 24)])
+    trapped_food, total_food = 3, 10
+    layout, metrics = mg.generate_maze_with_metrics(trapped_food, total_food, width, height, rng=Random(seed))
+    # without thresholds we get the same maze as with generate_maze
+    assert layout == mg.generate_maze(trapped_food, total_food, width, height, rng=Random(seed))
+    assert set(metrics) == set(mg.WALL_METRICS) | set(mg.FOOD_METRICS)
+
+    # compare with the metrics computed on the full maze with networkx
+    graph = pt.walls_to_graph(layout['walls'], shape=layout['shape'])
+    dead_ends = [node for node in graph if graph.degree(node) == 1]
+    assert metrics['dead_end_ratio'] == pytest.approx(len(dead_ends) / len(graph))
+
+    x_border = width // 2 - 1
+    gaps = [y for y in range(height) if (x_border, y) not in layout['walls']]
+    assert metrics['border_gaps'] == len(gaps)
+
+    a, _x, b, _y = layout['bots']
+    distances = {}
+    for bot in (a, b):
+        for node, dist in nx.single_source_shortest_path_length(graph, bot).items():
+            distances[node] = min(dist, distances.get(node, dist))
+    enemy_food = [distances[pos] for pos in layout['food'] if pos[0] >= width // 2]
+    home_food = [distances[pos] for pos in layout['food'] if pos[0] < width // 2]
+    assert metrics['enemy_food_min_distance'] == min(enemy_food)
+    assert metrics['enemy_food_mean_distance'] == pytest.approx(sum(enemy_food) / len(enemy_food))
+    assert metrics['home_food_mean_distance'] == pytest.approx(sum(home_food) / len(home_food))
+    assert 0 <= metrics['chamber_food_share'] <= 1
+
+def test_maze_metrics_thresholds():
+    thresholds = {
+        'dead_end_ratio': (None, 0.05),
+        'enemy_food_min_distance': (20, None),
+    }
+    rng = Random(SEED)
+    for _ in range(5):
+        _layout, metrics = mg.generate_maze_with_metrics(rng=rng, thresholds=thresholds)
+        assert metrics['dead_end_ratio'] <= 0.05
+        assert metrics['enemy_food_min_distance'] >= 20
+
+    with pytest.raises(ValueError, match='Unknown'):
+        mg.generate_maze_with_metrics(rng=rng, thresholds={'no_metric': (0, 1)})
+
+    with pytest.raises(ValueError, match='No maze'):
+        mg.generate_maze_with_metrics(rng=rng, thresholds={'border_gaps': (100, None)}, max_tries=3)
@@ -1,7 +1,9 @@
 
 import concurrent.futures
+import json
 import queue
 import sys
+import time
 import uuid
 import traceback
 
@@ -9,7 +11,7 @@ import pytest
 import zmq
 
 from pelita.game import play_turn, setup_game
-from pelita.network import bind_socket
+from pelita.network import ZMQPublisher, bind_socket
 from pelita.scripts.pelita_player import player_handle_request
 from pelita.team import make_team
 
@@ -117,7 +119,11 @@ def test_client_protocol(zmq_context):
     sock.send_json(get_move)
     player_handle_request(client_sock, poller, team)
 
-    assert sock.recv_json() == {
+    reply = sock.recv_json()
+    # the player reports how long it needed for the move
+    duration = reply['__return__'].pop('duration')
+    assert 0 <= duration < 1
+    assert reply == {
         '__uuid__': _uuid,
         '__return__': {
             "move": [1, 1],
@@ -349,3 +355,106 @@ def test_client_broken(zmq_context, checkpoint):
         # check that no player had an uncaught exception
         for player in concurrent.futures.as_completed(players):
             assert player.exception() is None, traceback.print_exception(player.exception(), limit=None, file=None, chain=True)
+
+
+def _publisher_state(round, gameover=False):
+    return {'round': round, 'turn': 0, 'gameover': gameover,
+            'walls': [(0, 0), (0, 1)], 'shape': (2, 2), 'layout_name': 'test', 'bots': [(1, 1)] * 4}
+
+def _subscriber(zmq_context, address, hwm=None):
+    sub = zmq_context.socket(zmq.SUB)
+    if hwm is not None:
+        sub.setsockopt(zmq.RCVHWM, hwm)
+    sub.setsockopt_unicode(zmq.SUBSCRIBE, "")
+    sub.connect(address)
+    return sub
+
+def test_publisher_default(zmq_context):
+    address = "inproc://pelita-test-publisher-%s" % uuid.uuid4()
+    pub = ZMQPublisher(address, zmq_context=zmq_context)
+    sub = _subscriber(zmq_context, address)
+    # we cannot know when the subscription has arrived
+    for _ in range(100):
+        pub.show_state(_publisher_state(1))
+        if sub.poll(10):
+            break
+    frames = sub.recv_multipart()
+    assert len(frames) == 1
+    message = json.loads(frames[0])
+    assert message['__action__'] == 'observe'
+    assert message['__data__']['walls'] == [[0, 0], [0, 1]]
+    sub.close()
+    pub.socket.close()
+
+def test_publisher_split_layout(zmq_context):
+    address = "inproc://pelita-test-publisher-%s" % uuid.uuid4()
+    pub = ZMQPublisher(address, zmq_context=zmq_context, split_layout=True)
+    pub.show_state(_publisher_state(1))
+
+    sub = _subscriber(zmq_context, address)
+    # wait for the subscription
+    assert pub.socket.poll(1000, zmq.POLLIN)
+    # the layout is re-sent for the new subscriber
+    pub.show_state(_publisher_state(2))
+
+    topic, layout = sub.recv_multipart()
+    assert topic == b'layout'
+    layout = json.loads(layout)
+    assert layout['__action__'] == 'layout'
+    assert layout['__data__'] == {'walls': [[0, 0], [0, 1]], 'shape': [2, 2], 'layout_name': 'test'}
+
+    topic, state = sub.recv_multipart()
+    assert topic == b'state'
+    state = json.loads(state)
+    assert state['__data__']['round'] == 2
+    assert 'walls' not in state['__data__']
+
+    # the layout is not sent again
+    pub.show_state(_publisher_state(3))
+    topic, state = sub.recv_multipart()
+    assert topic == b'state'
+    assert json.loads(state)['__data__']['round'] == 3
+    sub.close()
+    pub.socket.close()
+
+def test_publisher_conflate(zmq_context):
+    # zmq conflates the queues of tcp connections
+    pub = ZMQPublisher("tcp://127.0.0.1", zmq_context=zmq_context, conflate=True)
+    stalled = _subscriber(zmq_context, pub.socket_addr, hwm=1)
+    reading = _subscriber(zmq_context, pub.socket_addr)
+    # we cannot know when the subscriptions have arrived
+    for _ in range(100):
+        pub.show_state(_publisher_state(0))
+        if stalled.poll(10) and reading.poll(10):
+            break
+    while reading.poll(10):
+        reading.recv()
+
+    # one subscriber does not read; this must neither block the
+    # publisher nor starve the other subscriber
+    received = []
+    t_start = time.monotonic()
+    for round in range(1, 201):
+        pub.show_state(_publisher_state(round, gameover=(round == 200)))
+        while reading.poll(0):
+            received.append(json.loads(reading.recv())['__data__']['round'])
+    assert time.monotonic() - t_start < 2
+    while received[-1:] != [200] and reading.poll(1000):
+        received.append(json.loads(reading.recv())['__data__']['round'])
+    # the reading subscriber gets the final state
+    assert received[-1] == 200
+    assert received == sorted(received)
+
+    # the stalled subscriber skips states but gets the final state in the end
+    stalled_received = []
+    while stalled_received[-1:] != [200] and stalled.poll(1000):
+        stalled_received.append(json.loads(stalled.recv())['__data__']['round'])
+    assert stalled_received[-1] == 200
+    assert len(stalled_received) < 200
+    stalled.close()
+    reading.close()
+    pub.socket.close()
+
+def test_publisher_conflate_split_layout(zmq_context):
+    with pytest.raises(ValueError):
+        ZMQPublisher("tcp://127.0.0.1", zmq_context=zmq_context, conflate=True, split_layout=True)
@@ -5,7 +5,8 @@ from pathlib import Path
 
 import pytest
 
-from pelita.scripts.pelita_player import load_team, load_team_from_module, sanitize_team_name
+from pelita.scripts.pelita_player import (files_fingerprint, hash_files, load_team, load_team_from_module,
+                                          sanitize_team_name)
 
 _mswindows = (sys.platform == "win32")
 
@@ -200,3 +201,35 @@ def test_load_team(team_spec, expected):
             load_team(team_spec)
     else:
         load_team(team_spec)
+
+
+def test_player_does_not_import_heavy_modules():
+    # pelita-player is started for every game; it should not pay for networkx etc.
+    import subprocess
+    code = ("import sys, pelita.scripts.pelita_player, pelita.utils; "
+            "print(' '.join(m for m in ['networkx', 'numpy', 'rich', 'zeroconf'] if m in sys.modules))")
+    res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert res.stdout.strip() == ""
+
+
+def test_hash_files_and_fingerprint(tmp_path):
+    import hashlib
+    import os
+    paths = []
+    for i in range(20):
+        path = tmp_path / f"mod{i}.py"
+        path.write_text(f"x = {i}\n" * i)
+        paths.append(str(path))
+
+    # the files are read in parallel but hashed in order
+    assert hash_files(paths) == hashlib.sha1("".join(Path(p).read_text() for p in paths).encode()).hexdigest()
+
+    fingerprint = files_fingerprint(paths)
+    assert files_fingerprint(paths) == fingerprint
+    assert files_fingerprint(paths[::-1]) != fingerprint
+
+    stat = os.stat(paths[3])
+    os.utime(paths[3], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert files_fingerprint(paths) != fingerprint
+
+    assert files_fingerprint(paths + [str(tmp_path / "missing.py")]) is None
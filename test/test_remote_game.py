@@ -97,6 +97,27 @@ def test_remote_timeout(dummy_layout_dict):
     assert state['fatal_errors'][1][0]['turn'] == 1
     assert state['fatal_errors'][1][0]['round'] == 1
 
+def test_remote_deadline(dummy_layout_dict):
+    # the remote bots see a deadline within the timeout
+    deadline = FIXTURE_DIR / 'remote_deadline.py'
+
+    state = pelita.game.run_game([str(deadline), str(deadline)],
+                                 max_rounds=3,
+                                 layout_dict=dummy_layout_dict,
+                                 timeout_length=2)
+
+    assert state['fatal_errors'] == [[], []]
+
+def test_remote_ponder(dummy_layout_dict):
+    # the remote teams ponder while the other bots move
+    ponder = FIXTURE_DIR / 'remote_ponder.py'
+
+    state = pelita.game.run_game([str(ponder), str(ponder)],
+                                 max_rounds=4,
+                                 layout_dict=dummy_layout_dict)
+
+    assert state['fatal_errors'] == [[], []]
+
 def test_remote_dumps_are_written(dummy_layout_dict):
 
     blue = FIXTURE_DIR / 'remote_dumps_are_written_blue.py'
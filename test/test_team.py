@@ -1,12 +1,14 @@
+import time
 
 import networkx
 import pytest
 
-from pelita.game import SHADOW_DISTANCE, play_turn, run_game, setup_game
+from pelita.game import SHADOW_DISTANCE, play_turn, prepare_bot_state, run_game, setup_game
 from pelita.gamestate_filters import manhattan_dist
 from pelita.layout import initial_positions, parse_layout
 from pelita.maze_generator import generate_maze
 from pelita.exceptions import PelitaBotError
+from pelita.team import DEADLINE_MARGIN, BotTrack, FoodView, Team
 
 @pytest.fixture
 def dummy_layout():
@@ -45,6 +47,40 @@ def mk_round_counting_team():
     team._storage = storage_copy
     return team
 
+def test_bot_track():
+    track = BotTrack()
+    assert len(track) == 0
+    assert track.view() == []
+
+    for pos in [(1, 1), (1, 2), (300, 400)]:
+        track.append(pos)
+    view = track.view()
+    assert view == [(1, 1), (1, 2), (300, 400)]
+    assert len(view) == 3
+    assert view[0] == (1, 1)
+    assert view[-1] == (300, 400)
+    assert view[-2] == (1, 2)
+    with pytest.raises(IndexError):
+        view[3]
+    assert view[1:] == [(1, 2), (300, 400)]
+    assert (1, 2) in view
+    assert [1, 2] in view
+    assert (2, 1) not in view
+    assert view + [(5, 5)] == [(1, 1), (1, 2), (300, 400), (5, 5)]
+    assert repr(view) == repr([(1, 1), (1, 2), (300, 400)])
+
+    # a view does not change when the track grows
+    track.append((2, 2))
+    assert view == [(1, 1), (1, 2), (300, 400)]
+    assert track.view()[-1] == (2, 2)
+
+    # a reset starts a new segment
+    track.reset()
+    assert len(track) == 0
+    track.append((7, 8))
+    assert track.view() == [(7, 8)]
+    assert view == [(1, 1), (1, 2), (300, 400)]
+
 def test_round_counting():
     test_layout = (
     """ ############
@@ -437,6 +473,190 @@ def test_bot_attributes():
     # check that all is good
     assert state['fatal_errors'] == [[], []]
 
+def test_bot_lazy_attributes():
+    test_layout = """
+        ##########
+        #a  .  .y#
+        #b #..# x#
+        ##########
+    """
+
+    def lazy_team(bot, state):
+        # enemy bots are only created when they are needed
+        assert 'enemy' not in bot._view._bots
+        assert bot._legal_positions is None
+        assert bot.legal_positions == [bot.position] + [pos for pos in bot.legal_positions[1:]]
+        assert set(bot.legal_positions) == {
+            pos for pos in [(bot.position[0] + dx, bot.position[1] + dy)
+                            for dx, dy in [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)]]
+            if pos not in bot.walls
+        }
+        assert bot.enemy[0].enemy[0] is bot._team[0]
+        assert 'enemy' in bot._view._bots
+        # the food is shared between the bots
+        assert bot.food is bot.other.food
+        assert bot.enemy[0].food is bot.enemy[1].food
+        # bots do not have a __dict__
+        with pytest.raises(AttributeError):
+            bot.some_attribute = 1
+        return bot.position
+
+    state = run_game([lazy_team, lazy_team], max_rounds=2, layout_dict=parse_layout(test_layout))
+    assert state['fatal_errors'] == [[], []]
+
+def test_bot_deadline():
+    test_layout = """
+        ##########
+        #a  .  .y#
+        #b #..# x#
+        ##########
+    """
+
+    def deadline_team(bot, state):
+        assert bot.deadline is not None
+        assert bot.deadline == bot.other.deadline
+        # the deadline lies before the end of the timeout
+        assert 0.5 < bot.time_left() <= 1 - DEADLINE_MARGIN
+        return bot.position
+
+    state = run_game([deadline_team, deadline_team], max_rounds=2, timeout_length=1,
+                     layout_dict=parse_layout(test_layout))
+    assert state['fatal_errors'] == [[], []]
+
+    def no_time_left(bot, state):
+        assert bot.time_left() == 0
+        return bot.position
+
+    # the transport delay is subtracted from the deadline
+    state = setup_game([no_time_left, no_time_left], max_rounds=2, timeout_length=0.3,
+                       layout_dict=parse_layout(test_layout))
+    state['turn'] = 0
+    state['round'] = 1
+    team = state['teams'][0]
+    assert 'error' not in team.get_move(dict(prepare_bot_state(state), transport_delay=0.3))
+
+    # the deadline is counted from the arrival of a request that had to wait
+    def deadline_from_arrival(bot, state):
+        assert bot.deadline < received + 1
+        return bot.position
+
+    state = setup_game([deadline_from_arrival, deadline_from_arrival], max_rounds=2, timeout_length=1,
+                       layout_dict=parse_layout(test_layout))
+    state['turn'] = 0
+    state['round'] = 1
+    team = state['teams'][0]
+    received = time.monotonic() - 0.5
+    assert 'error' not in team.get_move(prepare_bot_state(state), received=received)
+
+def test_team_ponder():
+    test_layout = """
+        ##########
+        #a  .  .y#
+        #b #..# x#
+        ##########
+    """
+    state = setup_game([stopping, stopping], max_rounds=2, layout_dict=parse_layout(test_layout))
+    state['turn'] = 0
+    state['round'] = 1
+    initial_state = {'seed': 0, 'walls': state['walls'], 'shape': state['shape']}
+
+    def move(bot, state):
+        state['moves'] = state.get('moves', 0) + 1
+        return bot.position
+
+    def ponder_gen(bot, state):
+        try:
+            for step in range(3):
+                state['steps'] = step
+                yield
+        finally:
+            state['closed'] = True
+
+    team = Team(move, ponder=ponder_gen)
+    team.set_initial(0, initial_state)
+    # nothing to ponder before the first move
+    assert not team.ponder_step()
+    team.get_move(prepare_bot_state(state))
+    assert team.ponder_step()
+    assert team.ponder_step()
+    assert team._state == {'moves': 1, 'steps': 1}
+    # a new move stops the pondering
+    team.get_move(prepare_bot_state(state))
+    assert team._state == {'moves': 2, 'steps': 1, 'closed': True}
+    # pondering runs to the end
+    assert [team.ponder_step() for _ in range(5)] == [True, True, True, False, False]
+    assert team._state['steps'] == 2
+
+    bots = []
+    def ponder_fn(bot, state):
+        bots.append(bot)
+
+    team = Team(move, ponder=ponder_fn)
+    team.set_initial(0, initial_state)
+    team.get_move(prepare_bot_state(state))
+    # a plain function is called once
+    assert not team.ponder_step()
+    assert not team.ponder_step()
+    assert [bot.position for bot in bots] == [state['bots'][0]]
+
+    def ponder_fail(bot, state):
+        yield
+        raise ValueError()
+
+    team = Team(move, ponder=ponder_fail)
+    team.set_initial(0, initial_state)
+    team.get_move(prepare_bot_state(state))
+    # an exception ends the pondering but not the game
+    assert team.ponder_step()
+    assert not team.ponder_step()
+    assert 'error' not in team.get_move(prepare_bot_state(state))
+
+    with pytest.raises(TypeError):
+        Team(move, ponder=1)
+
+def test_food_view():
+    positions = [(3, 1), (1, 2), (2, 1)]
+    food = FoodView([list(pos) for pos in positions])
+    # keeps the order
+    assert list(food) == positions
+    assert food == positions
+    assert food == tuple(positions)
+    assert food == set(positions)
+    assert food == FoodView(positions)
+    assert food != positions[::-1]
+    assert len(food) == 3
+    assert food[0] == (3, 1)
+    assert food[-1] == (2, 1)
+    assert (1, 2) in food
+    assert [1, 2] in food
+    assert (2, 2) not in food
+    assert repr(food) == repr(positions)
+
+    # list compatibility
+    assert food + [(5, 5)] == positions + [(5, 5)]
+    assert [(5, 5)] + food == [(5, 5)] + positions
+    assert food + food == positions + positions
+    copy = food[:]
+    copy.remove((1, 2))
+    assert copy == [(3, 1), (2, 1)]
+    assert food == positions
+    assert food.copy() == positions
+    assert food.index((1, 2)) == 1
+    assert sorted(food) == sorted(positions)
+
+    # set operations
+    assert food & {(1, 2), (9, 9)} == {(1, 2)}
+    assert {(1, 2), (9, 9)} & food == {(1, 2)}
+    assert food - {(1, 2)} == {(3, 1), (2, 1)}
+    assert food | {(9, 9)} == set(positions) | {(9, 9)}
+    assert food.isdisjoint({(9, 9)})
+
+    # immutable
+    with pytest.raises(TypeError):
+        food[0] = (1, 1)
+    with pytest.raises(AttributeError):
+        food.append((1, 1))
+
 def test_bot_graph():
     layout = """
     ########
@@ -0,0 +1,62 @@
+from pelita.ui.tk_history import GameHistory
+
+
+def make_state(i, walls=None):
+    if walls is None:
+        walls = [(x, 0) for x in range(32)] + [(x, 15) for x in range(32)]
+    return {
+        'round': i // 4 + 1,
+        'turn': i % 4,
+        'walls': walls,
+        'food': [(i, 1), (2, 3)],
+        'food_age': {(2, 3): i},
+        'bots': [(1, 1), (2, 2), (3, 3), (4, 4)],
+    }
+
+
+def test_roundtrip():
+    history = GameHistory(keep_full=3)
+    states = [make_state(i) for i in range(20)]
+    for i, state in enumerate(states):
+        history[i] = state
+
+    assert len(history) == 20
+    # recent frames are returned as they are
+    assert history[19] is states[19]
+    assert history[17] is states[17]
+    # older frames have been compressed
+    assert history[0] is not states[0]
+    for i, state in enumerate(states):
+        assert i in history
+        assert history[i] == state
+    assert 20 not in history
+    assert history.packed_bytes > 0
+
+
+def test_max_bytes_drops_oldest():
+    history = GameHistory(keep_full=2, max_bytes=0)
+    for i in range(10):
+        history[i] = make_state(i)
+    # everything but the uncompressed frames has been dropped
+    assert len(history) == 2
+    assert 7 not in history
+    assert 8 in history
+    assert 9 in history
+    assert history.packed_bytes == 0
+    # walls are not retained for dropped frames
+    assert history._walls == {}
+
+
+def test_overwrite_pointer():
+    history = GameHistory(keep_full=1)
+    walls_a = [(0, 0)]
+    walls_b = [(1, 1)]
+    for i in range(5):
+        history[i] = make_state(i, walls=walls_a)
+    # a new game reuses the pointers
+    for i in range(5):
+        history[i] = make_state(i + 100, walls=walls_b)
+    assert len(history) == 5
+    for i in range(5):
+        assert history[i] == make_state(i + 100, walls=walls_b)
+    assert list(entry[0] for entry in history._walls.values()) == [walls_b]
@@ -1,4 +1,5 @@
 import re
+import time
 from random import Random
 from textwrap import dedent
 from unittest.mock import MagicMock
@@ -285,6 +286,74 @@ class TestRoundRobin:
         assert roundrobin.rotate_with_fixed(list, fixed) == outcome
 
 
+def play_pairings(pairings, teams):
+    # plays the pairings until there are none left; the team with the
+    # lower index always wins
+    played = []
+    while matches := pairings(played):
+        for match in matches:
+            played.append({"match": match, "winner": min(match)})
+    return played
+
+
+class TestRatedRound1:
+    def test_fit_ratings(self):
+        played = [
+            {"match": ("a", "b"), "winner": "a"},
+            {"match": ("b", "c"), "winner": "b"},
+            {"match": ("c", "a"), "winner": "a"},
+            {"match": ("c", "d"), "winner": False},
+        ]
+        ratings = roundrobin.fit_ratings(["a", "b", "c", "d"], played)
+        # d only had a draw against c, who lost the other matches
+        assert roundrobin.rating_order(ratings) == ["a", "b", "d", "c"]
+        assert ratings["a"].games == 2
+        assert ratings["a"].score == 2
+        assert ratings["c"].score == 0.5
+        # the result does not depend on the order of the matches
+        reversed_ratings = roundrobin.fit_ratings(["a", "b", "c", "d"], played[::-1])
+        for team in ratings:
+            assert reversed_ratings[team].mu == pytest.approx(ratings[team].mu)
+        # without matches all teams are equal and uncertain
+        ratings = roundrobin.fit_ratings(["a", "b"], [])
+        assert ratings["a"].elo == ratings["b"].elo == roundrobin.ELO_BASE
+        assert ratings["a"].sigma == roundrobin.PRIOR_SIGMA
+
+    @pytest.mark.parametrize('num_teams', [2, 5, 8, 13])
+    def test_swiss_pairings(self, num_teams):
+        rng = Random(1)
+        teams = list(range(num_teams))
+        rounds = roundrobin.swiss_rounds(num_teams, top=4)
+        played = play_pairings(lambda played: roundrobin.swiss_pairings(teams, played, rng, rounds=rounds), teams)
+        assert len(played) == rounds * (num_teams // 2)
+        for round_idx in range(rounds):
+            matches = played[round_idx * (num_teams // 2):(round_idx + 1) * (num_teams // 2)]
+            # every team plays at most once per round
+            round_teams = [team for match in matches for team in match["match"]]
+            assert len(round_teams) == len(set(round_teams))
+        # no rematches
+        assert len({frozenset(match["match"]) for match in played}) == len(played)
+
+    def test_adaptive_pairings(self):
+        rng = Random(1)
+        teams = list(range(16))
+        played = play_pairings(lambda played: roundrobin.adaptive_pairings(teams, played, rng, top=4, confidence=0.9, batch=2), teams)
+        # far fewer matches than everybody vs everybody
+        assert len(played) < len(teams) * (len(teams) - 1) // 4
+        ratings = roundrobin.fit_ratings(teams, played)
+        assert roundrobin.top_confidence(ratings, 4) >= 0.9
+        assert set(roundrobin.rating_order(ratings)[:4]) == {0, 1, 2, 3}
+        # no team plays twice in the same batch
+        for first, second in zip(played[::2], played[1::2]):
+            assert set(first["match"]).isdisjoint(second["match"])
+
+    def test_adaptive_pairings_max_matches(self):
+        teams = list(range(8))
+        played = play_pairings(lambda played: roundrobin.adaptive_pairings(teams, played, Random(1), top=4, confidence=1.0,
+                                                                           max_matches=5), teams)
+        assert len(played) == 5
+
+
 ### ASSERTIONS:
 # There must be exactly one game_state with finished=True
 
@@ -297,6 +366,8 @@ class TestSingleMatch:
         config.viewer = 'ascii'
         config.size = 'tiny'
         config.tournament_log_folder = None
+        config.layout_store = None
+        config.in_process = False
 
         teams = ["pelita/player/StoppingPlayer", "pelita/player/StoppingPlayer"]
         (state, stdout, stderr) = tournament.play_game_with_config(config, teams, rng=RNG)
@@ -317,6 +388,22 @@ class TestSingleMatch:
         (state, stdout, stderr) = tournament.play_game_with_config(config, teams, rng=RNG)
         assert state['whowins'] == 1
 
+    def test_play_game_with_config_in_process(self):
+        config = MagicMock()
+        config.rounds = 200
+        config.team_spec = lambda x: x
+        config.team_group = lambda x: x
+        config.viewer = 'null'
+        config.size = 'tiny'
+        config.tournament_log_folder = None
+        config.layout_store = None
+        config.in_process = True
+
+        teams = ["pelita/player/SmartEatingPlayer", "pelita/player/StoppingPlayer"]
+        (state, stdout, stderr) = tournament.play_game_with_config(config, teams, rng=RNG)
+        assert state['whowins'] == 0
+        assert "Finished" in stdout
+
     def test_start_match(self):
         stdout = []
 
@@ -338,6 +425,8 @@ class TestSingleMatch:
         config.size = 'tiny'
         config.print = mock_print
         config.tournament_log_folder = None
+        config.layout_store = None
+        config.in_process = False
 
         team_ids = ["first_id", "first_id"]
         result = tournament.start_match(config, team_ids, rng=RNG)
@@ -376,6 +465,8 @@ class TestSingleMatch:
         config.size = 'tiny'
         config.print = mock_print
         config.tournament_log_folder = None
+        config.layout_store = None
+        config.in_process = False
 
         result = tournament.start_deathmatch(config, *teams.keys(), rng=RNG)
         assert result is not None
@@ -417,6 +508,8 @@ class TestTournament:
         config.viewer = 'null'
         config.state = None
         config.tournament_log_folder = None
+        config.layout_store = None
+        config.in_process = False
 
         # group1 should win
         assert "group1" == tournament.start_match(config, ["group0", "group1"], rng=RNG)
@@ -430,3 +523,254 @@ class TestTournament:
 
         winner = tournament.play_round2(config, rr_ranking, state, rng=RNG)
         assert winner == 'group1'
+
+    def test_round1_parallel(self, tmp_path):
+        def play(parallel):
+            stdout = []
+
+            def mock_print(str="", *args, **kwargs):
+                stdout.append(str)
+
+            c = {
+                "location": None,
+                "date": None,
+                "bonusmatch": None,
+                "teams": [
+                    {"id": "group0", "spec": "pelita/player/StoppingPlayer", "members": []},
+                    {"id": "group1", "spec": "pelita/player/SmartEatingPlayer", "members": []},
+                    {"id": "group2", "spec": "pelita/player/RandomPlayers", "members": []},
+                ],
+                "size": "tiny",
+                "rounds": 20,
+                "viewer": "null",
+                "parallel": parallel,
+                "in_process": True,
+                "statefile": str(tmp_path / f"state-{parallel}.yaml"),
+            }
+            config = tournament.Config(c)
+            config.print = mock_print
+            rng = Random(1)
+            state = tournament.State(config, rng=rng)
+            ranking = tournament.play_round1(config, state, rng=rng)
+            return ranking, state, stdout
+
+        ranking, state, stdout = play(1)
+        ranking_parallel, state_parallel, stdout_parallel = play(3)
+
+        # the same matches with the same results, presented in the same order
+        assert ranking_parallel == ranking
+        assert state_parallel.round1['unplayed'] == []
+        assert sorted(map(str, state_parallel.round1['played'])) == sorted(map(str, state.round1['played']))
+        assert stdout_parallel == stdout
+        # the state has been saved
+        saved = tournament.State.load(None, tmp_path / "state-3.yaml")
+        assert len(saved.round1['played']) == 3
+
+    def test_round1_parallel_interrupted(self, tmp_path, monkeypatch):
+        c = {
+            "location": None,
+            "date": None,
+            "bonusmatch": None,
+            "teams": [
+                {"id": f"group{idx}", "spec": "pelita/player/StoppingPlayer", "members": []}
+                for idx in range(5)
+            ],
+            "size": "tiny",
+            "viewer": "null",
+            "parallel": 2,
+            "statefile": str(tmp_path / "state.jsonl"),
+        }
+        config = tournament.Config(c)
+        config.print = lambda *args, **kwargs: None
+
+        played = []
+        def play_game(config, match, rng, *, match_id=None, seed=None, viewer=None):
+            played.append(match)
+            if len(played) > 1:
+                # later matches finish while the first one is presented
+                time.sleep(0.2)
+            return {"whowins": 0}, "", ""
+        monkeypatch.setattr(tournament, "play_game_with_config", play_game)
+
+        keypresses = []
+        def wait_for_keypress():
+            if not played:
+                # before the first round
+                return
+            # the matches that are running during the keypress are recorded
+            time.sleep(0.3)
+            keypresses.append(len(state.round1["played"]))
+            raise KeyboardInterrupt
+        config.wait_for_keypress = wait_for_keypress
+
+        state = tournament.State(config, rng=Random(1))
+        n_matches = len(state.round1["unplayed"])
+        with pytest.raises(KeyboardInterrupt):
+            tournament.play_round1(config, state, rng=Random(1))
+
+        # the queued matches have not been played
+        assert 1 < len(played) < n_matches
+        # matches that finished during the keypress have been recorded
+        assert len(keypresses) == 1
+        assert keypresses[0] > 1
+        assert len(state.round1["played"]) == len(played)
+        assert len(tournament.State.load(config, tmp_path / "state.jsonl").round1["played"]) == len(played)
+
+    @pytest.mark.parametrize('mode', ['swiss', 'adaptive'])
+    def test_round1_rated(self, tmp_path, mode):
+        stdout = []
+
+        def mock_print(str="", *args, **kwargs):
+            stdout.append(str)
+
+        c = {
+            "location": None,
+            "date": None,
+            "bonusmatch": None,
+            "teams": [
+                {"id": "group0", "spec": "pelita/player/StoppingPlayer", "members": []},
+                {"id": "group1", "spec": "pelita/player/SmartEatingPlayer", "members": []},
+                {"id": "group2", "spec": "pelita/player/StoppingPlayer", "members": []},
+                {"id": "group3", "spec": "pelita/player/StoppingPlayer", "members": []},
+            ],
+            "size": "tiny",
+            "rounds": 20,
+            "viewer": "null",
+            "in_process": True,
+            "round1_mode": mode,
+            "round1_top": 1,
+            "statefile": str(tmp_path / "state.jsonl"),
+        }
+        config = tournament.Config(c)
+        config.print = mock_print
+        rng = Random(1)
+        state = tournament.State(config, rng=rng)
+        assert state.round1['unplayed'] == []
+        ranking = tournament.play_round1(config, state, rng=rng)
+
+        assert ranking[0] == "group1"
+        assert state.round1['unplayed'] == []
+        if mode == 'swiss':
+            assert len(state.round1['played']) == config.swiss_rounds * 2
+        assert any("confidence" in line for line in stdout)
+        # the scheduled matches are in the journal
+        saved = tournament.State.load(config, tmp_path / "state.jsonl")
+        assert saved.state == state.state
+
+    def test_round1_mode_config(self):
+        c = {
+            "location": None,
+            "date": None,
+            "bonusmatch": None,
+            "teams": [],
+            "round1_mode": "knockout",
+        }
+        with pytest.raises(ValueError):
+            tournament.Config(c)
+
+
+
+class TestState:
+    @pytest.fixture
+    def config(self, tmp_path):
+        config = MagicMock()
+        config.team_ids = ["a", "b", "c", "d"]
+        config.bonusmatch = False
+        config.statefile = tmp_path / "state.jsonl"
+        return config
+
+    def test_journal(self, config):
+        state = tournament.State(config, rng=Random(1))
+        # nothing is written before the first result
+        assert not config.statefile.exists()
+        assert len(state.round1["unplayed"]) == 6
+
+        first, second = state.round1["unplayed"][-2:]
+        state.record_round1(second, "a")
+        state.record_round1(first, False)
+        # a snapshot and one result
+        assert len(config.statefile.read_text().splitlines()) == 2
+
+        loaded = tournament.State.load(config, config.statefile)
+        assert loaded.state == state.state
+        assert loaded.round1["played"][-1] == {"match": first, "winner": False}
+
+        # the loaded state appends to the journal
+        third = loaded.round1["unplayed"][-1]
+        loaded.record_round1(third, "c")
+        assert len(config.statefile.read_text().splitlines()) == 3
+        assert tournament.State.load(config, config.statefile).state == loaded.state
+
+    def test_journal_replay_order(self, config):
+        # matches can occur several times and scheduled matches are prepended
+        round1 = {"played": [], "unplayed": [("a", "b"), ("c", "d"), ("a", "b")]}
+        state = tournament.State(config, rng=None, state={"round1": round1, "round2": {}})
+        state.record_round1(("c", "d"), "c")
+        state.schedule_round1([("a", "b"), ("b", "c"), ("a", "b")])
+        state.record_round1(("a", "b"), "a")
+        state.schedule_round1([("c", "d")])
+        state.record_round1(("a", "b"), None)
+        state.record_round1(("x", "y"), "x")
+
+        loaded = tournament.State.load(config, config.statefile)
+        assert loaded.state == state.state
+        assert loaded.round1["unplayed"] == [("c", "d"), ("b", "c"), ("a", "b"), ("a", "b")]
+
+    def test_journal_round2(self, config):
+        state = tournament.State(config, rng=Random(1))
+        state.record_ranking(["b", "a", "d", "c"])
+
+        last_match = knockout_mode.prepare_matches(["b", "a", "d", "c"], bonusmatch=False)
+        tree = knockout_mode.tree_enumerate(last_match)
+        round_idx, match_idx = next((r, m) for r, matches in enumerate(tree)
+                                    for m, match in enumerate(matches) if isinstance(match, Match))
+        state.record_round2(round_idx, match_idx, "b")
+
+        loaded = tournament.State.load(config, config.statefile)
+        assert loaded.round2["round_robin_ranking"] == ["b", "a", "d", "c"]
+        assert loaded.round2["tournament"][round_idx][match_idx].winner == "b"
+        assert loaded.round2["last_match"].winner is None
+
+    def test_journal_compaction_and_crash(self, config):
+        state = tournament.State(config, rng=Random(1))
+        state.COMPACT_EVERY = 2
+        for match in list(state.round1["unplayed"])[:4]:
+            state.record_round1(match, match[0])
+        # snapshot, two results, then a new snapshot with all four results
+        assert len(config.statefile.read_text().splitlines()) == 1
+
+        # a record that was not completely written is ignored
+        with open(config.statefile, 'a') as f:
+            f.write('{"event": "round1", "ma')
+        loaded = tournament.State.load(config, config.statefile)
+        assert loaded.state == state.state
+
+        # and the journal is repaired with the next record
+        match = loaded.round1["unplayed"][-1]
+        loaded.record_round1(match, False)
+        assert tournament.State.load(config, config.statefile).state == loaded.state
+
+    def test_yaml(self, config, tmp_path):
+        state = tournament.State(config, rng=Random(1), journal=None)
+        match = state.round1["unplayed"][-1]
+        state.record_round1(match, "d")
+
+        state.export_yaml(tmp_path / "state.yaml")
+        # earlier versions stored the state as YAML
+        loaded = tournament.State.load(config, tmp_path / "state.yaml")
+        assert loaded.state == state.state
+        # the YAML file is left untouched
+        yaml_content = (tmp_path / "state.yaml").read_text()
+        assert not yaml_content.startswith('{')
+        assert not (tmp_path / "state.jsonl").exists()
+
+        # the journal is written next to it with the first new record
+        match = loaded.round1["unplayed"][-1]
+        loaded.record_round1(match, None)
+        assert (tmp_path / "state.yaml").read_text() == yaml_content
+        assert (tmp_path / "state.jsonl").read_text().startswith('{"event": "snapshot"')
+        assert tournament.State.load(config, tmp_path / "state.jsonl").state == loaded.state
+
+        # a second conversion would overwrite the journal
+        with pytest.raises(FileExistsError):
+            tournament.State.load(config, tmp_path / "state.yaml")
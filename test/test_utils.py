@@ -1,3 +1,6 @@
+import math
+import time
+
 import pytest
 
 from pelita import base_utils, utils
@@ -87,6 +90,58 @@ def test_setup_test_game_incomplete_noisy_dict(is_blue):
     assert test_game.enemy[1].is_noisy is True
 
 
+def test_setup_test_game_time_left():
+    layout = """
+        ##########
+        #a  .  .y#
+        #b #..# x#
+        ##########
+    """
+    bot = utils.setup_test_game(layout=layout)
+    assert bot.deadline is None
+    assert bot.time_left() == math.inf
+
+    bot = utils.setup_test_game(layout=layout, time_left=10)
+    assert 9 < bot.time_left() <= 10
+    assert bot.enemy[0].deadline == bot.deadline
+
+
+def test_iterative_deepening(monkeypatch):
+    layout = """
+        ##########
+        #a  .  .y#
+        #b #..# x#
+        ##########
+    """
+    # a fake clock that only advances in the search
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+
+    depths = []
+    def search(depth):
+        depths.append(depth)
+        # every level takes twice as long as the one before
+        now[0] += 0.01 * 2 ** depth
+        return depth * 10
+
+    bot = utils.setup_test_game(layout=layout, time_left=0.25)
+    depth, result = utils.iterative_deepening(search, bot)
+    # 0.02 + 0.04 + 0.08 s have been used, the next level would need 0.16 s
+    assert depth == 3
+    assert result == 30
+    assert depths == [1, 2, 3]
+
+    # the first depth is always searched
+    depths.clear()
+    bot = utils.setup_test_game(layout=layout, time_left=0)
+    assert utils.iterative_deepening(search, bot, start=2) == (2, 20)
+    assert depths == [2]
+
+    # without a deadline the search stops at max_depth
+    bot = utils.setup_test_game(layout=layout)
+    assert utils.iterative_deepening(lambda depth: depth, bot, max_depth=5) == (5, 5)
+
+
 def test_run_background_game():
     result = utils.run_background_game(blue_move=stopping_player, red_move=stopping_player)
     result.pop('seed')